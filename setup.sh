@@ -1,3 +1,2 @@
 #!/bin/bash
-python -m nltk.downloader punkt averaged_perceptron_tagger
-python -m spacy download pt_core_news_lg
+python src/modelo_nlp.py --instalar
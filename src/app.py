@@ -1,8 +1,9 @@
+import json
+import os
+import time
 import streamlit as st
 import pandas as pd
 import numpy as np
-import time
-import nltk
 
 # Configuração da página DEVE SER A PRIMEIRA COISA
 st.set_page_config(
@@ -12,16 +13,222 @@ st.set_page_config(
 )
 
 # Agora importar os outros módulos
-from data_processing import EntrevistaProcessor
-from visualization import mostrar_filtros, plotar_visualizacoes
-from gerador_entrevistas import GeradorEntrevistas
+from data_processing import CAMPOS_PROCESSADOS
+from visualization import CHAVE_MEDIR_PAYLOAD, mostrar_filtros, plotar_visualizacoes
+from filtros import MotorFiltros, assinatura_dataframe
+from colunar import compactar
+from navegador_entrevistas import NavegadorEntrevistas
+from indice_textual import ConsultaSemTermos, IndiceInvertido, obter_indice_textual
+from conjunto_dados import COLUNAS_RESIDENTES, RecorteDados
+from cubo import CuboAgregado
+from ingestao import Ingestao
+from trabalhador_processamento import TrabalhadorProcessamento, TAMANHO_BLOCO
+from artefatos import ARQUIVO_INDICE_TEXTUAL, caminho_artefato, carregar_artefatos, ler_manifesto
+from servico_topicos import obter_servico_topicos
+from modelo_nlp import registro_modelos
+from utils import INICIO_RAPIDO, pre_carregar_modulos
+from instrumentacao import instrumentacao, servir_metricas, PORTA_METRICAS
+
+if not INICIO_RAPIDO:
+    pre_carregar_modulos()
+
+# Aquecimento do modelo compartilhado assim que o servidor importa o script
+registro_modelos.aquecer_em_segundo_plano()
+
+# Endpoint local de métricas (Prometheus/JSON): EVASAO_PORTA_METRICAS=9108 streamlit run app.py
+if PORTA_METRICAS:
+    servir_metricas(PORTA_METRICAS)
+
+# Exportação real de entrevistas (.csv, .jsonl ou .parquet) lida em blocos; vazio = dados fictícios
+ARQUIVO_ENTRADA = os.environ.get('EVASAO_ENTRADA', '')
+
+# Intervalo (s) entre atualizações automáticas do painel enquanto o processamento não termina
+INTERVALO_ATUALIZACAO = float(os.environ.get('EVASAO_INTERVALO_ATUALIZACAO', '2'))
+
+def mostrar_status_modelo(processor=None):
+    """Indicador de saúde do modelo de NLP na barra lateral"""
+    status = registro_modelos.status()
+    estado = status['estado']
+    if estado == 'carregado':
+        st.sidebar.caption(
+            f"🟢 Modelo NLP carregado em {status['tempo_carga']:.1f}s "
+            f"({len(status['componentes'])} componentes, v{status['versao']})")
+        if processor is not None:
+            st.sidebar.caption(
+                f"Perfil de análise: {processor.perfil} "
+                f"(campos: {', '.join(processor.campos_preenchidos)})")
+    elif estado == 'indisponivel':
+        st.sidebar.error(f"🔴 Modelo NLP indisponível: {status['erro']}")
+    else:
+        st.sidebar.caption("🟡 Modelo NLP carregando...")
+
+def mostrar_painel_desenvolvimento():
+    """Tempos por etapa do rerun atual, acumulados do processo e exportação das métricas"""
+    with st.sidebar.expander("🛠️ Desenvolvimento"):
+        execucao = instrumentacao.execucao_atual()
+        if execucao:
+            st.caption(f"Este rerun: {instrumentacao.duracao_execucao():.2f}s")
+            st.dataframe(pd.DataFrame(
+                [(nome, n, segundos * 1000, None if memoria is None else memoria / 1024 ** 2)
+                 for nome, (n, segundos, memoria) in execucao.items()],
+                columns=['etapa', 'execuções', 'ms', 'memória (MB)']).sort_values('ms', ascending=False),
+                use_container_width=True)
+        
+        metricas = instrumentacao.exportar_json()
+        if st.checkbox("Acumulado do processo"):
+            st.dataframe(pd.DataFrame.from_dict(metricas['etapas'], orient='index')
+                         .sort_values('segundos_total', ascending=False), use_container_width=True)
+            st.json(metricas['contadores'])
+        
+        st.checkbox("Tamanho do payload dos gráficos", key=CHAVE_MEDIR_PAYLOAD,
+                    help="Serializa cada gráfico mais uma vez para medir; deixa o painel mais lento")
+        
+        rastrear = st.checkbox("Rastrear memória (tracemalloc)", value=metricas['memoria_rastreada'] is not None,
+                               help="Mede a variação de memória de cada etapa; deixa o painel mais lento")
+        instrumentacao.rastrear_memoria(rastrear)
+        if rastrear:
+            for alocacao in instrumentacao.maiores_alocacoes(5):
+                st.caption(f"{alocacao['bytes'] / 1024:.0f} KB - {alocacao['local']}")
+        
+        st.download_button("Métricas (JSON)", json.dumps(metricas, ensure_ascii=False, indent=2),
+                           file_name='metricas.json', mime='application/json')
+        st.download_button("Métricas (Prometheus)", instrumentacao.exportar_prometheus(),
+                           file_name='metricas.prom', mime='text/plain')
+        if st.button("Salvar métricas em data/"):
+            st.caption(' | '.join(instrumentacao.salvar()))
+
+@st.cache_resource(max_entries=4)
+def _indices_dados(assinatura, _compacto, _cubo=None, caminho_indice=None, _conjunto=None, indexar_texto=True):
+    # Índices dos filtros, cubo agregado, navegador e índice textual compartilhados entre sessões
+    # enquanto os dados não mudarem
+    df = _compacto.tabela
+    if not indexar_texto:
+        indice_textual = None
+    elif 'tokens_limpos' in df.columns:
+        # No processamento local a assinatura também identifica os tokens (sem novo hash)
+        indice_textual = obter_indice_textual(df['tokens_limpos'], caminho_indice,
+                                              assinatura if caminho_indice is None else None)
+    else:
+        # Tokens fora da memória: o índice gravado pelo pipeline corresponde às mesmas partes
+        indice_textual = IndiceInvertido.carregar(caminho_indice)
+    navegador = NavegadorEntrevistas(_compacto, carregar=_conjunto.linhas if _conjunto is not None else None)
+    return (MotorFiltros(df), _cubo if _cubo is not None else CuboAgregado(df), navegador, indice_textual)
+
+def assinatura_dados(compacto):
+    """Hash das colunas usadas pelos índices (identifica dados sem versão conhecida entre reruns)"""
+    tabela = compacto.tabela
+    # Colunas dos filtros + as usadas só pelo cubo, pelo índice de ids e pela busca
+    colunas = [c for c in tabela.columns if c in MotorFiltros.COLUNAS_CATEGORICAS
+               or c in MotorFiltros.COLUNAS_NUMERICAS or c in ('id', 'subjetividade', 'tokens_limpos')]
+    return assinatura_dataframe(tabela, colunas)
+
+def obter_indices_dados(compacto, cubo=None, caminho_indice=None, conjunto=None, assinatura=None,
+                        indexar_texto=True):
+    """Retorna (motor de filtros, cubo agregado, navegador de entrevistas, índice textual)
+    
+    cubo, caminho_indice e conjunto: versões pré-calculadas pelo pipeline em lote, quando houver
+    assinatura: identificação dos dados já conhecida (senão é calculada)
+    indexar_texto: False durante o processamento em segundo plano; o índice textual (None)
+    só é construído e gravado uma vez, com todas as entrevistas
+    """
+    return _indices_dados(assinatura or assinatura_dados(compacto), compacto, cubo, caminho_indice, conjunto,
+                          indexar_texto)
 
+@st.cache_data
 def carregar_dados():
-    # Gera ou carrega dados fictícios
-    gerador = GeradorEntrevistas(150)  # 150 entrevistas
+    # Gera dados fictícios (sem arquivo de entrada configurado); o gerador (e o Faker) só
+    # é importado aqui, nunca quando o painel serve artefatos ou um arquivo real
+    from gerador_entrevistas import GeradorEntrevistas
+    gerador = GeradorEntrevistas(150, seed=42)  # 150 entrevistas, as mesmas a cada execução
     return gerador.gerar_dataframe()
 
+@st.cache_resource
+def obter_trabalhador():
+    # Um único processamento em segundo plano por processo, compartilhado entre sessões;
+    # o arquivo real é lido bloco a bloco pelo próprio trabalhador
+    entrada = Ingestao(ARQUIVO_ENTRADA, TAMANHO_BLOCO) if ARQUIVO_ENTRADA else carregar_dados()
+    return TrabalhadorProcessamento(entrada).iniciar()
+
+@st.cache_resource(max_entries=1)
+def _artefatos(execucao, _manifesto):
+    # Só as colunas leves ficam em memória; texto, listas e tokens são lidos das partes sob demanda
+    conjunto, cubo, motor_frases = carregar_artefatos(_manifesto)
+    residentes = compactar(conjunto.ler([c for c in COLUNAS_RESIDENTES if c in conjunto.colunas]))
+    return conjunto, cubo, residentes, motor_frases
+
+def obter_artefatos():
+    """(manifesto, conjunto Parquet, cubo, colunas residentes, motor de frases-chave) da última
+    execução do pipeline, ou None
+    
+    O manifesto é relido a cada rerun: uma nova execução publicada troca os dados servidos.
+    """
+    manifesto = ler_manifesto()
+    if manifesto is None:
+        return None
+    try:
+        return (manifesto, *_artefatos(manifesto['execucao'], manifesto))
+    except Exception as e:
+        print(f"Não foi possível carregar os artefatos do pipeline: {str(e)}")
+        return None
+
+@st.cache_resource
+def obter_processador(perfil):
+    # Só normaliza as consultas da busca quando os dados vêm do pipeline
+    from data_processing import EntrevistaProcessor
+    return EntrevistaProcessor(perfil=perfil)
+
+def dados_fallback(df):
+    """Entrevistas com os campos processados nos valores padrão (quando o processamento falha)"""
+    fallback_data = {
+        'temas': [[]] * len(df),
+        'sentimento': ['Neutro'] * len(df),
+        'entidades': [[]] * len(df),
+        'polaridade': [0] * len(df),
+        'subjetividade': [0] * len(df),
+        'frases_chave': [[]] * len(df),
+        'tokens_limpos': [''] * len(df)
+    }
+    return df.join(pd.DataFrame(fallback_data, index=df.index)[CAMPOS_PROCESSADOS], rsuffix='_processed')
+
+def mostrar_progresso(status):
+    """Andamento real do processamento em segundo plano"""
+    total = status['total']
+    processados = status['processados']
+    if total is not None:
+        st.progress(int(100 * processados / total) if total else 100)
+    if status['estado'] == 'carregando_modelo':
+        st.caption("Carregando o modelo de NLP...")
+    else:
+        # Arquivo lido em blocos: o total só é conhecido ao fim da leitura
+        contagem = f"{processados}/{total}" if total is not None else f"{processados} (leitura em andamento)"
+        st.caption(f"Processando entrevistas em segundo plano: {contagem} "
+                   f"({status['blocos']} blocos concluídos) - o painel mostra as já processadas")
+
+def mostrar_relatorio_ingestao(ingestao):
+    """Linhas válidas e em quarentena do arquivo de entrada"""
+    relatorio = ingestao.relatorio
+    st.sidebar.caption(f"Arquivo {os.path.basename(ingestao.caminho)}: {relatorio['validas']} entrevistas válidas")
+    if relatorio['invalidas']:
+        motivos = ', '.join(f"{motivo} ({n})" for motivo, n in relatorio['motivos'].most_common())
+        st.sidebar.warning(f"{relatorio['invalidas']} linhas inválidas em quarentena: {motivos}")
+
+def agendar_atualizacao(trabalhador, concluido):
+    """Reexecuta o script após um intervalo enquanto há blocos por processar
+
+    concluido: estado lido no início do rerun; se o processamento terminou durante o rerun,
+    mais um redesenha o painel com todos os dados e o índice textual
+    """
+    if trabalhador is None or concluido:
+        return
+    if st.sidebar.checkbox("Atualizar automaticamente", value=True,
+                           help="Redesenha o painel conforme novos blocos de entrevistas terminam"):
+        time.sleep(INTERVALO_ATUALIZACAO)
+        st.experimental_rerun()
+
 def main():
+    instrumentacao.iniciar_execucao()
+    instrumentacao.contar('painel.reruns')
+    
     # Cabeçalho profissional
     st.title("📊 Painel de Análise de Evasão em Cursos TIC")
     st.markdown("""
@@ -36,106 +243,118 @@ def main():
     
     st.warning("⚠️ Trabalhando com dados fictícios para desenvolvimento - aguardando dados reais do TCC")
     
-    # Download NLTK data (fazer apenas uma vez)
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-    except:
-        st.warning("Não foi possível baixar dados do NLTK, continuando...")
-    
-    # Barra de progresso para simular processamento
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i in range(100):
-        progress_bar.progress(i + 1)
-        status_text.text(f"Carregando dados... {i+1}%")
-        time.sleep(0.01)  # Simula processamento
-    
-    # Carregar e processar dados
-    with st.spinner('Gerando dados fictícios...'):
-        df = carregar_dados()
-    
-    with st.spinner('Processando entrevistas...'):
+    # Artefatos do pipeline em lote (python pipeline.py), se houver; senão processamento em
+    # segundo plano, com o painel usando as entrevistas já concluídas
+    with instrumentacao.etapa('painel.carregar_dados'):
+        artefatos = obter_artefatos()
+    cubo_pronto = caminho_indice = trabalhador = conjunto = servico_topicos = None
+    concluido = True
+    if artefatos is not None:
+        manifesto, conjunto, cubo_pronto, compacto, motor_frases = artefatos
+        # A execução publicada já identifica os dados
+        versao = manifesto['execucao']
+        caminho_indice = caminho_artefato(manifesto, ARQUIVO_INDICE_TEXTUAL)
+        if manifesto.get('modelo_topicos'):
+            servico_topicos = obter_servico_topicos(caminho=caminho_artefato(manifesto, manifesto['modelo_topicos']))
+        processor = obter_processador(manifesto['configuracao']['perfil'])
+        st.sidebar.caption(f"Dados do pipeline em lote: {manifesto['linhas']} entrevistas "
+                           f"({time.strftime('%d/%m/%Y %H:%M', time.localtime(manifesto['publicado_em']))})")
+    else:
+        trabalhador = obter_trabalhador()
+        status = trabalhador.status()
+        # Lido antes dos dados: concluído aqui garante que versionado() entrega todos os blocos
+        concluido = trabalhador.concluido
+        processor = trabalhador.processor
+        # Layout compacto (categóricas + listas achatadas), montado bloco a bloco pelo trabalhador;
+        # a versão muda quando o trabalhador entrega dados novos (em passos crescentes)
+        compacto, versao = trabalhador.versionado()
+        motor_frases = trabalhador.motor_frases
+        
+        if not trabalhador.concluido:
+            mostrar_progresso(status)
+        elif status['estado'] == 'erro':
+            st.error(f"Falha no processamento: {status.get('erro')}")
+            if compacto is None and isinstance(trabalhador.entrada, pd.DataFrame):
+                compacto, versao = compactar(dados_fallback(trabalhador.entrada)), None
+            elif compacto is not None:
+                st.warning(f"Exibindo as {len(compacto)} entrevistas processadas antes da falha")
+        
+        if isinstance(trabalhador.entrada, Ingestao):
+            mostrar_relatorio_ingestao(trabalhador.entrada)
+        
+        if compacto is None:
+            if status['estado'] == 'erro':
+                return
+            st.info("Processando o primeiro bloco de entrevistas...")
+            agendar_atualizacao(trabalhador, concluido)
+            return
+        
+        # Modelo de tópicos destes dados e desta versão do pipeline (com artefatos, o pipeline já o
+        # ajustou). Só é ajustado quando o último bloco termina: ajustar sobre o primeiro bloco
+        # fixaria o vocabulário de poucas entrevistas; até lá vale o modelo salvo, se houver
         try:
-            processor = EntrevistaProcessor()
-            resultados = []
-            
-            sample_df = df.head(150)
-            
-            for idx, row in sample_df.iterrows():
-                serie_processada = processor.processar_entrevista(row)
-                resultados.append(serie_processada)
-                
-            processed_data = sample_df.join(pd.DataFrame(resultados), rsuffix='_processed')
-            
-            # Verificação de qualidade
-            if processed_data.isnull().values.any():
-                st.warning("Alguns dados processados contêm valores nulos - continuando com dados limitados")
-                # Preencher valores nulos
-                processed_data = processed_data.fillna({
-                    'temas': [],
-                    'sentimento': 'Neutro',
-                    'entidades': [],
-                    'polaridade': 0,
-                    'subjetividade': 0,
-                    'frases_chave': [],
-                    'tokens_limpos': ''
-                })
-                
+            servico_topicos = obter_servico_topicos(identificacao=trabalhador.identificacao())
+            if trabalhador.concluido:
+                # Uma vez por versão dos dados, não a cada rerun
+                servico_topicos.atualizar_em_segundo_plano(compacto.tabela['tokens_limpos'], versao)
         except Exception as e:
-            st.error(f"Falha no processamento: {str(e)}")
-            # Criar dados de fallback
-            fallback_data = {
-                'temas': [[]] * len(df),
-                'sentimento': ['Neutro'] * len(df),
-                'entidades': [[]] * len(df),
-                'polaridade': [0] * len(df),
-                'subjetividade': [0] * len(df),
-                'frases_chave': [[]] * len(df),
-                'tokens_limpos': [''] * len(df)
-            }
-            processed_data = df.join(pd.DataFrame(fallback_data, index=df.index))
+            print(f"Modelo de tópicos indisponível: {str(e)}")
     
-    progress_bar.empty()
-    status_text.empty()
+    mostrar_status_modelo(processor)
     
     # Mostrar resumo dos dados
     if st.checkbox("Mostrar resumo dos dados"):
         st.subheader("Resumo Estatístico")
-        st.dataframe(processed_data.describe(include='all'))
+        st.dataframe(compacto.tabela.describe(include='all'))
     
     # Seção de filtros e visualizações
     try:
-        filtros = mostrar_filtros(processed_data)
-        df_filtrado = processed_data.copy()
+        filtros = mostrar_filtros(compacto.tabela)
+        
+        with instrumentacao.etapa('painel.indices'):
+            # Sem versão (dados de contingência), o hash das colunas
+            versao = versao or assinatura_dados(compacto)
+            motor, cubo, navegador, indice_textual = obter_indices_dados(
+                compacto, cubo_pronto, caminho_indice, conjunto, versao,
+                indexar_texto=trabalhador is None or concluido)
+        with instrumentacao.etapa('painel.filtros'):
+            posicoes = motor.filtrar(filtros)
         
-        # Aplicar filtros COM INDENTAÇÃO CORRETA
-        if filtros.get('regiao') and filtros['regiao'] != "Todas":
-            df_filtrado = df_filtrado[df_filtrado['regiao'] == filtros['regiao']]
-        if filtros.get('curso') and filtros['curso'] != "Todos":
-            df_filtrado = df_filtrado[df_filtrado['curso'] == filtros['curso']]
-        if filtros.get('situacao') and filtros['situacao'] != "Todas":
-            df_filtrado = df_filtrado[df_filtrado['situacao'] == filtros['situacao']]
-        if filtros.get('sentimento'):
-            df_filtrado = df_filtrado[df_filtrado['sentimento'].isin(filtros['sentimento'])]
-        if filtros.get('idade_range'):
-            min_idade, max_idade = filtros['idade_range']
-            # Validar se os valores são diferentes
-            if min_idade != max_idade:
-                df_filtrado = df_filtrado[(df_filtrado['idade'] >= min_idade) & (df_filtrado['idade'] <= max_idade)]
-        if filtros.get('polaridade_range'):
-            min_pol, max_pol = filtros['polaridade_range']
-            # Validar se os valores são diferentes
-            if min_pol != max_pol:
-                df_filtrado = df_filtrado[(df_filtrado['polaridade'] >= min_pol) & (df_filtrado['polaridade'] <= max_pol)]
+        encontradas = None
+        if filtros.get('busca') and indice_textual is None:
+            st.sidebar.caption("A busca fica disponível quando o processamento terminar")
+        elif filtros.get('busca'):
+            normalizar = processor.normalizar_consulta if processor is not None else None
+            try:
+                with instrumentacao.etapa('painel.busca'):
+                    encontradas = indice_textual.buscar(filtros['busca'], normalizar)
+            except ConsultaSemTermos as e:
+                st.sidebar.warning(str(e))
+        if encontradas is not None:
+            posicoes = np.intersect1d(posicoes, encontradas, assume_unique=True)
+            st.sidebar.caption(f"{len(encontradas)} entrevistas contêm a busca")
+            # O cubo não conhece a busca: os gráficos passam a ser agregados sobre o recorte
+            cubo = None
         
-        # Visualizações
-        plotar_visualizacoes(df_filtrado)
+        # Só colunas leves viram DataFrame; texto, listas e tokens são pedidos pelas abas ao recorte
+        # (lidos do layout compacto ou, com artefatos, das partes Parquet com os filtros como predicado)
+        ids_busca = compacto.tabela['id'].to_numpy()[posicoes] if conjunto is not None and encontradas is not None else None
+        recorte = RecorteDados(compacto, None if len(posicoes) == len(compacto) else posicoes,
+                               conjunto, filtros, ids_busca)
+        with instrumentacao.etapa('painel.recorte'):
+            df_filtrado = recorte.colunas([c for c in compacto.ordem_colunas if c in COLUNAS_RESIDENTES])
+        
+        # Visualizações (gráficos e métricas a partir do cubo)
+        plotar_visualizacoes(df_filtrado, cubo=cubo, filtros=filtros, navegador=navegador, posicoes=posicoes,
+                             recorte=recorte, versao=versao, motor_frases=motor_frases,
+                             servico_topicos=servico_topicos)
         
     except Exception as e:
         st.error(f"Erro na aplicação de filtros ou visualizações: {str(e)}")
     
+    mostrar_painel_desenvolvimento()
+    agendar_atualizacao(trabalhador, concluido)
+    
     # Rodapé profissional
     st.markdown("---")
     st.markdown("""
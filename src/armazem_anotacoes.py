@@ -0,0 +1,114 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+import pandas as pd
+
+from data_processing import CAMPOS_PROCESSADOS, preencher_campos_padrao
+from utils import caminho_dados
+from instrumentacao import instrumentacao
+
+# Limite de parâmetros por consulta do SQLite
+TAMANHO_CONSULTA = 900
+
+
+class ArmazemAnotacoes:
+    """Armazém em disco das anotações de entrevistas, endereçado pelo conteúdo do texto"""
+    
+    def __init__(self, caminho=None):
+        self.caminho = caminho or caminho_dados('anotacoes.sqlite')
+        self._lock = threading.Lock()
+        with self._conectar() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS anotacoes (
+                    chave TEXT PRIMARY KEY,
+                    dados TEXT NOT NULL
+                )
+            """)
+    
+    @contextmanager
+    def _conectar(self):
+        """Conexão com commit ao fim do bloco (rollback em erro), sempre fechada ao sair"""
+        with closing(sqlite3.connect(self.caminho, timeout=30)) as conn, conn:
+            yield conn
+    
+    @staticmethod
+    def chave(texto, versao):
+        """Hash do texto combinado com a versão do modelo/pipeline"""
+        return hashlib.sha256(f"{versao}\0{texto}".encode('utf-8')).hexdigest()
+    
+    def buscar(self, chaves):
+        """Retorna um dicionário chave -> anotações para as chaves já armazenadas"""
+        chaves = list(chaves)
+        encontrados = {}
+        with self._conectar() as conn:
+            for inicio in range(0, len(chaves), TAMANHO_CONSULTA):
+                parte = chaves[inicio:inicio + TAMANHO_CONSULTA]
+                marcadores = ','.join('?' * len(parte))
+                cursor = conn.execute(
+                    f"SELECT chave, dados FROM anotacoes WHERE chave IN ({marcadores})", parte)
+                for chave, dados in cursor:
+                    encontrados[chave] = self._decodificar(dados)
+        return encontrados
+    
+    def salvar(self, anotacoes):
+        """Grava um dicionário chave -> anotações"""
+        linhas = [(chave, json.dumps(dados, ensure_ascii=False)) for chave, dados in anotacoes.items()]
+        with self._lock, self._conectar() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO anotacoes (chave, dados) VALUES (?, ?)", linhas)
+    
+    @staticmethod
+    def _decodificar(dados):
+        anotacao = json.loads(dados)
+        # JSON não preserva tuplas
+        anotacao['entidades'] = [tuple(ent) for ent in anotacao['entidades']]
+        return anotacao
+    
+    def processar(self, df, processor, batch_size=64, n_process=1, progresso=None):
+        """Processa apenas entrevistas novas ou alteradas, reaproveitando o restante do armazém"""
+        versao = processor.versao_pipeline()
+        textos = df['texto'].fillna('').astype(str)
+        chaves = [self.chave(texto, versao) for texto in textos]
+        
+        with instrumentacao.etapa('armazem.buscar'):
+            encontrados = self.buscar(set(chaves))
+        
+        # Textos repetidos são processados uma única vez
+        pendentes = {}
+        for chave, texto in zip(chaves, textos):
+            if chave not in encontrados and chave not in pendentes:
+                pendentes[chave] = texto
+        
+        if pendentes:
+            df_pendentes = pd.DataFrame({'texto': list(pendentes.values())}, index=list(pendentes.keys()))
+            novos = processor.processar_lote(df_pendentes, batch_size=batch_size,
+                                             n_process=n_process, progresso=progresso)
+            novas_anotacoes = {
+                chave: {campo: valor for campo, valor in zip(CAMPOS_PROCESSADOS, linha)}
+                for chave, linha in zip(novos.index, novos.itertuples(index=False, name=None))
+            }
+            with instrumentacao.etapa('armazem.salvar'):
+                self.salvar(novas_anotacoes)
+            encontrados.update(novas_anotacoes)
+        elif progresso is not None:
+            progresso(len(chaves), len(chaves))
+        
+        instrumentacao.contar('anotacoes.reaproveitadas', len(chaves) - len(pendentes))
+        instrumentacao.contar('anotacoes.processadas', len(pendentes))
+        
+        colunas = {campo: [encontrados[chave][campo] for chave in chaves] for campo in CAMPOS_PROCESSADOS}
+        resultado = pd.DataFrame(colunas, index=df.index, columns=CAMPOS_PROCESSADOS)
+        resultado.attrs['perfil'] = processor.perfil
+        resultado.attrs['campos_preenchidos'] = processor.campos_preenchidos
+        return resultado
+    
+    def anotar(self, df, processor, batch_size=64, n_process=1, progresso=None):
+        """As entrevistas com as colunas processadas juntadas (sentimento do texto vira sentimento_processed)"""
+        resultados = self.processar(df, processor, batch_size=batch_size, n_process=n_process, progresso=progresso)
+        processado = df.join(resultados, rsuffix='_processed')
+        if processado.isnull().values.any():
+            processado = preencher_campos_padrao(processado)
+        return processado
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import time
+import pandas as pd
+
+from colunar import COLUNAS_CATEGORICAS
+from cubo import CuboAgregado
+from utils import DIRETORIO_DADOS
+
+# Artefatos gerados pelo pipeline (python pipeline.py) e lidos pelo painel sem escrita
+DIRETORIO_ARTEFATOS = os.environ.get('EVASAO_ARTEFATOS', os.path.join(DIRETORIO_DADOS, 'artefatos'))
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_CUBO = 'cubo.parquet'
+ARQUIVO_INDICE_TEXTUAL = 'indice_textual.npz'
+ARQUIVO_FRASES_CHAVE = 'frases_chave.npz'
+ARQUIVO_MODELO_TOPICOS = 'modelo_topicos.joblib'
+DIRETORIO_PARTES = 'entrevistas'
+VERSAO_FORMATO = 2
+
+# Colunas de texto repetitivo lidas como dicionário (viram categóricas no pandas)
+COLUNAS_DICIONARIO = COLUNAS_CATEGORICAS + ['texto']
+
+
+def _esquema_processado():
+    import pyarrow as pa
+    return {
+        'temas': pa.list_(pa.string()),
+        'entidades': pa.list_(pa.struct([('texto', pa.string()), ('rotulo', pa.string())])),
+        'frases_chave': pa.list_(pa.string()),
+        'tokens_limpos': pa.string(),
+        'polaridade': pa.float64(),
+        'subjetividade': pa.float64(),
+        'sentimento_processed': pa.string()
+    }
+
+
+def tabela_arrow(df):
+    """Tabela Arrow de um bloco processado, com o mesmo esquema em todas as partes
+
+    Categóricas viram texto (o Parquet já codifica por dicionário), entidades viram
+    structs (texto, rótulo) e colunas sem tipo definido no bloco ficam como texto.
+    """
+    import pyarrow as pa
+
+    df = df.copy()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype(object).where(df[coluna].notna(), None)
+    if 'entidades' in df.columns:
+        df['entidades'] = [[{'texto': texto, 'rotulo': rotulo} for texto, rotulo in lista]
+                           if isinstance(lista, (list, tuple)) else [] for lista in df['entidades']]
+
+    processado = _esquema_processado()
+    campos = []
+    for campo in pa.Schema.from_pandas(df, preserve_index=False):
+        tipo = processado.get(campo.name, campo.type)
+        campos.append(pa.field(campo.name, pa.string() if pa.types.is_null(tipo) else tipo))
+    return pa.Table.from_pandas(df, schema=pa.schema(campos), preserve_index=False)
+
+
+def gravar_parte(df, caminho):
+    """Grava um bloco processado em Parquet de forma atômica (arquivo existente = bloco concluído)"""
+    import pyarrow.parquet as pq
+    temporario = f"{caminho}.tmp"
+    pq.write_table(tabela_arrow(df), temporario)
+    os.replace(temporario, caminho)
+    return len(df)
+
+
+def substituir_coluna(caminho, nome, valores, destino):
+    """Grava em destino a parte com uma coluna trocada (mesmo tipo), de forma atômica"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tabela = pq.read_table(caminho)
+    i = tabela.schema.get_field_index(nome)
+    tabela = tabela.set_column(i, tabela.schema.field(i), pa.array(valores, type=tabela.schema.field(i).type))
+    temporario = f"{destino}.tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, destino)
+
+
+def vincular_parte(caminho, destino):
+    """Coloca uma parte pronta em outra execução sem copiar os dados quando o sistema de arquivos permite
+
+    Partes nunca são regravadas no lugar (gravar_parte substitui o arquivo), então o
+    hard link não é afetado por mudanças posteriores no checkpoint.
+    """
+    try:
+        os.link(caminho, destino)
+    except OSError:
+        shutil.copyfile(caminho, destino)
+
+
+def _listas(coluna):
+    """Coluna de listas do Arrow -> listas Python (structs de entidades viram tuplas)"""
+    import pyarrow as pa
+    coluna = coluna.combine_chunks() if isinstance(coluna, pa.ChunkedArray) else coluna
+    offsets = coluna.offsets.to_numpy()
+    valores = coluna.values
+    if pa.types.is_struct(valores.type):
+        valores = list(zip(valores.field('texto').to_pylist(), valores.field('rotulo').to_pylist()))
+    else:
+        valores = valores.to_pylist()
+    return [valores[inicio:fim] for inicio, fim in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def dataframe_de_tabela(tabela):
+    """DataFrame no formato do processamento (listas Python, entidades como tuplas)"""
+    import pyarrow as pa
+    listas = [campo.name for campo in tabela.schema if pa.types.is_list(campo.type)]
+    df = tabela.drop(listas).to_pandas()
+    for nome in listas:
+        df[nome] = _listas(tabela.column(nome))
+    return df[tabela.column_names]
+
+
+def gravar_cubo(cubo, caminho):
+    temporario = f"{caminho}.tmp"
+    cubo.celulas.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def ler_cubo(caminho, largura_idade, n_faixas_polaridade):
+    return CuboAgregado.de_celulas(pd.read_parquet(caminho), largura_idade, n_faixas_polaridade)
+
+
+def ler_manifesto(diretorio=None):
+    """Manifesto da última execução concluída do pipeline (None se não houver)"""
+    caminho = os.path.join(diretorio or DIRETORIO_ARTEFATOS, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Manifesto de artefatos inválido: {str(e)}")
+        return None
+    if manifesto.get('versao_formato') != VERSAO_FORMATO:
+        print(f"Artefatos em formato antigo ({manifesto.get('versao_formato')}), ignorando")
+        return None
+    return manifesto
+
+
+def publicar_execucao(diretorio, manifesto):
+    """Troca atomicamente a execução servida ao painel e apaga as anteriores
+
+    A execução substituída é mantida até a próxima publicação, para não faltar
+    arquivos a um painel que esteja lendo no momento da troca; o checkpoint da
+    execução publicada (manifesto['checkpoint']) também, para retomadas.
+    """
+    anterior = ler_manifesto(diretorio)
+    manifesto = dict(manifesto, versao_formato=VERSAO_FORMATO, publicado_em=time.time())
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    with open(f"{caminho}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, ensure_ascii=False)
+    os.replace(f"{caminho}.tmp", caminho)
+
+    manter = {manifesto['execucao'], manifesto.get('checkpoint'), anterior and anterior['execucao']}
+    for nome in os.listdir(diretorio):
+        if nome.startswith('execucao-') and nome not in manter:
+            shutil.rmtree(os.path.join(diretorio, nome), ignore_errors=True)
+
+
+def caminho_artefato(manifesto, *partes, diretorio=None):
+    return os.path.join(diretorio or DIRETORIO_ARTEFATOS, manifesto['execucao'], *partes)
+
+
+def carregar_artefatos(manifesto, diretorio=None):
+    """Abre (somente leitura) as partes de uma execução publicada e lê o cubo
+
+    Retorna (ConjuntoEntrevistas, cubo, motor de frases-chave ou None); as entrevistas
+    são lidas do disco sob demanda.
+    """
+    from conjunto_dados import ConjuntoEntrevistas
+    from frases_chave import MotorFrasesChave
+
+    conjunto = ConjuntoEntrevistas([caminho_artefato(manifesto, DIRETORIO_PARTES, nome, diretorio=diretorio)
+                                    for nome in manifesto['partes']])
+    cubo = ler_cubo(caminho_artefato(manifesto, ARQUIVO_CUBO, diretorio=diretorio),
+                    manifesto['cubo']['largura_idade'], manifesto['cubo']['n_faixas_polaridade'])
+    motor_frases = None
+    if manifesto.get('frases_chave'):
+        try:
+            motor_frases = MotorFrasesChave.carregar(caminho_artefato(manifesto, manifesto['frases_chave'],
+                                                                      diretorio=diretorio))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Frases-chave do pipeline indisponíveis: {str(e)}")
+    return conjunto, cubo, motor_frases
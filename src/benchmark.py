@@ -0,0 +1,318 @@
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from utils import DIRETORIO_RAIZ
+
+DIRETORIO_BENCHMARKS = os.path.join(DIRETORIO_RAIZ, 'benchmarks')
+TAMANHOS_PADRAO = [150, 10_000, 1_000_000]
+SEED_PADRAO = 42
+LIMITE_REGRESSAO_PADRAO = 0.20
+
+# Máximo de linhas por etapa na execução rotineira (None = sem limite).
+# Etapas caras demais para 1M linhas rodam sobre uma amostra; use --sem-limites para o tamanho cheio.
+LIMITE_LINHAS = {
+    'gerar_dataframe': 100_000,
+    'gerar_dataframe_vetorizado': None,
+    'processar_entrevista': 2_000,
+    'processar_lote': 20_000,
+    'aplicar_filtros': None,
+    'motor_filtros': None,
+    'criar_mapa_evasao': None,
+    'plotar_wordcloud': None,
+    'wordcloud_frequencias': None,
+    'identificar_topicos': 100_000,
+    'transformar_topicos': None
+}
+
+# Combinação de filtros representativa de uma interação na barra lateral
+FILTROS_REFERENCIA = {
+    'regiao': 'Londrina',
+    'curso': 'Todos',
+    'situacao': 'Todas',
+    'sentimento': ['Negativo', 'Neutro'],
+    'idade_range': (20, 35),
+    'polaridade_range': (-0.5, 0.5)
+}
+
+
+class ContextoBenchmark:
+    """Dados e processador compartilhados entre as etapas (montados fora da medição)"""
+
+    def __init__(self, seed=SEED_PADRAO):
+        self.seed = seed
+        self._entrevistas = {}
+        self._processados = {}
+        self._processor = None
+
+    @property
+    def processor(self):
+        if self._processor is None:
+            from data_processing import EntrevistaProcessor
+            self._processor = EntrevistaProcessor()
+        return self._processor
+
+    def entrevistas(self, n):
+        """Entrevistas sintéticas reprodutíveis (gerador vetorizado com a seed fixa)"""
+        if n not in self._entrevistas:
+            from gerador_entrevistas import GeradorEntrevistas
+            self._entrevistas[n] = GeradorEntrevistas(n, seed=self.seed).gerar_dataframe_vetorizado(
+                data_referencia=datetime.date(2024, 1, 1))
+        return self._entrevistas[n]
+
+    def processados(self, n):
+        """Entrevistas já processadas; cada texto distinto passa pelo NLP uma única vez"""
+        if n not in self._processados:
+            df = self.entrevistas(n)
+            textos = df['texto'].astype('category')
+            unicos = pd.DataFrame({'texto': textos.cat.categories.astype(str)})
+            resultados = self.processor.processar_lote(unicos)
+            resultados = resultados.iloc[textos.cat.codes.to_numpy()].set_index(df.index)
+            self._processados[n] = df.join(resultados, rsuffix='_processed')
+        return self._processados[n]
+
+
+# Cada etapa recebe (contexto, n) e devolve a função a ser medida
+
+def _gerar_dataframe(ctx, n):
+    from gerador_entrevistas import GeradorEntrevistas
+    gerador = GeradorEntrevistas(n, seed=ctx.seed)
+    return lambda: gerador.gerar_dataframe(data_referencia=datetime.date(2024, 1, 1))
+
+
+def _gerar_dataframe_vetorizado(ctx, n):
+    from gerador_entrevistas import GeradorEntrevistas
+    gerador = GeradorEntrevistas(n, seed=ctx.seed)
+    return gerador.gerar_dataframe_vetorizado
+
+
+def _processar_entrevista(ctx, n):
+    df = ctx.entrevistas(n)
+    processor = ctx.processor
+    return lambda: [processor.processar_entrevista(row) for _, row in df.iterrows()]
+
+
+def _processar_lote(ctx, n):
+    df = ctx.entrevistas(n)
+    processor = ctx.processor
+    return lambda: processor.processar_lote(df)
+
+
+def _aplicar_filtros(ctx, n):
+    from filtros import aplicar_filtros
+    df = ctx.processados(n)
+    return lambda: aplicar_filtros(df, FILTROS_REFERENCIA)
+
+
+def _motor_filtros(ctx, n):
+    from filtros import MotorFiltros
+    motor = MotorFiltros(ctx.processados(n))
+
+    def executar():
+        # Sem o cache LRU: mede a consulta nos índices, não a reutilização
+        motor._cache.clear()
+        return motor.filtrar(FILTROS_REFERENCIA)
+    return executar
+
+
+def _criar_mapa_evasao(ctx, n):
+    from mapa_interativo import criar_mapa_evasao
+    df = ctx.processados(n)
+    return lambda: criar_mapa_evasao(df)
+
+
+def _plotar_wordcloud(ctx, n):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from visualization import gerar_figura_wordcloud
+    df = ctx.processados(n)
+
+    def executar():
+        fig = gerar_figura_wordcloud(df)
+        if fig is not None:
+            plt.close(fig)
+    return executar
+
+
+def _wordcloud_frequencias(ctx, n):
+    from colunar import ColunaLista
+    from visualization import gerar_png_wordcloud
+    temas = ColunaLista.de_listas(ctx.processados(n)['temas'].tolist())
+    # Contagem + renderização sem cache: o custo de uma mudança de filtro
+    return lambda: gerar_png_wordcloud(temas.frequencias())
+
+
+def _identificar_topicos(ctx, n):
+    from servico_topicos import ServicoTopicos
+    textos = ctx.processados(n)['tokens_limpos']
+    # Ajuste completo em memória (sem o modelo salvo em disco): custo do primeiro ajuste
+    return lambda: ServicoTopicos(persistir=False).ajustar(textos).topicos()
+
+
+def _transformar_topicos(ctx, n):
+    from servico_topicos import ServicoTopicos
+    textos = ctx.processados(n)['tokens_limpos']
+    servico = ServicoTopicos(persistir=False).ajustar(textos.head(LIMITE_LINHAS['identificar_topicos']))
+    return lambda: servico.transformar(textos)
+
+
+BENCHMARKS = {
+    'gerar_dataframe': _gerar_dataframe,
+    'gerar_dataframe_vetorizado': _gerar_dataframe_vetorizado,
+    'processar_entrevista': _processar_entrevista,
+    'processar_lote': _processar_lote,
+    'aplicar_filtros': _aplicar_filtros,
+    'motor_filtros': _motor_filtros,
+    'criar_mapa_evasao': _criar_mapa_evasao,
+    'plotar_wordcloud': _plotar_wordcloud,
+    'wordcloud_frequencias': _wordcloud_frequencias,
+    'identificar_topicos': _identificar_topicos,
+    'transformar_topicos': _transformar_topicos
+}
+
+
+def medir(funcao, repeticoes=3, memoria=True):
+    """Tempo (mínimo e mediana de N execuções) e pico de memória alocada em Python"""
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    resultado = {
+        'tempo_min_s': min(tempos),
+        'tempo_mediana_s': statistics.median(tempos),
+        'repeticoes': repeticoes
+    }
+
+    # Execução separada: o tracemalloc deixa o código mais lento e distorceria os tempos
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        resultado['memoria_pico_mb'] = pico / 1024 ** 2
+    return resultado
+
+
+def _metadados(seed):
+    versoes = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__}
+    for modulo in ('spacy', 'sklearn', 'plotly', 'wordcloud'):
+        try:
+            versoes[modulo] = __import__(modulo).__version__
+        except ImportError:
+            versoes[modulo] = None
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'maquina': platform.platform(),
+        'processador': platform.processor(),
+        'seed': seed,
+        'versoes': versoes
+    }
+
+
+def executar_benchmarks(tamanhos=TAMANHOS_PADRAO, etapas=None, repeticoes=3, seed=SEED_PADRAO,
+                        sem_limites=False, memoria=True):
+    """Executa as etapas escolhidas em cada tamanho e retorna o relatório"""
+    ctx = ContextoBenchmark(seed)
+    relatorio = {'meta': _metadados(seed), 'resultados': {}}
+
+    for etapa in etapas or list(BENCHMARKS):
+        relatorio['resultados'][etapa] = {}
+        for tamanho in tamanhos:
+            limite = None if sem_limites else LIMITE_LINHAS.get(etapa)
+            n = tamanho if limite is None else min(tamanho, limite)
+            try:
+                funcao = BENCHMARKS[etapa](ctx, n)
+                resultado = medir(funcao, repeticoes, memoria)
+            except Exception as e:
+                print(f"Falha em {etapa} ({tamanho} linhas): {str(e)}")
+                resultado = {'erro': str(e)}
+            resultado['linhas'] = n
+            relatorio['resultados'][etapa][str(tamanho)] = resultado
+
+            if 'erro' not in resultado:
+                memoria_txt = f", pico {resultado['memoria_pico_mb']:.1f} MB" if memoria else ''
+                print(f"{etapa:<28} {tamanho:>9} ({n} linhas): "
+                      f"{resultado['tempo_min_s']:.4f} s{memoria_txt}")
+    return relatorio
+
+
+def comparar(base, atual, limite=LIMITE_REGRESSAO_PADRAO, metricas=('tempo_min_s', 'memoria_pico_mb')):
+    """Compara dois relatórios e retorna a lista de regressões acima do limite (fração)"""
+    regressoes = []
+    for etapa, por_tamanho in atual['resultados'].items():
+        for tamanho, resultado in por_tamanho.items():
+            anterior = base['resultados'].get(etapa, {}).get(tamanho)
+            if not anterior or 'erro' in resultado or 'erro' in anterior:
+                continue
+            # Só compara medições feitas sobre o mesmo número de linhas
+            if anterior.get('linhas') != resultado.get('linhas'):
+                continue
+            for metrica in metricas:
+                if metrica not in resultado or not anterior.get(metrica):
+                    continue
+                variacao = resultado[metrica] / anterior[metrica] - 1
+                regressao = variacao > limite
+                print(f"{'REGRESSÃO' if regressao else 'ok':<10} {etapa:<28} {tamanho:>9} {metrica:<16} "
+                      f"{anterior[metrica]:10.4f} -> {resultado[metrica]:10.4f} ({variacao:+.1%})")
+                if regressao:
+                    regressoes.append({'etapa': etapa, 'tamanho': tamanho, 'metrica': metrica,
+                                       'base': anterior[metrica], 'atual': resultado[metrica],
+                                       'variacao': variacao})
+    return regressoes
+
+
+def _carregar(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do pipeline de entrevistas")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_exec = sub.add_parser('executar', help="Mede as etapas e salva o relatório JSON")
+    p_exec.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    p_exec.add_argument('--etapas', nargs='+', choices=list(BENCHMARKS))
+    p_exec.add_argument('--repeticoes', type=int, default=3)
+    p_exec.add_argument('--seed', type=int, default=SEED_PADRAO)
+    p_exec.add_argument('--saida', default=os.path.join(DIRETORIO_BENCHMARKS, 'baseline.json'))
+    p_exec.add_argument('--sem-limites', action='store_true',
+                        help="Ignora LIMITE_LINHAS e roda todas as etapas no tamanho cheio")
+    p_exec.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória")
+
+    p_comp = sub.add_parser('comparar', help="Compara um relatório com a linha de base")
+    p_comp.add_argument('base')
+    p_comp.add_argument('atual')
+    p_comp.add_argument('--limite', type=float, default=LIMITE_REGRESSAO_PADRAO,
+                        help="Variação máxima tolerada (0.2 = 20%% mais lento)")
+    p_comp.add_argument('--metricas', nargs='+', default=['tempo_min_s', 'memoria_pico_mb'])
+
+    args = parser.parse_args()
+
+    if args.comando == 'executar':
+        relatorio = executar_benchmarks(args.tamanhos, args.etapas, args.repeticoes, args.seed,
+                                        args.sem_limites, not args.sem_memoria)
+        os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.saida}")
+    else:
+        regressoes = comparar(_carregar(args.base), _carregar(args.atual), args.limite, args.metricas)
+        print(f"{len(regressoes)} regressão(ões) acima de {args.limite:.0%}")
+        sys.exit(1 if regressoes else 0)
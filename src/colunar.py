@@ -0,0 +1,162 @@
+import sys
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+# Colunas de baixa cardinalidade guardadas como categóricas
+COLUNAS_CATEGORICAS = ['regiao', 'curso', 'situacao', 'sentimento', 'sentimento_processed', 'genero', 'periodo']
+
+# Colunas de listas guardadas como offsets + valores achatados
+COLUNAS_LISTA = ['temas', 'entidades', 'frases_chave']
+
+
+class ColunaLista:
+    """Coluna de listas no layout do Arrow: offsets + valores achatados
+
+    Os valores são codificados por dicionário: `codigos` aponta para `dicionario`, então
+    um tema ou entidade repetido em milhões de linhas é guardado uma única vez.
+    A lista da linha i é dicionario[codigos[offsets[i]:offsets[i + 1]]].
+    """
+
+    def __init__(self, offsets, codigos, dicionario):
+        self.offsets = offsets
+        self.codigos = codigos
+        self.dicionario = dicionario
+
+    @classmethod
+    def de_listas(cls, listas):
+        """Constrói a coluna a partir de uma sequência de listas (None conta como lista vazia)"""
+        listas = [lista if isinstance(lista, (list, tuple)) else [] for lista in listas]
+        tamanhos = np.fromiter((len(lista) for lista in listas), dtype=np.int64, count=len(listas))
+        offsets = np.zeros(len(listas) + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=offsets[1:])
+
+        # Series de objetos preserva tuplas (entidades) como valores únicos
+        valores = pd.Series(list(chain.from_iterable(listas)), dtype=object)
+        codigos, dicionario = pd.factorize(valores)
+        tipo = np.int32 if len(dicionario) < 2 ** 31 else np.int64
+        dicionario = np.asarray(dicionario, dtype=object)
+        return cls(offsets, codigos.astype(tipo), dicionario)
+
+    @classmethod
+    def concatenar(cls, colunas):
+        """Une colunas (na ordem) com um dicionário comum, remapeando só os códigos"""
+        if len(colunas) == 1:
+            return colunas[0]
+        # Códigos de cada valor dos dicionários de origem no dicionário unido
+        mapa, dicionario = pd.factorize(pd.Series(np.concatenate([c.dicionario for c in colunas]), dtype=object))
+        inicios = np.cumsum([0] + [len(c.dicionario) for c in colunas])
+        tipo = np.int32 if len(dicionario) < 2 ** 31 else np.int64
+        codigos = np.concatenate([mapa[inicio:][c.codigos] for inicio, c in zip(inicios, colunas)]).astype(tipo)
+        bases = np.cumsum([0] + [c.offsets[-1] for c in colunas])
+        offsets = np.concatenate([c.offsets[:-1] + base for base, c in zip(bases, colunas)] + [bases[-1:]])
+        return cls(offsets.astype(np.int64), codigos, np.asarray(dicionario, dtype=object))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def tamanhos(self):
+        return np.diff(self.offsets)
+
+    def __getitem__(self, i):
+        """Lista da linha i (posição)"""
+        if i < 0:
+            i += len(self)
+        return list(self.dicionario[self.codigos[self.offsets[i]:self.offsets[i + 1]]])
+
+    def tomar(self, posicoes):
+        """Nova coluna só com as linhas escolhidas, sem passar por listas Python"""
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        tamanhos = self.tamanhos()[posicoes]
+        offsets = np.zeros(len(posicoes) + 1, dtype=np.int64)
+        np.cumsum(tamanhos, out=offsets[1:])
+        # Índice de cada valor: início da linha original + deslocamento dentro da linha
+        indices = np.repeat(self.offsets[:-1][posicoes] - offsets[:-1], tamanhos) + np.arange(offsets[-1])
+        return ColunaLista(offsets, self.codigos[indices], self.dicionario)
+
+    def contagens(self, posicoes=None):
+        """Frequência de cada valor do dicionário nas linhas escolhidas (todas, por padrão)"""
+        coluna = self if posicoes is None else self.tomar(posicoes)
+        return np.bincount(coluna.codigos, minlength=len(self.dicionario))
+
+    def frequencias(self, posicoes=None):
+        """Dicionário valor -> frequência, só com os valores presentes nas linhas escolhidas"""
+        contagens = self.contagens(posicoes)
+        presentes = np.flatnonzero(contagens)
+        return dict(zip(self.dicionario[presentes].tolist(), contagens[presentes].tolist()))
+
+    def para_listas(self):
+        """Materializa a coluna como listas Python (uma por linha)"""
+        valores = self.dicionario[self.codigos].tolist()
+        return [valores[inicio:fim] for inicio, fim in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def memoria_bytes(self):
+        dicionario = sum(sys.getsizeof(v) for v in self.dicionario)
+        return self.offsets.nbytes + self.codigos.nbytes + self.dicionario.nbytes + dicionario
+
+
+class FrameCompacto:
+    """Entrevistas processadas em layout compacto: tabela com categóricas + colunas de listas"""
+
+    def __init__(self, tabela, listas, ordem_colunas):
+        self.tabela = tabela
+        self.listas = listas
+        self.ordem_colunas = ordem_colunas
+
+    def __len__(self):
+        return len(self.tabela)
+
+    def para_dataframe(self, posicoes=None, colunas=None):
+        """Materializa um DataFrame comum, opcionalmente só com algumas linhas e colunas"""
+        colunas = colunas or self.ordem_colunas
+        escalares = [c for c in colunas if c in self.tabela.columns]
+        tabela = self.tabela[escalares]
+        df = (tabela if posicoes is None else tabela.iloc[posicoes]).copy()
+        for nome in colunas:
+            if nome in self.listas:
+                coluna = self.listas[nome] if posicoes is None else self.listas[nome].tomar(posicoes)
+                df[nome] = coluna.para_listas()
+        return df[colunas]
+
+    def memoria_bytes(self):
+        return int(self.tabela.memory_usage(deep=True).sum()) + sum(
+            coluna.memoria_bytes() for coluna in self.listas.values())
+
+
+def compactar(df):
+    """Converte o DataFrame processado para o layout compacto"""
+    tabela = df.drop(columns=[c for c in COLUNAS_LISTA if c in df.columns])
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in tabela.columns and not isinstance(tabela[coluna].dtype, pd.CategoricalDtype):
+            tabela[coluna] = tabela[coluna].astype('category')
+    listas = {c: ColunaLista.de_listas(df[c].tolist()) for c in COLUNAS_LISTA if c in df.columns}
+    return FrameCompacto(tabela, listas, list(df.columns))
+
+
+def concatenar(frames):
+    """Une frames compactos com as mesmas colunas (ex.: blocos processados) sem voltar a listas Python
+
+    Categóricas têm as categorias unidas e os códigos remapeados; o custo é proporcional
+    ao número de linhas, sem a conversão para objetos de compactar().
+    """
+    from pandas.api.types import union_categoricals
+
+    if len(frames) == 1:
+        return frames[0]
+    tabelas = [f.tabela for f in frames]
+    colunas = {}
+    for nome in tabelas[0].columns:
+        partes = [t[nome] for t in tabelas]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in partes):
+            colunas[nome] = union_categoricals(partes)
+        else:
+            colunas[nome] = pd.concat(partes, ignore_index=True).array
+    indice = tabelas[0].index.append([t.index for t in tabelas[1:]])
+    tabela = pd.DataFrame(colunas, index=indice)
+    listas = {nome: ColunaLista.concatenar([f.listas[nome] for f in frames]) for nome in frames[0].listas}
+    return FrameCompacto(tabela, listas, frames[0].ordem_colunas)
+
+
+def descompactar(frame):
+    """Volta do layout compacto para o DataFrame com listas Python"""
+    return frame.para_dataframe()
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from artefatos import COLUNAS_DICIONARIO, dataframe_de_tabela
+from filtros import MotorFiltros
+
+# Colunas leves mantidas em memória (filtros, cubo, listagem); as demais são lidas do disco
+# só quando uma aba ou a entrevista aberta precisa delas
+COLUNAS_RESIDENTES = ['id', 'regiao', 'curso', 'situacao', 'sentimento', 'idade', 'polaridade',
+                      'subjetividade', 'genero', 'periodo', 'semestre', 'data_entrevista',
+                      'sentimento_processed']
+
+
+def expressao_filtros(filtros=None, ids=None):
+    """Filtros da barra lateral como predicado do Arrow (mesmas regras do MotorFiltros)
+
+    ids: restringe a essas entrevistas (ex.: resultado da busca textual)
+    """
+    import pyarrow.dataset as ds
+
+    filtros = filtros or {}
+    condicoes = []
+    for coluna, todos in MotorFiltros.COLUNAS_CATEGORICAS.items():
+        valor = filtros.get(coluna)
+        if todos is None:
+            if valor:
+                condicoes.append(ds.field(coluna).isin(list(valor)))
+        elif valor and valor != todos:
+            condicoes.append(ds.field(coluna) == valor)
+    for coluna, nome in MotorFiltros.COLUNAS_NUMERICAS.items():
+        intervalo = filtros.get(nome)
+        # Intervalo degenerado não filtra (mesma regra de aplicar_filtros)
+        if intervalo and intervalo[0] != intervalo[1]:
+            condicoes.append((ds.field(coluna) >= intervalo[0]) & (ds.field(coluna) <= intervalo[1]))
+    if ids is not None:
+        condicoes.append(ds.field('id').isin(np.asarray(ids, dtype=np.int64)))
+
+    expressao = None
+    for condicao in condicoes:
+        expressao = condicao if expressao is None else expressao & condicao
+    return expressao
+
+
+class ConjuntoEntrevistas:
+    """Entrevistas processadas em partes Parquet, lidas sob demanda com arquivos mapeados em memória
+
+    Cada leitura projeta só as colunas pedidas e empurra os filtros para a varredura:
+    partes e grupos de linhas cujas estatísticas não atendem ao predicado nem são lidos.
+    Colunas de texto repetitivo chegam como dicionário (categóricas no pandas).
+    """
+
+    def __init__(self, caminhos):
+        import pyarrow.dataset as ds
+        from pyarrow.fs import LocalFileSystem
+
+        self.caminhos = list(caminhos)
+        esquema = ds.dataset(self.caminhos[:1], format='parquet').schema
+        formato = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(
+            dictionary_columns=[c for c in COLUNAS_DICIONARIO if c in esquema.names]))
+        self.dataset = ds.dataset(self.caminhos, format=formato, filesystem=LocalFileSystem(use_mmap=True))
+        self.colunas = self.dataset.schema.names
+
+    def __len__(self):
+        return self.dataset.count_rows()
+
+    def tabela(self, colunas=None, filtros=None, ids=None):
+        """Tabela Arrow só com as colunas e linhas pedidas"""
+        colunas = [c for c in colunas if c in self.colunas] if colunas is not None else None
+        return self.dataset.to_table(columns=colunas, filter=expressao_filtros(filtros, ids))
+
+    def ler(self, colunas=None, filtros=None, ids=None):
+        """DataFrame no formato do processamento (listas Python) com as colunas e linhas pedidas"""
+        return dataframe_de_tabela(self.tabela(colunas, filtros, ids))
+
+    def linhas(self, ids, colunas=None):
+        """Linhas das entrevistas pedidas, indexadas pelo id (só as partes que as contêm são lidas)"""
+        colunas = None if colunas is None else ['id'] + [c for c in colunas if c != 'id']
+        return self.ler(colunas, ids=ids).set_index('id')
+
+    def frequencias(self, coluna, filtros=None, ids=None):
+        """Dicionário valor -> frequência de uma coluna de listas, contado direto no Arrow"""
+        import pyarrow.compute as pc
+        valores = pc.list_flatten(self.tabela([coluna], filtros, ids).column(coluna))
+        contagens = pc.value_counts(valores)
+        return dict(zip(contagens.field('values').to_pylist(), contagens.field('counts').to_pylist()))
+
+
+class RecorteDados:
+    """Linhas filtradas do painel com acesso tardio às colunas que cada aba declara
+
+    Colunas residentes vêm do layout compacto em memória; as demais (em modo de
+    artefatos) são lidas do ConjuntoEntrevistas com os filtros como predicado e juntadas
+    pelo id. Cada conjunto de colunas é lido no máximo uma vez por rerun.
+    """
+
+    def __init__(self, compacto, posicoes=None, conjunto=None, filtros=None, ids=None):
+        self.compacto = compacto
+        self.posicoes = posicoes
+        self.conjunto = conjunto
+        self.filtros = filtros
+        self.ids = ids
+        self._cache = {}
+
+    @classmethod
+    def de_dataframe(cls, df):
+        from colunar import compactar
+        return cls(compactar(df))
+
+    def __len__(self):
+        return len(self.compacto) if self.posicoes is None else len(self.posicoes)
+
+    def colunas(self, nomes):
+        """DataFrame do recorte com as colunas pedidas (as inexistentes são ignoradas)"""
+        chave = tuple(nomes)
+        if chave in self._cache:
+            return self._cache[chave]
+
+        em_memoria = [c for c in nomes if c in self.compacto.ordem_colunas]
+        no_disco = [c for c in nomes if c not in em_memoria and self.conjunto is not None
+                    and c in self.conjunto.colunas]
+        colunas = em_memoria + (['id'] if no_disco and 'id' not in em_memoria else [])
+        if not colunas:
+            return pd.DataFrame(index=pd.RangeIndex(len(self)))
+        df = self.compacto.para_dataframe(self.posicoes, colunas=colunas)
+        if no_disco:
+            extras = self.conjunto.ler(['id'] + no_disco, self.filtros, self.ids).set_index('id')
+            df = df.join(extras, on='id')
+        df = df[[c for c in nomes if c in df.columns]]
+        self._cache[chave] = df
+        return df
+
+    def frequencias(self, coluna):
+        """Frequência dos valores de uma coluna de listas no recorte (nuvem de palavras)"""
+        if coluna in self.compacto.listas:
+            return self.compacto.listas[coluna].frequencias(self.posicoes)
+        if self.conjunto is not None and coluna in self.conjunto.colunas:
+            return self.conjunto.frequencias(coluna, self.filtros, self.ids)
+        return None
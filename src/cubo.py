@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+# Dimensões categóricas do cubo (além das faixas de idade e polaridade)
+DIMENSOES = ['regiao', 'curso', 'situacao', 'sentimento']
+MEDIDAS = ['polaridade', 'idade', 'subjetividade']
+LARGURA_FAIXA_IDADE = 1
+N_FAIXAS_POLARIDADE = 20
+
+
+def bordas_polaridade(n_faixas=N_FAIXAS_POLARIDADE):
+    """Bordas das faixas de polaridade em [-1, 1] (arredondadas: comparáveis às do controle deslizante)"""
+    return np.round(np.linspace(-1, 1, n_faixas + 1), 10)
+
+
+def ajustar_intervalo_polaridade(intervalo, n_faixas=N_FAIXAS_POLARIDADE):
+    """Leva os extremos de um intervalo de polaridade à borda de faixa mais próxima"""
+    bordas = bordas_polaridade(n_faixas)
+    return tuple(float(bordas[np.abs(bordas - valor).argmin()]) for valor in intervalo)
+
+
+class CuboAgregado:
+    """Cubo pré-agregado (contagem, soma e soma dos quadrados) sobre
+    regiao x curso x situacao x sentimento x faixa de idade x faixa de polaridade
+
+    É montado uma vez por conjunto de dados; os filtros viram fatias das células e os
+    gráficos são construídos a partir das agregações, com custo independente do número
+    de linhas. As faixas de polaridade são semiabertas [borda, próxima borda) e as linhas
+    exatamente sobre a borda inferior ficam em células próprias (inicio_faixa): um
+    intervalo fechado cujos extremos são bordas de faixa seleciona exatamente as mesmas
+    linhas de MotorFiltros.
+    """
+
+    def __init__(self, df, largura_idade=LARGURA_FAIXA_IDADE, n_faixas_polaridade=N_FAIXAS_POLARIDADE):
+        self.largura_idade = largura_idade
+        self.n_faixas_polaridade = n_faixas_polaridade
+        self.bordas_polaridade = bordas_polaridade(n_faixas_polaridade)
+
+        polaridade = df['polaridade'].to_numpy(dtype=np.float64)
+        idade = df['idade'].to_numpy(dtype=np.float64)
+
+        colunas = {dim: df[dim].astype('category') for dim in DIMENSOES}
+        colunas['faixa_idade'] = (np.floor(idade / largura_idade) * largura_idade).astype(np.int64)
+        # Comparação direta com as bordas (sem aritmética de ponto flutuante sobre a polaridade)
+        faixa_polaridade = np.clip(np.searchsorted(self.bordas_polaridade, polaridade, side='right') - 1,
+                                   0, n_faixas_polaridade - 1)
+        colunas['faixa_polaridade'] = faixa_polaridade.astype(np.int64)
+        colunas['inicio_faixa'] = polaridade == self.bordas_polaridade[faixa_polaridade]
+        colunas['contagem'] = np.ones(len(df), dtype=np.int64)
+        for medida in MEDIDAS:
+            valores = df[medida].to_numpy(dtype=np.float64)
+            colunas[f'soma_{medida}'] = valores
+            colunas[f'somaq_{medida}'] = valores * valores
+        colunas['min_polaridade'] = polaridade
+        colunas['max_polaridade'] = polaridade
+
+        agregacoes = {c: 'sum' for c in colunas if c == 'contagem' or c.startswith('soma')}
+        agregacoes.update({'min_polaridade': 'min', 'max_polaridade': 'max'})
+        self.chaves = DIMENSOES + ['faixa_idade', 'faixa_polaridade', 'inicio_faixa']
+        self.celulas = (pd.DataFrame(colunas, index=df.index)
+                        .groupby(self.chaves, observed=True, sort=False)
+                        .agg(agregacoes)
+                        .reset_index())
+        for dim in DIMENSOES:
+            self.celulas[dim] = self.celulas[dim].astype('category')
+
+    @classmethod
+    def de_celulas(cls, celulas, largura_idade=LARGURA_FAIXA_IDADE, n_faixas_polaridade=N_FAIXAS_POLARIDADE):
+        """Recria o cubo a partir de células já agregadas (ex.: lidas dos artefatos do pipeline)"""
+        cubo = cls.__new__(cls)
+        cubo.largura_idade = largura_idade
+        cubo.n_faixas_polaridade = n_faixas_polaridade
+        cubo.bordas_polaridade = bordas_polaridade(n_faixas_polaridade)
+        cubo.chaves = DIMENSOES + ['faixa_idade', 'faixa_polaridade', 'inicio_faixa']
+        cubo.celulas = celulas.copy()
+        for dim in DIMENSOES:
+            cubo.celulas[dim] = cubo.celulas[dim].astype('category')
+        return cubo
+
+    def __len__(self):
+        return len(self.celulas)
+
+    def fatiar(self, filtros=None):
+        """Células compatíveis com os filtros da barra lateral (mesmo formato de mostrar_filtros)
+
+        Os extremos de polaridade_range precisam ser bordas de faixa (ajustar_intervalo_polaridade);
+        fora delas a fatia não seria exata e é levantado ValueError.
+        """
+        filtros = filtros or {}
+        celulas = self.celulas
+        mascara = np.ones(len(celulas), dtype=bool)
+
+        for dim, todos in (('regiao', 'Todas'), ('curso', 'Todos'), ('situacao', 'Todas')):
+            valor = filtros.get(dim)
+            if valor and valor != todos:
+                mascara &= (celulas[dim] == valor).to_numpy()
+        if filtros.get('sentimento'):
+            mascara &= celulas['sentimento'].isin(filtros['sentimento']).to_numpy()
+        if filtros.get('idade_range'):
+            minimo, maximo = filtros['idade_range']
+            if minimo != maximo:
+                faixa = celulas['faixa_idade'].to_numpy()
+                mascara &= (faixa + self.largura_idade > minimo) & (faixa <= maximo)
+        if filtros.get('polaridade_range'):
+            minimo, maximo = filtros['polaridade_range']
+            if minimo != maximo:
+                inicio, fim = self.indices_bordas((minimo, maximo))
+                faixa = celulas['faixa_polaridade'].to_numpy()
+                # [bordas[inicio], bordas[fim]] = faixas inicio..fim-1 + linhas exatamente sobre bordas[fim]
+                # (a última faixa já inclui o extremo 1.0)
+                dentro = (faixa >= inicio) & (faixa < fim)
+                if fim < self.n_faixas_polaridade:
+                    dentro |= (faixa == fim) & celulas['inicio_faixa'].to_numpy(dtype=bool)
+                mascara &= dentro
+
+        return celulas[mascara]
+
+    def indices_bordas(self, intervalo):
+        """Índices das bordas de faixa que correspondem aos extremos do intervalo de polaridade"""
+        indices = np.searchsorted(self.bordas_polaridade, intervalo)
+        if (indices > self.n_faixas_polaridade).any() or \
+                (self.bordas_polaridade[np.minimum(indices, self.n_faixas_polaridade)] != intervalo).any():
+            raise ValueError(f"Intervalo de polaridade {tuple(intervalo)} fora das bordas das faixas do cubo")
+        return int(indices[0]), int(indices[1])
+
+    @staticmethod
+    def agregar(celulas, por):
+        """Soma as células por um conjunto de dimensões, com média e desvio padrão das medidas"""
+        colunas_soma = [c for c in celulas.columns if c == 'contagem' or c.startswith('soma')]
+        agregado = celulas.groupby(por, observed=True)[colunas_soma].sum()
+        agregado = agregado.join(celulas.groupby(por, observed=True).agg(
+            min_polaridade=('min_polaridade', 'min'), max_polaridade=('max_polaridade', 'max')))
+        agregado = agregado[agregado['contagem'] > 0]
+        for medida in MEDIDAS:
+            media = agregado[f'soma_{medida}'] / agregado['contagem']
+            variancia = (agregado[f'somaq_{medida}'] / agregado['contagem'] - media ** 2).clip(lower=0)
+            agregado[f'media_{medida}'] = media
+            agregado[f'desvio_{medida}'] = np.sqrt(variancia)
+        return agregado.reset_index()
+
+    @staticmethod
+    def metricas(celulas):
+        """Total de entrevistas, taxa de evasão e sentimento predominante"""
+        total = int(celulas['contagem'].sum())
+        if total == 0:
+            return {'total': 0, 'taxa_evasao': 0.0, 'sentimento_predominante': 'N/A'}
+        evadidos = int(celulas.loc[celulas['situacao'] == 'Evadido', 'contagem'].sum())
+        por_sentimento = celulas.groupby('sentimento', observed=True)['contagem'].sum().sort_index()
+        return {
+            'total': total,
+            'taxa_evasao': evadidos / total,
+            'sentimento_predominante': por_sentimento.idxmax()
+        }
+
+    @staticmethod
+    def por_regiao(celulas):
+        """Agregado por região no formato usado pelo mapa de evasão"""
+        total = celulas.groupby('regiao', observed=True)['contagem'].sum()
+        evadidos = celulas[celulas['situacao'] == 'Evadido'].groupby('regiao', observed=True)['contagem'].sum()
+        soma_polaridade = celulas.groupby('regiao', observed=True)['soma_polaridade'].sum()
+        dados = pd.DataFrame({
+            'total_entrevistas': total,
+            'taxa_evasao': evadidos.reindex(total.index, fill_value=0) / total,
+            'sentimento_medio': soma_polaridade / total
+        })
+        dados.index = dados.index.astype(str)
+        return dados.rename_axis('regiao').reset_index()
+
+    def centros_polaridade(self):
+        return (self.bordas_polaridade[:-1] + self.bordas_polaridade[1:]) / 2
+
+    def quartis_polaridade(self, celulas, por):
+        """Estatísticas de box plot por grupo, aproximadas pelo histograma de faixas de polaridade
+
+        Os quartis são interpolados linearmente dentro da faixa; mínimo, máximo e média são exatos.
+        """
+        histograma = (celulas.groupby(por + ['faixa_polaridade'], observed=True)['contagem'].sum()
+                      .unstack('faixa_polaridade', fill_value=0)
+                      .reindex(columns=range(self.n_faixas_polaridade), fill_value=0))
+        contagens = histograma.to_numpy(dtype=np.float64)
+        acumulado = np.cumsum(contagens, axis=1)
+        totais = acumulado[:, -1:]
+
+        quartis = {}
+        for nome, q in (('q1', 0.25), ('mediana', 0.5), ('q3', 0.75)):
+            alvo = q * totais
+            faixa = np.minimum((acumulado < alvo).sum(axis=1), self.n_faixas_polaridade - 1)
+            linhas = np.arange(len(faixa))
+            antes = np.where(faixa > 0, acumulado[linhas, faixa - 1], 0)
+            dentro = contagens[linhas, faixa]
+            fracao = np.divide(alvo[:, 0] - antes, dentro, out=np.zeros(len(faixa)), where=dentro > 0)
+            largura = self.bordas_polaridade[1] - self.bordas_polaridade[0]
+            quartis[nome] = self.bordas_polaridade[faixa] + fracao * largura
+
+        estatisticas = self.agregar(celulas, por).set_index(por).loc[histograma.index]
+        resultado = pd.DataFrame(quartis, index=histograma.index)
+        resultado['minimo'] = estatisticas['min_polaridade'].to_numpy()
+        resultado['maximo'] = estatisticas['max_polaridade'].to_numpy()
+        resultado['media'] = estatisticas['media_polaridade'].to_numpy()
+        resultado['desvio'] = estatisticas['desvio_polaridade'].to_numpy()
+        # Quartis interpolados não podem sair do intervalo observado
+        for nome in quartis:
+            resultado[nome] = resultado[nome].clip(resultado['minimo'], resultado['maximo'])
+        return resultado.reset_index()
@@ -1,45 +1,113 @@
-import spacy
 import pandas as pd
-import subprocess
-import sys
-from spacy import displacy
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-from textblob import TextBlob
+import hashlib
+import os
+from modelo_nlp import MODELO_PADRAO, obter_modelo
+from lexico import obter_lexico_padrao
+from vocabulario_dominio import obter_vocabulario_padrao
+from instrumentacao import instrumentacao
+
+# Colunas produzidas pelo processamento de cada entrevista
+CAMPOS_PROCESSADOS = ['temas', 'sentimento', 'entidades', 'polaridade',
+                      'subjetividade', 'frases_chave', 'tokens_limpos']
+
+# Incrementar sempre que a lógica de análise mudar (invalida anotações em cache)
+VERSAO_PIPELINE = '4'
+
+# Campos preenchidos documento a documento; frases_chave é um campo do corpus, gravado depois
+# pelo ranqueamento TF-IDF (frases_chave.MotorFrasesChave) do pipeline e do fim do processamento
+CAMPOS_DOCUMENTO = [c for c in CAMPOS_PROCESSADOS if c != 'frases_chave']
+
+# Perfis de análise: componentes do spaCy mantidos ativos (None = todos), campos preenchidos
+# por documento e se as frases-chave do corpus são gravadas. Entidades do domínio vêm dos
+# gazetteers (sem NER); com 'ner' ativo, as do modelo estatístico complementam as demais.
+# 'rapido' deixa entidades e frases-chave nos valores padrão. Nenhum perfil mantém o
+# sentencizer: nenhum campo por documento usa frases (as frases-chave do corpus são
+# divididas por expressão regular, sem o spaCy)
+PERFIS_ANALISE = {
+    'rapido': {
+        'componentes': ['tok2vec', 'morphologizer', 'attribute_ruler', 'lemmatizer'],
+        'campos': ['temas', 'sentimento', 'polaridade', 'subjetividade', 'tokens_limpos'],
+        'frases_chave': False
+    },
+    'dominio': {
+        'componentes': ['tok2vec', 'morphologizer', 'attribute_ruler', 'lemmatizer'],
+        'campos': CAMPOS_DOCUMENTO,
+        'frases_chave': True
+    },
+    'entidades': {
+        'componentes': ['tok2vec', 'morphologizer', 'attribute_ruler', 'lemmatizer', 'ner'],
+        'campos': CAMPOS_DOCUMENTO,
+        'frases_chave': True
+    },
+    'completo': {
+        'componentes': None,
+        'campos': CAMPOS_DOCUMENTO,
+        'frases_chave': True
+    }
+}
+
+# Perfil escolhido sem alterar código: EVASAO_PERFIL=rapido streamlit run app.py
+# Padrão sem NER: as entidades do domínio vêm dos gazetteers
+PERFIL_PADRAO = os.environ.get('EVASAO_PERFIL', 'dominio')
+
+def preencher_campos_padrao(df):
+    """Preenche nulos das colunas processadas com os valores padrão
+    
+    fillna não aceita listas como valor, então as colunas de listas são tratadas à parte.
+    """
+    padroes = EntrevistaProcessor._valores_padrao()
+    df = df.copy()
+    for campo, padrao in padroes.items():
+        if campo not in df.columns:
+            continue
+        nulos = df[campo].isna()
+        if not nulos.any():
+            continue
+        if isinstance(padrao, list):
+            df.loc[nulos, campo] = pd.Series([[] for _ in range(nulos.sum())], index=df.index[nulos], dtype=object)
+        else:
+            df[campo] = df[campo].fillna(padrao)
+    return df
 
 class EntrevistaProcessor:
-    def __init__(self):
-        """Inicialização robusta com verificação de modelo e extensões"""
-        try:
-            self.nlp = spacy.load("pt_core_news_sm")  # Usando modelo pequeno (mais leve)
-            self._setup_custom_pipeline()
-            self._valid = True
-            print("Modelo pt_core_news_sm carregado com sucesso!")
-        except OSError:
-            print("Modelo pt_core_news_sm não encontrado. Tentando baixar...")
-            try:
-                # Tentar baixar o modelo pequeno
-                subprocess.check_call([sys.executable, "-m", "spacy", "download", "pt_core_news_sm"])
-                self.nlp = spacy.load("pt_core_news_sm")
-                self._setup_custom_pipeline()
-                self._valid = True
-                print("Modelo pt_core_news_sm baixado e carregado com sucesso!")
-            except Exception as e:
-                print(f"Falha ao baixar o modelo: {str(e)}")
-                # Fallback para modelo mínimo
-                try:
-                    self.nlp = spacy.load("pt_core_news_sm", disable=["parser", "ner"])
-                    self._setup_custom_pipeline()
-                    self._valid = True
-                    print("Usando modelo mínimo como fallback")
-                except:
-                    self._valid = False
-                    print("Nenhum modelo de spaCy disponível")
+    def __init__(self, nlp=None, nome_modelo=MODELO_PADRAO, lexico=None, perfil=PERFIL_PADRAO, vocabulario=None):
+        """Inicialização usando o modelo compartilhado do processo (carregado uma única vez)"""
+        if perfil not in PERFIS_ANALISE:
+            raise ValueError(f"Perfil de análise desconhecido: {perfil} (opções: {', '.join(PERFIS_ANALISE)})")
+        self.nlp = nlp if nlp is not None else obter_modelo(nome_modelo)
+        self.lexico = lexico if lexico is not None else obter_lexico_padrao()
+        self.vocabulario = vocabulario if vocabulario is not None else obter_vocabulario_padrao()
+        self._valid = self.nlp is not None
+        self.perfil = perfil
+        self.campos_preenchidos = list(PERFIS_ANALISE[perfil]['campos'])
+        # Frases-chave do corpus gravadas ao fim do processamento (não por documento)
+        self.frases_chave = PERFIS_ANALISE[perfil]['frases_chave']
+        
+        # Componentes desligados por chamada (o modelo é compartilhado entre perfis)
+        componentes = PERFIS_ANALISE[perfil]['componentes']
+        if self._valid and componentes is not None:
+            self._desativados = [nome for nome in self.nlp.pipe_names if nome not in componentes]
+        else:
+            self._desativados = []
+        self._ner_ativo = self._valid and 'ner' in self.nlp.pipe_names and 'ner' not in self._desativados
     
-    def _setup_custom_pipeline(self):
-        """Configura pipeline personalizado para análise educacional"""
-        if not self.nlp.has_pipe('sentencizer'):
-            self.nlp.add_pipe('sentencizer')
+    def versao_pipeline(self):
+        """Identificador do modelo + léxicos + lógica, usado para invalidar anotações em cache"""
+        import spacy
+        
+        meta = self.nlp.meta if self._valid else {}
+        partes = [
+            VERSAO_PIPELINE,
+            spacy.__version__,
+            f"{meta.get('lang', '')}_{meta.get('name', '')}",
+            meta.get('version', ''),
+            ','.join(self.nlp.pipe_names) if self._valid else '',
+            self.perfil,
+            ','.join(self._desativados),
+            self.vocabulario.impressao_digital(),
+            self.lexico.impressao_digital()
+        ]
+        return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()[:16]
     
     def processar_entrevista(self, row):
         """Processamento completo de uma entrevista com múltiplas análises"""
@@ -51,32 +119,106 @@ class EntrevistaProcessor:
             if not texto.strip():
                 return self._retorno_padrao(row.name)
             
-            doc = self.nlp(texto)
-            
-            # Análises diversas
-            temas = self._extrair_temas(doc)
-            sentimento = self._analisar_sentimento_avancado(texto)
-            entidades = self._extrair_entidades(doc)
-            polaridade, subjetividade = self._analise_sentimento_textblob(texto)
-            frases_chave = self._extrair_frases_relevantes(doc)
-            
-            return pd.Series({
-                'temas': temas,
-                'sentimento': sentimento,
-                'entidades': entidades,
-                'polaridade': polaridade,
-                'subjetividade': subjetividade,
-                'frases_chave': frases_chave,
-                'tokens_limpos': ' '.join([token.lemma_.lower() for token in doc if not token.is_stop and not token.is_punct])
-            }, name=row.name)
+            with instrumentacao.etapa('nlp.parse'):
+                doc = self.nlp(texto, disable=self._desativados)
+            serie = pd.Series(self._analisar_doc(doc, texto), name=row.name)
+            instrumentacao.contar('entrevistas.processadas')
+            serie.attrs['campos_preenchidos'] = self.campos_preenchidos
+            return serie
             
         except Exception as e:
             print(f"Erro ao processar linha {row.name}: {str(e)}")
+            instrumentacao.contar('entrevistas.erros')
             return self._retorno_padrao(row.name)
     
-    def _retorno_padrao(self, name):
-        """Retorna um Series padrão para casos de erro"""
-        return pd.Series({
+    def processar_lote(self, df, batch_size=64, n_process=1, progresso=None):
+        """Processa um DataFrame inteiro com nlp.pipe, retornando colunas alinhadas ao índice
+        
+        progresso: callable opcional (processados, total) chamado a cada lote concluído
+        """
+        colunas = {campo: [] for campo in CAMPOS_PROCESSADOS}
+        
+        if 'texto' in df.columns:
+            textos = df['texto'].fillna('').astype(str).tolist()
+        else:
+            textos = [''] * len(df)
+        
+        if self._valid:
+            # nlp.pipe é preguiçoso: o tempo de parse é medido a cada documento produzido
+            docs = instrumentacao.iterar('nlp.parse', self.nlp.pipe(
+                textos, batch_size=batch_size, n_process=n_process, disable=self._desativados))
+        else:
+            docs = (None for _ in textos)
+        
+        # Sentimento do léxico calculado para todos os textos em uma única passada
+        with instrumentacao.etapa('nlp.sentimento_lote'):
+            sentimentos = self.lexico.pontuar(pd.Series(textos)).itertuples(index=False, name=None)
+        
+        for nome, texto, doc, sentimento in zip(df.index, textos, docs, sentimentos):
+            resultado = None
+            if doc is not None and texto.strip():
+                try:
+                    resultado = self._analisar_doc(doc, texto, sentimento)
+                except Exception as e:
+                    print(f"Erro ao processar linha {nome}: {str(e)}")
+                    instrumentacao.contar('entrevistas.erros')
+            if resultado is None:
+                resultado = self._valores_padrao()
+            for campo in CAMPOS_PROCESSADOS:
+                colunas[campo].append(resultado[campo])
+            
+            processados = len(colunas['sentimento'])
+            if progresso is not None and (processados % batch_size == 0 or processados == len(textos)):
+                progresso(processados, len(textos))
+        
+        instrumentacao.contar('entrevistas.processadas', len(textos))
+        resultado = pd.DataFrame(colunas, index=df.index, columns=CAMPOS_PROCESSADOS)
+        resultado.attrs['perfil'] = self.perfil
+        resultado.attrs['campos_preenchidos'] = self.campos_preenchidos
+        return resultado
+    
+    def _analisar_doc(self, doc, texto, sentimento_lexico=None):
+        """Executa todas as análises sobre um documento já processado pelo spaCy
+        
+        sentimento_lexico: tupla (sentimento, polaridade, subjetividade) já calculada em lote
+        """
+        if sentimento_lexico is None:
+            with instrumentacao.etapa('nlp.sentimento'):
+                sentimento_lexico = tuple(self.lexico.pontuar(pd.Series([texto])).iloc[0])
+        sentimento, polaridade, subjetividade = sentimento_lexico
+        
+        # Campos fora do perfil ficam com o valor padrão
+        resultado = self._valores_padrao()
+        resultado['sentimento'] = sentimento
+        resultado['polaridade'] = polaridade
+        resultado['subjetividade'] = subjetividade
+        if 'temas' in self.campos_preenchidos or 'entidades' in self.campos_preenchidos:
+            # Gazetteers: entidades tipadas e temas na mesma passada
+            with instrumentacao.etapa('nlp.vocabulario'):
+                entidades, temas = self._extrair_entidades_temas(doc)
+            if 'temas' in self.campos_preenchidos:
+                resultado['temas'] = temas
+            if 'entidades' in self.campos_preenchidos:
+                resultado['entidades'] = entidades
+        if 'tokens_limpos' in self.campos_preenchidos:
+            with instrumentacao.etapa('nlp.tokens_limpos'):
+                resultado['tokens_limpos'] = ' '.join(self._tokens_limpos(doc))
+        return resultado
+    
+    def _tokens_limpos(self, doc):
+        """Lemas em minúsculas, sem stop words nem pontuação"""
+        return [token.lemma_.lower() for token in doc if not token.is_stop and not token.is_punct]
+    
+    def normalizar_consulta(self, texto):
+        """Tokens de um termo de busca com o mesmo tratamento de tokens_limpos"""
+        if not self._valid:
+            return texto.lower().split()
+        return [token for token in self._tokens_limpos(self.nlp(texto, disable=self._desativados)) if token]
+    
+    @staticmethod
+    def _valores_padrao():
+        """Valores padrão para entrevistas vazias ou com erro"""
+        return {
             'temas': [],
             'sentimento': 'Neutro',
             'entidades': [],
@@ -84,79 +226,39 @@ class EntrevistaProcessor:
             'subjetividade': 0,
             'frases_chave': [],
             'tokens_limpos': ''
-        }, name=name)
-    
-    def _extrair_temas(self, doc):
-        """Extrai temas limpos do documento com filtros específicos para educação"""
-        temas_especificos = ['curso', 'professor', 'disciplina', 'faculdade', 'ensino', 
-                           'aprendizado', 'dificuldade', 'evasão', 'permanência', 'aula',
-                           'estudo', 'universidade', 'ensino', 'aprender', 'conteúdo']
-        
-        return [token.lemma_.lower() for token in doc 
-               if not token.is_stop 
-               and not token.is_punct 
-               and len(token.lemma_) > 2
-               and token.lemma_.lower() in temas_especificos]
-    
-    def _extrair_entidades(self, doc):
-        """Extrai entidades nomeadas com filtros para contexto educacional"""
-        entidades_relevantes = ['ORG', 'LOC', 'PRODUCT']
-        return [(ent.text, ent.label_) for ent in doc.ents 
-                if ent.label_ in entidades_relevantes]
+        }
     
-    def _analisar_sentimento_avancado(self, texto):
-        """Análise de sentimento com vocabulário específico para educação"""
-        palavras_pos = [
-            'bom', 'ótimo', 'excelente', 'gostei', 'facilidade', 'aprendi',
-            'ajudou', 'apoiou', 'consegui', 'evolui', 'melhor', 'recomendo',
-            'satisfeito', 'ótima', 'bem', 'feliz', 'conteúdo', 'interessante'
-        ]
-        
-        palavras_neg = [
-            'ruim', 'difícil', 'problema', 'falta', 'abandonei', 'tranquei',
-            'desisti', 'pior', 'decepcionado', 'insatisfeito', 'dificuldade',
-            'precário', 'deficiente', 'carência', 'complexo', 'complicado'
-        ]
-        
-        texto = texto.lower()
-        pos = sum(1 for palavra in palavras_pos if palavra in texto)
-        neg = sum(1 for palavra in palavras_neg if palavra in texto)
-        
-        if pos > neg * 1.5:
-            return 'Positivo'
-        elif neg > pos * 1.5:
-            return 'Negativo'
-        else:
-            return 'Neutro'
-    
-    def _analise_sentimento_textblob(self, texto):
-        """Análise de sentimento usando TextBlob para polaridade contínua"""
-        try:
-            analysis = TextBlob(texto)
-            return analysis.sentiment.polarity, analysis.sentiment.subjectivity
-        except:
-            return 0, 0  # Fallback em caso de erro
+    def _retorno_padrao(self, name):
+        """Retorna um Series padrão para casos de erro"""
+        return pd.Series(self._valores_padrao(), name=name)
     
-    def _extrair_frases_relevantes(self, doc, n=3):
-        """Extrai frases mais relevantes baseadas em critérios de educação"""
-        frases = [sent.text for sent in doc.sents]
-        return frases[:n] if len(frases) > n else frases
+    def _extrair_entidades_temas(self, doc):
+        """Entidades do domínio (gazetteers) e temas em uma passada; com o NER ativo, as entidades
+        ORG/LOC/PRODUCT do modelo que não se sobrepõem às do domínio são acrescentadas"""
+        trechos = self.vocabulario.entidades_doc(self.nlp, doc)
+        entidades = [(trecho.text, trecho.label_) for trecho in trechos]
+        if self._ner_ativo and doc.ents:
+            cobertos = {i for trecho in trechos for i in range(trecho.start, trecho.end)}
+            entidades += [(ent.text, ent.label_) for ent in doc.ents
+                          if ent.label_ in ('ORG', 'LOC', 'PRODUCT')
+                          and not cobertos.intersection(range(ent.start, ent.end))]
+        return entidades, self.vocabulario.temas_doc(doc)
     
     def identificar_topicos(self, textos, n_topics=5):
-        """Identifica tópicos principais usando LDA"""
+        """Identifica tópicos principais com o modelo LDA destes textos e desta versão do pipeline
+
+        O modelo salvo é identificado pelo conteúdo dos textos: outros corpora (benchmark,
+        pipeline, painel) nunca são misturados no mesmo modelo.
+        """
         try:
-            vectorizer = CountVectorizer(max_df=0.95, min_df=2, stop_words='portuguese')
-            dtm = vectorizer.fit_transform(textos)
-            
-            lda = LatentDirichletAllocation(n_components=n_topics, random_state=42)
-            lda.fit(dtm)
-            
-            topicos = []
-            for idx, topic in enumerate(lda.components_):
-                top_features = [vectorizer.get_feature_names_out()[i] for i in topic.argsort()[-10:]]
-                topicos.append(f"Tópico {idx}: {' '.join(top_features)}")
+            from servico_topicos import obter_servico_topicos
             
-            return topicos
+            textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+            conteudo = pd.util.hash_pandas_object(textos, index=False).to_numpy().tobytes()
+            identificacao = f"{hashlib.sha1(conteudo).hexdigest()[:16]}_{self.versao_pipeline()}"
+            servico = obter_servico_topicos(n_topics, identificacao=identificacao)
+            servico.atualizar(textos)
+            return servico.topicos()
         except Exception as e:
             print(f"Erro na identificação de tópicos: {str(e)}")
             return ["Análise de tópicos não disponível"]
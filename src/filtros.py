@@ -0,0 +1,127 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def aplicar_filtros(df, filtros):
+    """Aplica os filtros da barra lateral (mostrar_filtros) ao DataFrame processado"""
+    df_filtrado = df
+    
+    if filtros.get('regiao') and filtros['regiao'] != "Todas":
+        df_filtrado = df_filtrado[df_filtrado['regiao'] == filtros['regiao']]
+    if filtros.get('curso') and filtros['curso'] != "Todos":
+        df_filtrado = df_filtrado[df_filtrado['curso'] == filtros['curso']]
+    if filtros.get('situacao') and filtros['situacao'] != "Todas":
+        df_filtrado = df_filtrado[df_filtrado['situacao'] == filtros['situacao']]
+    if filtros.get('sentimento'):
+        df_filtrado = df_filtrado[df_filtrado['sentimento'].isin(filtros['sentimento'])]
+    if filtros.get('idade_range'):
+        min_idade, max_idade = filtros['idade_range']
+        # Validar se os valores são diferentes
+        if min_idade != max_idade:
+            df_filtrado = df_filtrado[(df_filtrado['idade'] >= min_idade) & (df_filtrado['idade'] <= max_idade)]
+    if filtros.get('polaridade_range'):
+        min_pol, max_pol = filtros['polaridade_range']
+        # Validar se os valores são diferentes
+        if min_pol != max_pol:
+            df_filtrado = df_filtrado[(df_filtrado['polaridade'] >= min_pol) & (df_filtrado['polaridade'] <= max_pol)]
+    
+    return df_filtrado
+
+
+class MotorFiltros:
+    """Índices pré-computados para os filtros da barra lateral
+    
+    Colunas categóricas viram bitmaps compactados (1 bit por linha) por valor e colunas
+    numéricas viram índices ordenados; os filtros são combinados com operações bit a bit
+    e o resultado são posições de linha (sem copiar o DataFrame).
+    """
+    
+    COLUNAS_CATEGORICAS = {'regiao': 'Todas', 'curso': 'Todos', 'situacao': 'Todas', 'sentimento': None}
+    COLUNAS_NUMERICAS = {'idade': 'idade_range', 'polaridade': 'polaridade_range'}
+    
+    def __init__(self, df, tamanho_cache=128):
+        self.n = len(df)
+        self.tamanho_cache = tamanho_cache
+        self._cache = OrderedDict()
+        self._todos = np.packbits(np.ones(self.n, dtype=bool))
+        
+        self._bitmaps = {}
+        for coluna in self.COLUNAS_CATEGORICAS:
+            codigos, valores = pd.factorize(df[coluna])
+            self._bitmaps[coluna] = {
+                valor: np.packbits(codigos == k) for k, valor in enumerate(valores)
+            }
+        
+        self._ordenados = {}
+        for coluna in self.COLUNAS_NUMERICAS:
+            valores = df[coluna].to_numpy(dtype=np.float64)
+            ordem = np.argsort(valores, kind='stable')
+            self._ordenados[coluna] = (valores[ordem], ordem)
+    
+    def _bitmap_valores(self, coluna, valores):
+        """OU dos bitmaps dos valores escolhidos (valor ausente = nenhuma linha)"""
+        resultado = np.zeros_like(self._todos)
+        for valor in valores:
+            bitmap = self._bitmaps[coluna].get(valor)
+            if bitmap is not None:
+                resultado |= bitmap
+        return resultado
+    
+    def _bitmap_intervalo(self, coluna, minimo, maximo):
+        """Bitmap das linhas com minimo <= valor <= maximo via busca binária no índice ordenado"""
+        valores, ordem = self._ordenados[coluna]
+        inicio = np.searchsorted(valores, minimo, side='left')
+        fim = np.searchsorted(valores, maximo, side='right')
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[ordem[inicio:fim]] = True
+        return np.packbits(mascara)
+    
+    def _chave(self, filtros):
+        """Chave normalizada (e hasheável) de uma combinação de filtros"""
+        chave = []
+        for coluna, todos in self.COLUNAS_CATEGORICAS.items():
+            valor = filtros.get(coluna)
+            if todos is None:
+                chave.append(tuple(sorted(valor)) if valor else None)
+            else:
+                chave.append(valor if valor and valor != todos else None)
+        for coluna, nome in self.COLUNAS_NUMERICAS.items():
+            intervalo = filtros.get(nome)
+            # Mesma regra de aplicar_filtros: intervalo degenerado não filtra
+            chave.append(tuple(intervalo) if intervalo and intervalo[0] != intervalo[1] else None)
+        return tuple(chave)
+    
+    def filtrar(self, filtros):
+        """Retorna as posições (ordenadas) das linhas que passam em todos os filtros"""
+        chave = self._chave(filtros)
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            return self._cache[chave]
+        
+        bitmap = self._todos.copy()
+        colunas = list(self.COLUNAS_CATEGORICAS) + list(self.COLUNAS_NUMERICAS)
+        for coluna, criterio in zip(colunas, chave):
+            if criterio is None:
+                continue
+            if coluna in self.COLUNAS_NUMERICAS:
+                bitmap &= self._bitmap_intervalo(coluna, *criterio)
+            else:
+                valores = criterio if isinstance(criterio, tuple) else (criterio,)
+                bitmap &= self._bitmap_valores(coluna, valores)
+        
+        posicoes = np.flatnonzero(np.unpackbits(bitmap, count=self.n))
+        posicoes.setflags(write=False)
+        
+        self._cache[chave] = posicoes
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+        return posicoes
+
+
+def assinatura_dataframe(df, colunas=None):
+    """Hash do conteúdo das colunas (identifica o conjunto de dados entre reruns)"""
+    colunas = colunas or list(MotorFiltros.COLUNAS_CATEGORICAS) + list(MotorFiltros.COLUNAS_NUMERICAS)
+    valores = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from utils import stop_words_portugues
+
+N_FRASES_CHAVE = 3
+N_TERMOS_CHAVE = 10
+NGRAMAS = (1, 2)
+
+# Fim de frase: pontuação final seguida de espaço
+_PADRAO_FRASE = r'(?<=[.!?…])\s+'
+
+
+def dividir_frases(textos):
+    """Frases de todos os textos numa divisão vetorizada: (frases, posição do texto de cada frase)"""
+    frases = (pd.Series(textos, dtype=object).fillna('').astype(str).reset_index(drop=True)
+              .str.strip().str.split(_PADRAO_FRASE, regex=True).explode())
+    frases = frases[frases.str.len() > 0]
+    return frases.to_numpy(dtype=object), frases.index.to_numpy(dtype=np.int64)
+
+
+def _topk_por_grupo(grupos, valores, k):
+    """Índices dos k maiores valores de cada grupo, ordenados por grupo e valor decrescente"""
+    if len(grupos) == 0:
+        return np.empty(0, dtype=np.int64)
+    ordem = np.lexsort((-valores, grupos))
+    ordenados = grupos[ordem]
+    inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+    posto = np.arange(len(ordem)) - np.repeat(inicios, np.diff(np.r_[inicios, len(ordem)]))
+    return ordem[posto < k]
+
+
+def _listas(valores, grupos, n):
+    """Divide valores já ordenados por grupo em n listas (grupos sem valores ficam vazios)"""
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(grupos, minlength=n), out=offsets[1:])
+    valores = valores.tolist()
+    return [valores[inicio:fim] for inicio, fim in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _contar_unicas(contar, frases):
+    """Matriz de contagens das frases vetorizando cada frase distinta uma única vez
+
+    Entrevistas repetem muitas frases; as linhas das repetidas são copiadas da matriz das únicas.
+    """
+    codigos, unicas = pd.factorize(pd.Series(frases, dtype=object))
+    return contar(np.asarray(unicas, dtype=object)).tocsr()[codigos]
+
+
+def _somar_por_documento(contagens, documentos, n):
+    """Contagens das frases somadas por texto (produto esparso com a matriz de pertinência)"""
+    from scipy import sparse
+    pertinencia = sparse.csr_matrix((np.ones(len(documentos), dtype=np.float32),
+                                     (documentos, np.arange(len(documentos)))), shape=(n, len(documentos)))
+    return (pertinencia @ contagens).tocsr()
+
+
+class MotorFrasesChave:
+    """Frases e n-gramas mais relevantes de cada entrevista e de cada recorte, por TF-IDF do corpus
+
+    Uma única matriz esparsa de contagens (frases x n-gramas) é montada para o corpus inteiro;
+    a matriz das entrevistas é a soma das suas frases, ponderada pelo IDF e normalizada. Cada
+    frase é pontuada pela similaridade com a própria entrevista (termos frequentes nela e raros
+    no corpus pesam mais) e o top-k sai de uma ordenação agrupada, sem laço por documento.
+    """
+
+    def __init__(self, termos, idf, matriz):
+        """termos: n-gramas; idf: peso de cada termo; matriz: TF-IDF (entrevistas x termos, CSR normalizada)"""
+        self.termos = termos
+        self.idf = idf
+        self.matriz = matriz
+        self._vetorizador = None
+
+    def __len__(self):
+        return self.matriz.shape[0]
+
+    @staticmethod
+    def _novo_vetorizador(**parametros):
+        from sklearn.feature_extraction.text import CountVectorizer
+        return CountVectorizer(ngram_range=NGRAMAS, stop_words=stop_words_portugues(), dtype=np.float32, **parametros)
+
+    @property
+    def vetorizador(self):
+        """Vetorizador com o vocabulário do corpus (para pontuar textos fora dele)"""
+        if self._vetorizador is None:
+            self._vetorizador = self._novo_vetorizador(vocabulary=self.termos.tolist())
+        return self._vetorizador
+
+    def _contar(self, frases):
+        from scipy import sparse
+        if not len(self.termos):
+            return sparse.csr_matrix((len(frases), 0), dtype=np.float32)
+        return _contar_unicas(self.vetorizador.transform, frases)
+
+    def _tfidf(self, contagens):
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+        ponderadas = (contagens @ sparse.diags(self.idf)).tocsr()
+        return normalize(ponderadas, copy=False) if ponderadas.shape[1] else ponderadas
+
+    def _ranquear(self, frases, documentos, contagens, matriz_documentos, k):
+        # Similaridade de cosseno de cada frase com a sua entrevista, para todas as frases de uma vez
+        pontos = np.asarray(self._tfidf(contagens).multiply(matriz_documentos[documentos]).sum(axis=1)).ravel()
+        escolhidas = _topk_por_grupo(documentos, pontos, k)
+        return _listas(frases[escolhidas], documentos[escolhidas], matriz_documentos.shape[0])
+
+    @classmethod
+    def ranquear_corpus(cls, textos, k=N_FRASES_CHAVE):
+        """Ajusta o motor ao corpus e ranqueia as frases de cada texto na mesma passada
+
+        Retorna (motor, lista com as k frases-chave de cada texto, da mais relevante à menos).
+        """
+        from scipy import sparse
+
+        frases, documentos = dividir_frases(textos)
+        n = len(textos)
+        try:
+            # Em corpora grandes, n-gramas de uma única frase só ocupam memória
+            vetorizador = cls._novo_vetorizador(min_df=2 if len(frases) > 1000 else 1)
+            contagens = _contar_unicas(vetorizador.fit_transform, frases)
+            termos = np.asarray(vetorizador.get_feature_names_out().tolist(), dtype=str)
+        except ValueError:
+            # Vocabulário vazio (textos vazios ou só stop words): frases ficam na ordem do texto
+            contagens = sparse.csr_matrix((len(frases), 0), dtype=np.float32)
+            termos = np.empty(0, dtype=str)
+
+        por_documento = _somar_por_documento(contagens, documentos, n)
+        frequencia = np.bincount(por_documento.indices, minlength=len(termos))
+        idf = (np.log((1 + n) / (1 + frequencia)) + 1).astype(np.float32)
+        motor = cls(termos, idf, None)
+        motor.matriz = motor._tfidf(por_documento)
+        return motor, motor._ranquear(frases, documentos, contagens, motor.matriz, k)
+
+    def frases_chave(self, textos, k=N_FRASES_CHAVE):
+        """k frases-chave de cada texto, pontuadas com o vocabulário e o IDF do corpus"""
+        frases, documentos = dividir_frases(textos)
+        contagens = self._contar(frases)
+        matriz = self._tfidf(_somar_por_documento(contagens, documentos, len(textos)))
+        return self._ranquear(frases, documentos, contagens, matriz, k)
+
+    def termos_por_entrevista(self, posicoes, k=N_TERMOS_CHAVE):
+        """k n-gramas de maior peso de cada entrevista pedida (posições de linha do corpus)"""
+        matriz = self.matriz[np.asarray(posicoes, dtype=np.int64)]
+        linhas = np.repeat(np.arange(matriz.shape[0]), np.diff(matriz.indptr))
+        escolhidos = _topk_por_grupo(linhas, matriz.data, k)
+        return _listas(self.termos[matriz.indices[escolhidos]], linhas[escolhidos], matriz.shape[0])
+
+    def termos_recorte(self, posicoes=None, k=N_TERMOS_CHAVE):
+        """k n-gramas de maior peso médio no recorte: lista de (termo, peso)"""
+        matriz = self.matriz if posicoes is None else self.matriz[np.asarray(posicoes, dtype=np.int64)]
+        if matriz.shape[0] == 0:
+            return []
+        pesos = np.asarray(matriz.sum(axis=0)).ravel() / matriz.shape[0]
+        k = min(k, np.count_nonzero(pesos))
+        if k == 0:
+            return []
+        melhores = np.argpartition(-pesos, k - 1)[:k]
+        melhores = melhores[np.argsort(-pesos[melhores], kind='stable')]
+        return list(zip(self.termos[melhores].tolist(), pesos[melhores].tolist()))
+
+    def salvar(self, caminho):
+        np.savez(caminho, termos=self.termos, idf=self.idf, dados=self.matriz.data,
+                 indices=self.matriz.indices, indptr=self.matriz.indptr, forma=np.array(self.matriz.shape))
+
+    @classmethod
+    def carregar(cls, caminho):
+        from scipy import sparse
+        with np.load(caminho, allow_pickle=False) as dados:
+            matriz = sparse.csr_matrix((dados['dados'], dados['indices'], dados['indptr']),
+                                       shape=tuple(dados['forma']))
+            return cls(dados['termos'], dados['idf'], matriz)
@@ -1,16 +1,23 @@
 import pandas as pd
 import numpy as np
-from faker import Faker
-from collections import defaultdict
+import argparse
+import datetime
+import os
 import random
 
-# Configuração inicial
-fake = Faker('pt_BR')
-np.random.seed(42)
+# Categorias fixas das colunas geradas (iguais em todos os lotes, para esquemas compatíveis)
+SITUACOES = ['Cursando', 'Evadido', 'Formado']
+SENTIMENTOS = ['Negativo', 'Neutro', 'Positivo']
+GENEROS = ['Masculino', 'Feminino', 'Não-binário']
+PESOS_GENERO = [0.6, 0.35, 0.05]
+PERIODOS = ['Matutino', 'Vespertino', 'Noturno', 'Integral']
 
 class GeradorEntrevistas:
-    def __init__(self, n_entrevistas=200):
+    def __init__(self, n_entrevistas=200, seed=None):
         self.n_entrevistas = n_entrevistas
+        self.seed = seed
+        # Gerador próprio do modo linha a linha (não depende do estado global do random)
+        self._aleatorio = random.Random(seed)
         self.regioes = {
             'Curitiba': {'evasao': 0.22, 'cursos': ['Ciência da Computação', 'Engenharia de Software']},
             'Londrina': {'evasao': 0.28, 'cursos': ['Sistemas de Informação', 'Ciência da Computação']},
@@ -32,23 +39,8 @@ class GeradorEntrevistas:
             'vocação': ['gosto pela área', 'perspectivas de carreira', 'identificação com o curso'],
             'social': ['amizades no curso', 'ambiente acolhedor', 'grupo de estudos']
         }
-
-    def _gerar_texto_evasao(self, motivo_principal):
-        """Gera texto realista para alunos evadidos"""
-        motivo = random.choice(self.motivos_evasao[motivo_principal])
         
-        estruturas = [
-            f"Tive que trancar o curso porque {motivo}. {self._complemento_evasao(motivo_principal)}",
-            f"Decidi sair pois {motivo}. {self._complemento_evasao(motivo_principal)}",
-            f"O principal motivo foi {motivo}. {self._complemento_evasao(motivo_principal)}",
-            f"Não consegui continuar devido a {motivo}. {self._complemento_evasao(motivo_principal)}"
-        ]
-        
-        return random.choice(estruturas)
-
-    def _complemento_evasao(self, motivo):
-        """Adiciona detalhes ao motivo de evasão"""
-        complementos = {
+        self.complementos_evasao = {
             'financeiro': [
                 "Mesmo tentando conciliar trabalho e estudos, não foi possível.",
                 "As despesas com transporte e materiais pesaram no orçamento."
@@ -66,24 +58,8 @@ class GeradorEntrevistas:
                 "Faltavam professores especializados em áreas importantes."
             ]
         }
-        return random.choice(complementos[motivo])
-
-    def _gerar_texto_permanencia(self, fator_principal):
-        """Gera texto realista para alunos que permaneceram"""
-        fator = random.choice(self.fatores_permanencia[fator_principal])
-        
-        estruturas = [
-            f"Continuei no curso porque {fator}. {self._complemento_permanencia(fator_principal)}",
-            f"O que me fez permanecer foi {fator}. {self._complemento_permanencia(fator_principal)}",
-            f"O fator decisivo foi {fator}. {self._complemento_permanencia(fator_principal)}",
-            f"Graças a {fator} consegui seguir no curso. {self._complemento_permanencia(fator_principal)}"
-        ]
         
-        return random.choice(estruturas)
-
-    def _complemento_permanencia(self, fator):
-        """Adiciona detalhes ao fator de permanência"""
-        complementos = {
+        self.complementos_permanencia = {
             'apoio': [
                 "O programa de bolsas foi essencial para minha continuidade.",
                 "Os professores sempre estiveram disponíveis para tirar dúvidas."
@@ -97,34 +73,76 @@ class GeradorEntrevistas:
                 "O ambiente colaborativo entre os alunos é inspirador."
             ]
         }
-        return random.choice(complementos[fator])
+        
+        self.estruturas_evasao = [
+            "Tive que trancar o curso porque {detalhe}. {complemento}",
+            "Decidi sair pois {detalhe}. {complemento}",
+            "O principal motivo foi {detalhe}. {complemento}",
+            "Não consegui continuar devido a {detalhe}. {complemento}"
+        ]
+        
+        self.estruturas_permanencia = [
+            "Continuei no curso porque {detalhe}. {complemento}",
+            "O que me fez permanecer foi {detalhe}. {complemento}",
+            "O fator decisivo foi {detalhe}. {complemento}",
+            "Graças a {detalhe} consegui seguir no curso. {complemento}"
+        ]
+
+    def _gerar_texto_evasao(self, motivo_principal):
+        """Gera texto realista para alunos evadidos"""
+        motivo = self._aleatorio.choice(self.motivos_evasao[motivo_principal])
+        return self._aleatorio.choice(self.estruturas_evasao).format(
+            detalhe=motivo, complemento=self._complemento_evasao(motivo_principal))
+
+    def _complemento_evasao(self, motivo):
+        """Adiciona detalhes ao motivo de evasão"""
+        return self._aleatorio.choice(self.complementos_evasao[motivo])
+
+    def _gerar_texto_permanencia(self, fator_principal):
+        """Gera texto realista para alunos que permaneceram"""
+        fator = self._aleatorio.choice(self.fatores_permanencia[fator_principal])
+        return self._aleatorio.choice(self.estruturas_permanencia).format(
+            detalhe=fator, complemento=self._complemento_permanencia(fator_principal))
+
+    def _complemento_permanencia(self, fator):
+        """Adiciona detalhes ao fator de permanência"""
+        return self._aleatorio.choice(self.complementos_permanencia[fator])
 
-    def gerar_dataframe(self):
-        """Gera DataFrame com entrevistas fictícias"""
+    def gerar_dataframe(self, data_referencia=None):
+        """Gera DataFrame com entrevistas fictícias (reprodutível pela seed)
+        
+        As datas cobrem os 2 anos anteriores a data_referencia (padrão: hoje).
+        """
+        from faker import Faker
+        
+        self._aleatorio = random.Random(self.seed)
+        fake = Faker('pt_BR')
+        fake.seed_instance(self.seed)
+        referencia = data_referencia or datetime.date.today()
         dados = []
         
         for i in range(self.n_entrevistas):
-            regiao = random.choice(list(self.regioes.keys()))
-            curso = random.choice(self.regioes[regiao]['cursos'])
+            regiao = self._aleatorio.choice(list(self.regioes.keys()))
+            curso = self._aleatorio.choice(self.regioes[regiao]['cursos'])
             evasao_rate = self.regioes[regiao]['evasao']
             
             # Determinar situação baseada na taxa de evasão da região
-            if random.random() < evasao_rate:
+            if self._aleatorio.random() < evasao_rate:
                 situacao = 'Evadido'
-                motivo_principal = random.choice(list(self.motivos_evasao.keys()))
+                motivo_principal = self._aleatorio.choice(list(self.motivos_evasao.keys()))
                 texto = self._gerar_texto_evasao(motivo_principal)
-                sentimento = 'Negativo' if random.random() > 0.2 else 'Neutro'
+                sentimento = 'Negativo' if self._aleatorio.random() > 0.2 else 'Neutro'
             else:
-                situacao = random.choices(['Formado', 'Cursando'], weights=[0.3, 0.7])[0]
-                fator_principal = random.choice(list(self.fatores_permanencia.keys()))
+                situacao = self._aleatorio.choices(['Formado', 'Cursando'], weights=[0.3, 0.7])[0]
+                fator_principal = self._aleatorio.choice(list(self.fatores_permanencia.keys()))
                 texto = self._gerar_texto_permanencia(fator_principal)
-                sentimento = 'Positivo' if random.random() > 0.7 else 'Neutro'
+                sentimento = 'Positivo' if self._aleatorio.random() > 0.7 else 'Neutro'
             
             # Gerar metadados adicionais
-            idade = random.randint(17, 40)
-            genero = random.choices(['Masculino', 'Feminino', 'Não-binário'], weights=[0.6, 0.35, 0.05])[0]
-            periodo = random.choice(['Matutino', 'Vespertino', 'Noturno', 'Integral'])
-            semestre = random.randint(1, 8) if situacao == 'Cursando' else 8 if situacao == 'Formado' else random.randint(1, 6)
+            idade = self._aleatorio.randint(17, 40)
+            genero = self._aleatorio.choices(['Masculino', 'Feminino', 'Não-binário'], weights=[0.6, 0.35, 0.05])[0]
+            periodo = self._aleatorio.choice(['Matutino', 'Vespertino', 'Noturno', 'Integral'])
+            semestre = self._aleatorio.randint(1, 8) if situacao == 'Cursando' else 8 if situacao == 'Formado' else self._aleatorio.randint(1, 6)
             
             dados.append({
                 'id': i + 1,
@@ -137,14 +155,151 @@ class GeradorEntrevistas:
                 'semestre': semestre,
                 'situacao': situacao,
                 'sentimento': sentimento,
-                'data_entrevista': fake.date_between(start_date='-2y', end_date='today')
+                'data_entrevista': fake.date_between(start_date=referencia - datetime.timedelta(days=2 * 365),
+                                                     end_date=referencia)
             })
         
         return pd.DataFrame(dados)
 
+    def _tabela_textos(self, detalhes, complementos, estruturas):
+        """Todas as combinações de texto possíveis, agrupadas por categoria
+        
+        Retorna (textos, inicio, quantidade): as combinações da categoria i ocupam
+        textos[inicio[i]:inicio[i] + quantidade[i]].
+        """
+        textos, inicio, quantidade = [], [], []
+        for categoria, lista_detalhes in detalhes.items():
+            inicio.append(len(textos))
+            for detalhe in lista_detalhes:
+                for estrutura in estruturas:
+                    for complemento in complementos[categoria]:
+                        textos.append(estrutura.format(detalhe=detalhe, complemento=complemento))
+            quantidade.append(len(textos) - inicio[-1])
+        return textos, np.array(inicio), np.array(quantidade)
+
+    def gerar_dataframe_vetorizado(self, n=None, seed=None, inicio_id=1, rng=None, data_referencia=None):
+        """Gera o DataFrame inteiro com operações vetorizadas do NumPy (reprodutível pela seed)
+        
+        As colunas de texto são categóricas: os textos são montados a partir de índices
+        sobre a tabela de combinações de modelos, sem criar uma string por linha.
+        As datas cobrem os 2 anos anteriores a data_referencia (padrão: hoje).
+        """
+        n = self.n_entrevistas if n is None else n
+        if rng is None:
+            rng = np.random.default_rng(self.seed if seed is None else seed)
+        
+        nomes_regioes = list(self.regioes.keys())
+        taxas_evasao = np.array([self.regioes[r]['evasao'] for r in nomes_regioes])
+        cursos = sorted({c for r in self.regioes.values() for c in r['cursos']})
+        # Matriz região x opção -> índice do curso
+        cursos_regiao = np.array([[cursos.index(c) for c in self.regioes[r]['cursos']] for r in nomes_regioes])
+        
+        regiao = rng.integers(0, len(nomes_regioes), n)
+        curso = cursos_regiao[regiao, rng.integers(0, cursos_regiao.shape[1], n)]
+        evadido = rng.random(n) < taxas_evasao[regiao]
+        formado = rng.random(n) < 0.3
+        situacao = np.where(evadido, SITUACOES.index('Evadido'),
+                            np.where(formado, SITUACOES.index('Formado'), SITUACOES.index('Cursando')))
+        
+        # Textos: sorteia categoria e depois uma combinação dentro da categoria
+        textos_ev, inicio_ev, qtd_ev = self._tabela_textos(
+            self.motivos_evasao, self.complementos_evasao, self.estruturas_evasao)
+        textos_perm, inicio_perm, qtd_perm = self._tabela_textos(
+            self.fatores_permanencia, self.complementos_permanencia, self.estruturas_permanencia)
+        cat_ev = rng.integers(0, len(inicio_ev), n)
+        cat_perm = rng.integers(0, len(inicio_perm), n)
+        sorteio = rng.random(n)
+        idx_ev = inicio_ev[cat_ev] + (sorteio * qtd_ev[cat_ev]).astype(np.int64)
+        idx_perm = len(textos_ev) + inicio_perm[cat_perm] + (sorteio * qtd_perm[cat_perm]).astype(np.int64)
+        texto = np.where(evadido, idx_ev, idx_perm)
+        
+        sorteio = rng.random(n)
+        sentimento = np.where(
+            evadido,
+            np.where(sorteio > 0.2, SENTIMENTOS.index('Negativo'), SENTIMENTOS.index('Neutro')),
+            np.where(sorteio > 0.7, SENTIMENTOS.index('Positivo'), SENTIMENTOS.index('Neutro')))
+        
+        semestre = np.where(evadido, rng.integers(1, 7, n),
+                            np.where(formado, 8, rng.integers(1, 9, n)))
+        
+        referencia = np.datetime64(data_referencia or datetime.date.today(), 'D')
+        data_entrevista = referencia - rng.integers(0, 2 * 365 + 1, n).astype('timedelta64[D]')
+        
+        def categorica(codigos, categorias):
+            return pd.Categorical.from_codes(codigos, categories=categorias)
+        
+        return pd.DataFrame({
+            'id': np.arange(inicio_id, inicio_id + n, dtype=np.int64),
+            'texto': categorica(texto, textos_ev + textos_perm),
+            'regiao': categorica(regiao, nomes_regioes),
+            'curso': categorica(curso, cursos),
+            'genero': categorica(rng.choice(len(GENEROS), size=n, p=PESOS_GENERO), GENEROS),
+            'idade': rng.integers(17, 41, n),
+            'periodo': categorica(rng.integers(0, len(PERIODOS), n), PERIODOS),
+            'semestre': semestre,
+            'situacao': categorica(situacao, SITUACOES),
+            'sentimento': categorica(sentimento, SENTIMENTOS),
+            'data_entrevista': data_entrevista.astype('datetime64[ns]')
+        })
+
+    def gerar_em_lotes(self, n_total=None, tamanho_lote=500_000, seed=None, data_referencia=None):
+        """Gera o conjunto em lotes de tamanho fixo (memória limitada ao tamanho do lote)
+        
+        Um único gerador é usado em sequência, então a mesma seed e o mesmo
+        tamanho de lote produzem exatamente os mesmos dados.
+        """
+        n_total = self.n_entrevistas if n_total is None else n_total
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        for inicio in range(0, n_total, tamanho_lote):
+            n = min(tamanho_lote, n_total - inicio)
+            yield self.gerar_dataframe_vetorizado(n, inicio_id=inicio + 1, rng=rng, data_referencia=data_referencia)
+
+    def salvar_em_lotes(self, caminho, n_total=None, tamanho_lote=500_000, formato='parquet', seed=None,
+                        data_referencia=None):
+        """Grava o conjunto lote a lote em Parquet ou CSV, sem mantê-lo inteiro em memória"""
+        if formato not in ('parquet', 'csv'):
+            raise ValueError(f"Formato não suportado: {formato}")
+        
+        escritor = None
+        total = 0
+        try:
+            for lote in self.gerar_em_lotes(n_total, tamanho_lote, seed, data_referencia):
+                if formato == 'parquet':
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    tabela = pa.Table.from_pandas(lote, preserve_index=False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(caminho, tabela.schema)
+                    escritor.write_table(tabela)
+                else:
+                    lote.to_csv(caminho, mode='w' if total == 0 else 'a', header=total == 0, index=False)
+                total += len(lote)
+                print(f"{total} entrevistas gravadas em {caminho}")
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return total
+
 # Exemplo de uso
 if __name__ == "__main__":
-    gerador = GeradorEntrevistas(300)
-    df_entrevistas = gerador.gerar_dataframe()
-    df_entrevistas.to_csv('dados_entrevistas_ficticias.csv', index=False)
-    print("Dataset com 300 entrevistas fictícias gerado e salvo como 'dados_entrevistas_ficticias.csv'")
+    parser = argparse.ArgumentParser(description="Gera entrevistas fictícias")
+    parser.add_argument('-n', type=int, default=300, help="Número de entrevistas")
+    parser.add_argument('--saida', default='dados_entrevistas_ficticias.csv')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tamanho-lote', type=int, default=500_000)
+    parser.add_argument('--data-referencia', type=datetime.date.fromisoformat, default=None,
+                        help="Data (AAAA-MM-DD) que encerra o período das entrevistas (padrão: hoje); "
+                             "fixá-la torna a saída da mesma seed idêntica em qualquer dia")
+    parser.add_argument('--vetorizado', action='store_true',
+                        help="Usa o gerador vetorizado com gravação em lotes (indicado para milhões de linhas)")
+    args = parser.parse_args()
+    
+    gerador = GeradorEntrevistas(args.n, seed=args.seed)
+    if args.vetorizado:
+        formato = 'parquet' if os.path.splitext(args.saida)[1] == '.parquet' else 'csv'
+        gerador.salvar_em_lotes(args.saida, tamanho_lote=args.tamanho_lote, formato=formato,
+                                data_referencia=args.data_referencia)
+    else:
+        df_entrevistas = gerador.gerar_dataframe(data_referencia=args.data_referencia)
+        df_entrevistas.to_csv(args.saida, index=False)
+    print(f"Dataset com {args.n} entrevistas fictícias gerado e salvo como '{args.saida}'")
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from colunar import ColunaLista
+from utils import caminho_dados
+
+# Operadores aceitos nas consultas (em maiúsculas, para não confundir com palavras do texto)
+OPERADORES_OU = {'OU', 'OR'}
+OPERADORES_E = {'E', 'AND'}
+OPERADORES_NAO = {'NÃO', 'NAO', 'NOT'}
+
+_PADRAO_CONSULTA = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+class ConsultaSemTermos(ValueError):
+    """Consulta sem nenhum termo pesquisável (vazia, só operadores ou só stop words)"""
+
+
+def assinatura_tokens(tokens):
+    """Hash do conteúdo de tokens_limpos (identifica o índice salvo em disco)"""
+    valores = pd.util.hash_pandas_object(pd.Series(tokens, dtype=object).fillna(''), index=False)
+    return hashlib.sha1(valores.to_numpy().tobytes()).hexdigest()
+
+
+class IndiceInvertido:
+    """Índice invertido posicional sobre tokens_limpos (lematizados, sem stop words)
+
+    As listas de ocorrências de todos os termos ficam em dois vetores (documento e
+    posição), ordenados por termo, documento e posição; offsets_termos[t] marca o
+    início das ocorrências do termo t. Documentos são posições de linha do DataFrame.
+
+    Consultas: termos separados por espaço exigem todos (E), OU/OR une alternativas,
+    "aspas" buscam a frase exata e -termo ou NÃO termo excluem.
+    """
+
+    def __init__(self, termos, offsets_termos, documentos, posicoes, n_documentos, assinatura='',
+                 tamanho_cache=128):
+        self.termos = termos
+        self.offsets_termos = offsets_termos
+        self.documentos = documentos
+        self.posicoes = posicoes
+        self.n_documentos = n_documentos
+        self.assinatura = assinatura
+        self.tamanho_cache = tamanho_cache
+        self._ids_termos = {termo: i for i, termo in enumerate(termos.tolist())}
+        self._cache = OrderedDict()
+
+    @classmethod
+    def construir(cls, tokens, assinatura=None):
+        """Monta o índice a partir da coluna tokens_limpos (um texto por linha)"""
+        tokens = pd.Series(tokens, dtype=object).fillna('').astype(str)
+        coluna = ColunaLista.de_listas(tokens.str.split().tolist())
+        tamanhos = coluna.tamanhos()
+
+        documentos = np.repeat(np.arange(len(coluna), dtype=np.int32), tamanhos)
+        posicoes = (np.arange(len(coluna.codigos), dtype=np.int64)
+                    - np.repeat(coluna.offsets[:-1], tamanhos)).astype(np.int32)
+
+        # Ocorrências já estão em ordem de documento/posição: ordenação estável só pelo termo
+        ordem = np.argsort(coluna.codigos, kind='stable')
+        offsets_termos = np.zeros(len(coluna.dicionario) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(coluna.codigos, minlength=len(coluna.dicionario)), out=offsets_termos[1:])
+
+        termos = np.asarray(coluna.dicionario.tolist(), dtype=str)
+        return cls(termos, offsets_termos, documentos[ordem], posicoes[ordem], len(coluna),
+                   assinatura or assinatura_tokens(tokens))
+
+    def salvar(self, caminho):
+        np.savez(caminho, termos=self.termos, offsets_termos=self.offsets_termos,
+                 documentos=self.documentos, posicoes=self.posicoes,
+                 n_documentos=np.int64(self.n_documentos), assinatura=np.array(self.assinatura))
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls(dados['termos'], dados['offsets_termos'], dados['documentos'], dados['posicoes'],
+                       int(dados['n_documentos']), str(dados['assinatura']))
+
+    def __len__(self):
+        return self.n_documentos
+
+    def _ocorrencias(self, termo):
+        """(documentos, posições) do termo; vetores vazios se o termo não estiver no índice"""
+        i = self._ids_termos.get(termo)
+        if i is None:
+            return self.documentos[:0], self.posicoes[:0]
+        inicio, fim = self.offsets_termos[i], self.offsets_termos[i + 1]
+        return self.documentos[inicio:fim], self.posicoes[inicio:fim]
+
+    def _mascara_termo(self, termo):
+        mascara = np.zeros(self.n_documentos, dtype=bool)
+        mascara[self._ocorrencias(termo)[0]] = True
+        return mascara
+
+    def _mascara_frase(self, termos):
+        """Documentos em que os termos aparecem em posições consecutivas"""
+        if len(termos) == 1:
+            return self._mascara_termo(termos[0])
+        # Ocorrência codificada como documento << 32 | posição (ordenada dentro de cada termo)
+        chaves = [(docs.astype(np.int64) << 32) | pos.astype(np.int64)
+                  for docs, pos in map(self._ocorrencias, termos)]
+        candidatas = chaves[0]
+        for deslocamento, seguinte in enumerate(chaves[1:], start=1):
+            if len(candidatas) == 0:
+                break
+            alvo = candidatas + deslocamento
+            onde = np.minimum(np.searchsorted(seguinte, alvo), max(len(seguinte) - 1, 0))
+            candidatas = candidatas[seguinte[onde] == alvo] if len(seguinte) else candidatas[:0]
+        mascara = np.zeros(self.n_documentos, dtype=bool)
+        mascara[(candidatas >> 32).astype(np.int64)] = True
+        return mascara
+
+    @staticmethod
+    def interpretar(consulta, normalizar=None):
+        """Converte a consulta em grupos (OU) de cláusulas (E): (negada, [termos da frase])"""
+        normalizar = normalizar or (lambda texto: texto.lower().split())
+        grupos, atual, negar = [], [], False
+        for sinal, frase, palavra in _PADRAO_CONSULTA.findall(consulta):
+            if palavra in OPERADORES_OU:
+                if atual:
+                    grupos.append(atual)
+                atual, negar = [], False
+                continue
+            if palavra in OPERADORES_E:
+                continue
+            if palavra in OPERADORES_NAO:
+                negar = True
+                continue
+            if palavra.startswith('-') and len(palavra) > 1:
+                sinal, palavra = '-', palavra[1:]
+            termos = normalizar(frase if frase else palavra)
+            if termos:
+                atual.append((negar or sinal == '-', termos))
+            negar = False
+        if atual:
+            grupos.append(atual)
+        return grupos
+
+    def buscar(self, consulta, normalizar=None):
+        """Posições (ordenadas) dos documentos que atendem à consulta
+
+        normalizar: função texto -> lista de tokens; deve reproduzir o processamento de
+        tokens_limpos (lematização, minúsculas, sem stop words). Uma consulta que não
+        sobra nenhum termo depois disso levanta ConsultaSemTermos, em vez de não achar nada.
+        """
+        grupos = self.interpretar(consulta, normalizar)
+        if not grupos:
+            raise ConsultaSemTermos(f"A busca \"{consulta.strip()}\" não tem termos pesquisáveis "
+                                    "(só palavras muito comuns ou operadores)")
+        chave = tuple(tuple((negada, tuple(termos)) for negada, termos in grupo) for grupo in grupos)
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            return self._cache[chave]
+
+        resultado = np.zeros(self.n_documentos, dtype=bool)
+        for grupo in grupos:
+            mascara = np.ones(self.n_documentos, dtype=bool)
+            for negada, termos in grupo:
+                if negada:
+                    mascara &= ~self._mascara_frase(termos)
+                else:
+                    mascara &= self._mascara_frase(termos)
+            resultado |= mascara
+
+        posicoes = np.flatnonzero(resultado)
+        posicoes.setflags(write=False)
+        self._cache[chave] = posicoes
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+        return posicoes
+
+
+def obter_indice_textual(tokens, caminho=None, assinatura=None):
+    """Carrega o índice salvo em data/ se corresponder aos tokens; senão reconstrói e salva
+
+    assinatura: identificação dos tokens já conhecida pelo chamador (evita o hash do conteúdo)
+    """
+    caminho = caminho or caminho_dados('indice_textual.npz')
+    assinatura = assinatura or assinatura_tokens(tokens)
+    if os.path.exists(caminho):
+        try:
+            indice = IndiceInvertido.carregar(caminho)
+            if indice.assinatura == assinatura:
+                return indice
+        except Exception as e:
+            print(f"Índice textual salvo inválido, reconstruindo: {str(e)}")
+
+    indice = IndiceInvertido.construir(tokens, assinatura)
+    try:
+        temporario = f"{caminho}.tmp.npz"
+        indice.salvar(temporario)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Não foi possível salvar o índice textual: {str(e)}")
+    return indice
@@ -0,0 +1,279 @@
+import csv
+import json
+import os
+import sys
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+from gerador_entrevistas import SITUACOES, SENTIMENTOS
+from utils import caminho_dados
+
+# Colunas exigidas pelo painel e opcionais aproveitadas quando existem (demais são descartadas)
+COLUNAS_OBRIGATORIAS = ['texto', 'regiao', 'curso', 'situacao', 'idade', 'data_entrevista']
+COLUNAS_OPCIONAIS = ['id', 'genero', 'periodo', 'semestre', 'sentimento']
+
+TAMANHO_BLOCO = 5000
+IDADE_MINIMA, IDADE_MAXIMA = 14, 100
+FORMATOS = ('.csv', '.jsonl', '.ndjson', '.parquet')
+
+# Entrevistas reais longas passam do limite padrão de campo do módulo csv (128 KB)
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+class ErroEsquema(ValueError):
+    """Arquivo sem as colunas obrigatórias (erro do arquivo inteiro, não de uma linha)"""
+
+
+class Ingestao:
+    """Leitura em blocos de exportações CSV/JSONL/Parquet de entrevistas reais
+
+    Cada bloco de até tamanho_bloco linhas é validado e normalizado; linhas inválidas
+    vão para um arquivo JSONL de quarentena (linha do arquivo, motivo e conteúdo) em
+    vez de interromper a leitura. Só um bloco fica em memória por vez.
+
+        ingestao = Ingestao('entrevistas.csv')
+        for bloco in ingestao: ...
+        ingestao.relatorio  # lidas, validas, invalidas, motivos
+    """
+
+    def __init__(self, caminho, tamanho_bloco=TAMANHO_BLOCO, quarentena=None):
+        extensao = os.path.splitext(caminho)[1].lower()
+        if extensao not in FORMATOS:
+            raise ValueError(f"Formato de entrada não suportado: {extensao} (use {', '.join(FORMATOS)})")
+        self.caminho = caminho
+        self.extensao = extensao
+        self.tamanho_bloco = tamanho_bloco
+        self.quarentena = quarentena or caminho_dados(
+            'quarentena', f"{os.path.splitext(os.path.basename(caminho))[0]}.jsonl")
+        self.relatorio = self._relatorio_vazio()
+
+    @staticmethod
+    def _relatorio_vazio():
+        return {'lidas': 0, 'validas': 0, 'invalidas': 0, 'motivos': Counter()}
+
+    def __iter__(self):
+        """Blocos válidos, com índice global contínuo e coluna id (recomeça a leitura do início)"""
+        self.relatorio = self._relatorio_vazio()
+        if os.path.exists(self.quarentena):
+            os.remove(self.quarentena)
+
+        for bloco, descartadas in self._blocos_brutos():
+            # Linhas ilegíveis não passam por validar(), mas também contam como lidas
+            self.relatorio['lidas'] += len(descartadas)
+            self._quarentenar(descartadas)
+            if bloco is None or bloco.empty:
+                continue
+            validas = self.validar(bloco)
+            if validas.empty:
+                continue
+            inicio = self.relatorio['validas']
+            validas.index = pd.RangeIndex(inicio, inicio + len(validas))
+            if 'id' not in validas.columns:
+                validas.insert(0, 'id', np.arange(inicio + 1, inicio + len(validas) + 1, dtype=np.int64))
+            self.relatorio['validas'] += len(validas)
+            yield validas
+
+        if self.relatorio['invalidas']:
+            print(f"{self.relatorio['invalidas']} linhas inválidas de {self.relatorio['lidas']} "
+                  f"em quarentena: {self.quarentena}")
+
+    def verificar_esquema(self):
+        """Confere as colunas obrigatórias lendo só o começo do arquivo (levanta ErroEsquema)"""
+        if self.extensao == '.csv':
+            with open(self.caminho, newline='', encoding='utf-8-sig') as f:
+                self._verificar_colunas(next(csv.reader(f), []))
+        elif self.extensao == '.parquet':
+            import pyarrow.parquet as pq
+            self._verificar_colunas(pq.read_schema(self.caminho).names)
+        elif next(self._ler_jsonl(), None) is None:
+            raise ErroEsquema(f"{self.caminho}: arquivo vazio")
+
+    # Leitura -----------------------------------------------------------------------------
+
+    def _blocos_brutos(self):
+        """(DataFrame do bloco com coluna _linha, [(linha, motivo, registro)] ilegíveis)"""
+        if self.extensao == '.csv':
+            yield from self._ler_csv()
+        elif self.extensao == '.parquet':
+            import pyarrow.parquet as pq
+            arquivo = pq.ParquetFile(self.caminho)
+            self._verificar_colunas(arquivo.schema_arrow.names)
+            linha = 1
+            for lote in arquivo.iter_batches(batch_size=self.tamanho_bloco):
+                bloco = lote.to_pandas()
+                bloco.columns = [self._nome_coluna(c) for c in bloco.columns]
+                bloco['_linha'] = np.arange(linha, linha + len(bloco))
+                linha += len(bloco)
+                yield bloco, []
+        else:
+            yield from self._ler_jsonl()
+
+    @staticmethod
+    def _nome_coluna(nome):
+        return str(nome).strip().lower()
+
+    def _verificar_colunas(self, colunas):
+        colunas = [self._nome_coluna(c) for c in colunas]
+        faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in colunas]
+        if faltando:
+            raise ErroEsquema(f"{self.caminho}: colunas obrigatórias ausentes: {', '.join(faltando)}")
+        ignoradas = [c for c in colunas if c not in COLUNAS_OBRIGATORIAS + COLUNAS_OPCIONAIS]
+        if ignoradas:
+            print(f"Colunas ignoradas na ingestão: {', '.join(ignoradas)}")
+        return colunas
+
+    def _ler_csv(self):
+        with open(self.caminho, newline='', encoding='utf-8-sig') as f:
+            leitor = csv.reader(f)
+            cabecalho = self._verificar_colunas(next(leitor, []))
+            n_colunas = len(cabecalho)
+            linhas, numeros, descartadas = [], [], []
+            for registro in leitor:
+                if not registro:
+                    continue
+                if len(registro) != n_colunas:
+                    descartadas.append((leitor.line_num, 'colunas_incorretas', registro))
+                else:
+                    linhas.append(registro)
+                    numeros.append(leitor.line_num)
+                if len(linhas) + len(descartadas) >= self.tamanho_bloco:
+                    yield self._montar(linhas, numeros, cabecalho), descartadas
+                    linhas, numeros, descartadas = [], [], []
+            if linhas or descartadas:
+                yield self._montar(linhas, numeros, cabecalho), descartadas
+
+    def _ler_jsonl(self):
+        primeiro_bloco = True
+        with open(self.caminho, encoding='utf-8-sig') as f:
+            registros, numeros, descartadas = [], [], []
+            for numero, texto in enumerate(f, start=1):
+                if not texto.strip():
+                    continue
+                try:
+                    registro = json.loads(texto)
+                except ValueError:
+                    registro = None
+                if not isinstance(registro, dict):
+                    descartadas.append((numero, 'json_invalido', texto.rstrip('\n')))
+                else:
+                    registros.append({self._nome_coluna(k): v for k, v in registro.items()})
+                    numeros.append(numero)
+                if len(registros) + len(descartadas) >= self.tamanho_bloco:
+                    yield self._montar(registros, numeros, verificar=primeiro_bloco), descartadas
+                    registros, numeros, descartadas = [], [], []
+                    primeiro_bloco = False
+            if registros or descartadas:
+                yield self._montar(registros, numeros, verificar=primeiro_bloco), descartadas
+
+    def _montar(self, registros, numeros, colunas=None, verificar=False):
+        if not registros:
+            return None
+        bloco = pd.DataFrame(registros, columns=colunas)
+        if verificar:
+            # JSONL não tem cabeçalho: o esquema é verificado pelas chaves do primeiro bloco
+            self._verificar_colunas(bloco.columns)
+        bloco['_linha'] = numeros
+        return bloco
+
+    # Validação ---------------------------------------------------------------------------
+
+    def validar(self, bloco):
+        """Normaliza os tipos e separa as linhas inválidas (enviadas à quarentena)"""
+        # Registros JSONL sem alguma chave obrigatória viram valores ausentes (e linhas inválidas)
+        bloco = bloco.reindex(columns=COLUNAS_OBRIGATORIAS + [c for c in COLUNAS_OPCIONAIS + ['_linha']
+                                                              if c in bloco.columns])
+        self.relatorio['lidas'] += len(bloco)
+        normalizado = pd.DataFrame(index=bloco.index)
+        problemas = {}
+
+        def texto(coluna):
+            valores = bloco[coluna].astype('string').str.strip()
+            return valores.where(valores != '')
+
+        for coluna in ('texto', 'regiao', 'curso'):
+            normalizado[coluna] = texto(coluna)
+            problemas[f'{coluna}_ausente'] = normalizado[coluna].isna()
+
+        situacao = texto('situacao').str.capitalize()
+        normalizado['situacao'] = situacao
+        problemas['situacao_invalida'] = ~situacao.isin(SITUACOES).fillna(False)
+
+        idade = pd.to_numeric(bloco['idade'], errors='coerce')
+        problemas['idade_invalida'] = ~idade.between(IDADE_MINIMA, IDADE_MAXIMA) | (idade % 1 != 0)
+        normalizado['idade'] = idade.where(~problemas['idade_invalida'], 0).astype(np.int64)
+
+        # ISO (aaaa-mm-dd) ou, nas exportações brasileiras, dd/mm/aaaa
+        bruta = bloco['data_entrevista']
+        com_barras = bruta.astype('string').str.contains('/', regex=False).fillna(False).to_numpy(dtype=bool)
+        data = pd.to_datetime(bruta.where(~com_barras), errors='coerce')
+        if com_barras.any():
+            data[com_barras] = pd.to_datetime(bruta[com_barras], errors='coerce', dayfirst=True)
+        normalizado['data_entrevista'] = data
+        problemas['data_invalida'] = data.isna()
+
+        if 'id' in bloco.columns:
+            ids = pd.to_numeric(bloco['id'], errors='coerce')
+            problemas['id_invalido'] = ids.isna() | (ids % 1 != 0)
+            normalizado.insert(0, 'id', ids.where(~problemas['id_invalido'], 0).astype(np.int64))
+        if 'sentimento' in bloco.columns:
+            sentimento = texto('sentimento').str.capitalize()
+            normalizado['sentimento'] = sentimento
+            problemas['sentimento_invalido'] = ~sentimento.isin(SENTIMENTOS).fillna(False)
+        for coluna in ('genero', 'periodo'):
+            if coluna in bloco.columns:
+                normalizado[coluna] = texto(coluna)
+        if 'semestre' in bloco.columns:
+            normalizado['semestre'] = pd.to_numeric(bloco['semestre'], errors='coerce')
+
+        invalidas = np.zeros(len(bloco), dtype=bool)
+        for mascara in problemas.values():
+            invalidas |= mascara.to_numpy(dtype=bool)
+        if invalidas.any():
+            descartadas = []
+            motivos = {nome: mascara.to_numpy(dtype=bool)[invalidas] for nome, mascara in problemas.items()}
+            originais = bloco[invalidas].drop(columns='_linha')
+            registros = originais.astype(object).where(originais.notna(), None).to_dict('records')
+            for i, (linha, registro) in enumerate(zip(bloco.loc[invalidas, '_linha'], registros)):
+                motivo = ';'.join(nome for nome, marcados in motivos.items() if marcados[i])
+                descartadas.append((int(linha), motivo, registro))
+            self._quarentenar(descartadas)
+
+        normalizado = normalizado[~invalidas]
+        for coluna in ('texto', 'regiao', 'curso', 'situacao', 'sentimento', 'genero', 'periodo'):
+            if coluna in normalizado.columns:
+                normalizado[coluna] = normalizado[coluna].astype(object).where(normalizado[coluna].notna(), None)
+        return normalizado
+
+    def _quarentenar(self, descartadas):
+        if not descartadas:
+            return
+        with open(self.quarentena, 'a', encoding='utf-8') as f:
+            for linha, motivo, registro in descartadas:
+                f.write(json.dumps({'linha': linha, 'motivo': motivo, 'registro': registro},
+                                   ensure_ascii=False, default=str) + '\n')
+                self.relatorio['motivos'].update(motivo.split(';'))
+        self.relatorio['invalidas'] += len(descartadas)
+
+    def processar(self, processor=None, armazem=None, batch_size=64):
+        """Blocos já processados pelo EntrevistaProcessor, um de cada vez"""
+        from armazem_anotacoes import ArmazemAnotacoes
+        from data_processing import EntrevistaProcessor
+
+        processor = processor or EntrevistaProcessor()
+        armazem = armazem or ArmazemAnotacoes()
+        for bloco in self:
+            yield armazem.anotar(bloco, processor, batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Valida uma exportação de entrevistas sem processá-la")
+    parser.add_argument('entrada')
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO)
+    args = parser.parse_args()
+
+    ingestao = Ingestao(args.entrada, args.tamanho_bloco)
+    for _ in ingestao:
+        pass
+    print(json.dumps(ingestao.relatorio, ensure_ascii=False, indent=2))
@@ -0,0 +1,283 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import caminho_dados
+
+# Instrumentação ligada por padrão; EVASAO_INSTRUMENTACAO=0 desliga os cronômetros
+INSTRUMENTACAO_ATIVA = os.environ.get('EVASAO_INSTRUMENTACAO', '1') != '0'
+# Rastreamento de memória (tracemalloc) desde o início: EVASAO_TRACEMALLOC=1
+RASTREAR_MEMORIA = os.environ.get('EVASAO_TRACEMALLOC', '0') == '1'
+# Porta do endpoint local de métricas (/metrics e /metrics.json); vazio = desligado
+PORTA_METRICAS = os.environ.get('EVASAO_PORTA_METRICAS', '')
+
+PREFIXO_PROMETHEUS = 'evasao'
+
+
+class _Cronometro:
+    """Context manager de uma etapa (classe em vez de gerador: menor custo por chamada)"""
+
+    __slots__ = ('instrumentacao', 'nome', 'inicio', 'memoria_inicio')
+
+    def __init__(self, instrumentacao, nome):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+
+    def __enter__(self):
+        self.memoria_inicio = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self.inicio
+        memoria = None
+        if self.memoria_inicio is not None and tracemalloc.is_tracing():
+            memoria = tracemalloc.get_traced_memory()[0] - self.memoria_inicio
+        self.instrumentacao.registrar(self.nome, segundos, memoria)
+        return False
+
+
+class _Nulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class Instrumentacao:
+    """Cronômetros e contadores por etapa, acumulados no processo e por execução do painel
+
+    Cada etapa acumula execuções, tempo total e máximo (e variação de memória quando o
+    tracemalloc está ligado). Entre iniciar_execucao() e o fim do rerun, as medições da
+    thread atual também ficam em uma lista própria, exibida no painel de desenvolvimento.
+    """
+
+    def __init__(self, ativa=INSTRUMENTACAO_ATIVA):
+        self.ativa = ativa
+        self._etapas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.iniciado_em = time.time()
+
+    def etapa(self, nome):
+        """Context manager que mede o bloco: with instrumentacao.etapa('nlp.temas'): ..."""
+        return _Cronometro(self, nome) if self.ativa else _NULO
+
+    def cronometrar(self, nome):
+        """Decorador equivalente a etapa() para funções inteiras"""
+        def decorador(funcao):
+            def envolvida(*args, **kwargs):
+                with self.etapa(nome):
+                    return funcao(*args, **kwargs)
+            envolvida.__name__ = funcao.__name__
+            envolvida.__doc__ = funcao.__doc__
+            return envolvida
+        return decorador
+
+    def iterar(self, nome, iteravel):
+        """Repassa os itens de um iterável medindo o tempo de produzir cada um (ex.: nlp.pipe)"""
+        if not self.ativa:
+            yield from iteravel
+            return
+        iterador = iter(iteravel)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            self.registrar(nome, time.perf_counter() - inicio)
+            yield item
+
+    def registrar(self, nome, segundos, memoria=None):
+        with self._lock:
+            dados = self._etapas.get(nome)
+            if dados is None:
+                dados = self._etapas[nome] = {'execucoes': 0, 'segundos_total': 0.0, 'segundos_max': 0.0,
+                                              'memoria_bytes_total': 0}
+            dados['execucoes'] += 1
+            dados['segundos_total'] += segundos
+            dados['segundos_max'] = max(dados['segundos_max'], segundos)
+            if memoria is not None:
+                dados['memoria_bytes_total'] += memoria
+        execucao = getattr(self._local, 'execucao', None)
+        if execucao is not None:
+            execucao.append((nome, segundos, memoria))
+
+    def mesclar(self, etapas):
+        """Soma às etapas deste processo as medições exportadas por outro (ex.: processos de um pool)"""
+        with self._lock:
+            for nome, medicao in etapas.items():
+                dados = self._etapas.get(nome)
+                if dados is None:
+                    dados = self._etapas[nome] = {'execucoes': 0, 'segundos_total': 0.0, 'segundos_max': 0.0,
+                                                  'memoria_bytes_total': 0}
+                dados['execucoes'] += medicao['execucoes']
+                dados['segundos_total'] += medicao['segundos_total']
+                dados['segundos_max'] = max(dados['segundos_max'], medicao['segundos_max'])
+                dados['memoria_bytes_total'] += medicao['memoria_bytes_total']
+
+    def retirar_etapas(self):
+        """Etapas medidas desde a última retirada (zera as medições, para exportar só o que é novo)"""
+        with self._lock:
+            etapas = {nome: dict(dados) for nome, dados in self._etapas.items()}
+            self._etapas.clear()
+        return etapas
+
+    def contar(self, nome, quantidade=1):
+        if not self.ativa:
+            return
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + quantidade
+
+    def iniciar_execucao(self):
+        """Começa a lista de medições do rerun atual (por thread/sessão)"""
+        self._local.execucao = []
+        self._local.inicio = time.perf_counter()
+
+    def duracao_execucao(self):
+        """Segundos desde iniciar_execucao() na thread atual"""
+        inicio = getattr(self._local, 'inicio', None)
+        return 0.0 if inicio is None else time.perf_counter() - inicio
+
+    def execucao_atual(self):
+        """Medições do rerun atual agregadas por etapa: {etapa: (execuções, segundos, memória)}"""
+        agregado = {}
+        for nome, segundos, memoria in getattr(self._local, 'execucao', None) or []:
+            execucoes, total, memoria_total = agregado.get(nome, (0, 0.0, None))
+            if memoria is not None:
+                memoria_total = (memoria_total or 0) + memoria
+            agregado[nome] = (execucoes + 1, total + segundos, memoria_total)
+        return agregado
+
+    def rastrear_memoria(self, ligar=True):
+        """Liga ou desliga o tracemalloc (deixa o código mais lento enquanto ligado)"""
+        if ligar and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not ligar and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def maiores_alocacoes(n=10):
+        """Linhas de código com mais memória alocada no momento (requer tracemalloc ligado)"""
+        if not tracemalloc.is_tracing():
+            return []
+        estatisticas = tracemalloc.take_snapshot().statistics('lineno')[:n]
+        return [{'local': str(e.traceback), 'bytes': e.size, 'blocos': e.count} for e in estatisticas]
+
+    def exportar_json(self):
+        with self._lock:
+            etapas = {nome: dict(dados) for nome, dados in self._etapas.items()}
+            contadores = dict(self._contadores)
+        memoria = None
+        if tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            memoria = {'atual_bytes': atual, 'pico_bytes': pico}
+        return {'iniciado_em': self.iniciado_em, 'gerado_em': time.time(),
+                'etapas': etapas, 'contadores': contadores, 'memoria_rastreada': memoria}
+
+    def exportar_prometheus(self):
+        """Métricas no formato de texto do Prometheus"""
+        dados = self.exportar_json()
+
+        def rotulo(valor):
+            return str(valor).replace('\\', '\\\\').replace('"', '\\"')
+
+        linhas = []
+        metricas_etapa = [
+            ('etapa_execucoes_total', 'counter', 'execucoes', 'Execuções de cada etapa'),
+            ('etapa_segundos_total', 'counter', 'segundos_total', 'Tempo acumulado de cada etapa'),
+            ('etapa_segundos_max', 'gauge', 'segundos_max', 'Maior tempo de uma execução da etapa'),
+            ('etapa_memoria_bytes_total', 'gauge', 'memoria_bytes_total',
+             'Variação de memória acumulada da etapa (tracemalloc)')
+        ]
+        for nome, tipo, campo, descricao in metricas_etapa:
+            linhas.append(f"# HELP {PREFIXO_PROMETHEUS}_{nome} {descricao}")
+            linhas.append(f"# TYPE {PREFIXO_PROMETHEUS}_{nome} {tipo}")
+            for etapa, valores in sorted(dados['etapas'].items()):
+                linhas.append(f'{PREFIXO_PROMETHEUS}_{nome}{{etapa="{rotulo(etapa)}"}} {valores[campo]}')
+
+        linhas.append(f"# HELP {PREFIXO_PROMETHEUS}_contador_total Contadores de eventos")
+        linhas.append(f"# TYPE {PREFIXO_PROMETHEUS}_contador_total counter")
+        for nome, valor in sorted(dados['contadores'].items()):
+            linhas.append(f'{PREFIXO_PROMETHEUS}_contador_total{{nome="{rotulo(nome)}"}} {valor}')
+
+        if dados['memoria_rastreada'] is not None:
+            linhas.append(f"# HELP {PREFIXO_PROMETHEUS}_memoria_rastreada_bytes Memória rastreada pelo tracemalloc")
+            linhas.append(f"# TYPE {PREFIXO_PROMETHEUS}_memoria_rastreada_bytes gauge")
+            for tipo, valor in dados['memoria_rastreada'].items():
+                linhas.append(f'{PREFIXO_PROMETHEUS}_memoria_rastreada_bytes{{tipo="{tipo[:-6]}"}} {valor}')
+        return '\n'.join(linhas) + '\n'
+
+    def salvar(self, diretorio=None):
+        """Grava metricas.json e metricas.prom (em data/, por padrão); retorna os caminhos"""
+        caminho_json = os.path.join(diretorio, 'metricas.json') if diretorio else caminho_dados('metricas.json')
+        caminho_prom = os.path.join(os.path.dirname(caminho_json), 'metricas.prom')
+        with open(caminho_json, 'w', encoding='utf-8') as f:
+            json.dump(self.exportar_json(), f, indent=2, ensure_ascii=False)
+        with open(caminho_prom, 'w', encoding='utf-8') as f:
+            f.write(self.exportar_prometheus())
+        return caminho_json, caminho_prom
+
+    def limpar(self):
+        with self._lock:
+            self._etapas.clear()
+            self._contadores.clear()
+            self.iniciado_em = time.time()
+
+
+# Instância única por processo
+instrumentacao = Instrumentacao()
+
+if RASTREAR_MEMORIA:
+    instrumentacao.rastrear_memoria(True)
+
+
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+def servir_metricas(porta, host='127.0.0.1'):
+    """Sobe (uma vez por processo) o endpoint local com /metrics (Prometheus) e /metrics.json"""
+    global _servidor
+    with _lock_servidor:
+        if _servidor is not None:
+            return _servidor
+
+        class Manipulador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    corpo, tipo = instrumentacao.exportar_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    corpo, tipo = json.dumps(instrumentacao.exportar_json(), ensure_ascii=False), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                dados = corpo.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{tipo}; charset=utf-8')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _servidor = ThreadingHTTPServer((host, int(porta)), Manipulador)
+        except OSError as e:
+            print(f"Não foi possível abrir o endpoint de métricas na porta {porta}: {str(e)}")
+            return None
+        threading.Thread(target=_servidor.serve_forever, daemon=True, name='metricas').start()
+        print(f"Métricas disponíveis em http://{host}:{porta}/metrics")
+        return _servidor
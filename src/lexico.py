@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from utils import DIRETORIO_RECURSOS
+
+CAMINHO_LEXICO_PADRAO = os.path.join(DIRETORIO_RECURSOS, 'lexico_sentimento.json')
+
+# Razão mínima entre termos positivos e negativos para classificar o texto
+RAZAO_CLASSIFICACAO = 1.5
+
+
+class LexicoSentimento:
+    """Léxico de sentimento compilado em vetores NumPy para pontuar muitos textos de uma vez"""
+    
+    def __init__(self, termos):
+        """termos: dicionário termo -> {'polaridade': float, 'subjetividade': float}"""
+        vocabulario = sorted(termo.lower() for termo in termos)
+        termos = {termo.lower(): valores for termo, valores in termos.items()}
+        self.termos = termos
+        self._indice = pd.Index(vocabulario)
+        self._polaridade = np.array([termos[t]['polaridade'] for t in vocabulario], dtype=np.float64)
+        self._subjetividade = np.array([termos[t].get('subjetividade', 0.0) for t in vocabulario], dtype=np.float64)
+        # Uma única expressão compilada com limites de palavra: evita contar 'bom' dentro de
+        # 'bombom' ou 'falta' dentro de 'faltavam'; termos mais longos primeiro na alternância
+        alternativas = '|'.join(re.escape(t) for t in sorted(vocabulario, key=len, reverse=True))
+        self._padrao = re.compile(rf'(?<!\w)(?:{alternativas})(?!\w)' if vocabulario else r'(?!x)x')
+    
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_LEXICO_PADRAO):
+        """Carrega um léxico de um arquivo JSON no formato {'termos': {termo: {...}}}"""
+        with open(caminho, encoding='utf-8') as f:
+            return cls(json.load(f)['termos'])
+    
+    def impressao_digital(self):
+        """Hash do conteúdo do léxico (muda sempre que um termo ou peso muda)"""
+        conteudo = json.dumps(self.termos, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+    
+    def pontuar(self, textos):
+        """Pontua uma Series de textos em uma única passada vetorizada
+        
+        Retorna um DataFrame alinhado ao índice com sentimento, polaridade e subjetividade.
+        """
+        if not isinstance(textos, pd.Series):
+            textos = pd.Series(textos)
+        n = len(textos)
+        
+        # Só os termos do léxico são extraídos; o restante do texto é varrido pelo motor de regex
+        tokens = textos.fillna('').astype(str).str.lower().str.findall(self._padrao)
+        tamanhos = tokens.str.len().fillna(0).to_numpy(dtype=np.int64)
+        todos = [token for lista in tokens for token in lista]
+        
+        codigos = self._indice.get_indexer(todos) if todos else np.empty(0, dtype=np.int64)
+        linhas = np.repeat(np.arange(n), tamanhos)
+        encontrados = codigos >= 0
+        linhas, codigos = linhas[encontrados], codigos[encontrados]
+        
+        # Polaridade/subjetividade: média dos termos do léxico presentes (com repetição)
+        ocorrencias = np.bincount(linhas, minlength=n)
+        soma_pol = np.bincount(linhas, weights=self._polaridade[codigos], minlength=n)
+        soma_subj = np.bincount(linhas, weights=self._subjetividade[codigos], minlength=n)
+        com_termos = ocorrencias > 0
+        polaridade = np.divide(soma_pol, ocorrencias, out=np.zeros(n), where=com_termos)
+        subjetividade = np.divide(soma_subj, ocorrencias, out=np.zeros(n), where=com_termos)
+        
+        # Classe: termos distintos positivos vs. negativos em cada texto
+        tamanho_vocab = max(len(self._indice), 1)
+        pares = np.unique(linhas.astype(np.int64) * tamanho_vocab + codigos)
+        linhas_unicas, codigos_unicos = np.divmod(pares, tamanho_vocab)
+        pol_unicos = self._polaridade[codigos_unicos]
+        pos = np.bincount(linhas_unicas[pol_unicos > 0], minlength=n)
+        neg = np.bincount(linhas_unicas[pol_unicos < 0], minlength=n)
+        sentimento = np.select(
+            [pos > neg * RAZAO_CLASSIFICACAO, neg > pos * RAZAO_CLASSIFICACAO],
+            ['Positivo', 'Negativo'], default='Neutro')
+        
+        return pd.DataFrame({
+            'sentimento': sentimento,
+            'polaridade': polaridade,
+            'subjetividade': subjetividade
+        }, index=textos.index)
+
+
+@lru_cache(maxsize=None)
+def obter_lexico_padrao():
+    """Léxico padrão compartilhado pelo processo"""
+    return LexicoSentimento.carregar()
@@ -1,109 +1,42 @@
 import streamlit as st
-import folium
-from streamlit_folium import folium_static
 import pandas as pd
-import geopandas as gpd
-import plotly.express as px
 import numpy as np
+from motor_mapas import NIVEL_PADRAO, carregar_geocodigos, obter_motor_mapas
 
-def criar_mapa_evasao(df):
-    """Cria mapa interativo do Paraná com dados de evasão"""
-    # Dados geográficos simplificados do Paraná
-    parana_geojson = {
-        "type": "FeatureCollection",
-        "features": [
-            {
-                "type": "Feature",
-                "properties": {"name": "Curitiba"},
-                "geometry": {"type": "Point", "coordinates": [-49.25, -25.42]}
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Londrina"},
-                "geometry": {"type": "Point", "coordinates": [-51.16, -23.31]}
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Maringá"},
-                "geometry": {"type": "Point", "coordinates": [-51.93, -23.42]}
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Apucarana"},
-                "geometry": {"type": "Point", "coordinates": [-51.46, -23.55]}
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Ponta Grossa"},
-                "geometry": {"type": "Point", "coordinates": [-50.16, -25.09]}
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Cascavel"},
-                "geometry": {"type": "Point", "coordinates": [-53.45, -24.96]}
-            }
-        ]
-    }
+def agregar_por_regiao(df):
+    """Total de entrevistas, taxa de evasão e polaridade média por região"""
+    agrupado = df.assign(evadido=(df['situacao'] == 'Evadido')).groupby('regiao', observed=True)
+    dados_regiao = agrupado.agg(
+        total_entrevistas=('evadido', 'size'),
+        taxa_evasao=('evadido', 'mean'),
+        sentimento_medio=('polaridade', 'mean'))
+    dados_regiao.index = dados_regiao.index.astype(str)
+    return dados_regiao.rename_axis('regiao').reset_index()
+
+def criar_mapa_evasao(df, dados_regiao=None, nivel=NIVEL_PADRAO):
+    """Cria mapa interativo do Paraná com dados de evasão
     
-    # Agregar dados por região
-    if not df.empty:
-        dados_regiao = df.groupby('regiao').agg({
-            'id': 'count',
-            'situacao': lambda x: (x == 'Evadido').mean(),
-            'polaridade': 'mean'
-        }).reset_index()
-        
-        dados_regiao.columns = ['regiao', 'total_entrevistas', 'taxa_evasao', 'sentimento_medio']
-        
-        # Criar mapa Plotly
-        fig = px.scatter_geo(
-            dados_regiao,
-            lat=[-25.42, -23.31, -23.42, -23.55, -25.09, -24.96],  # Coordenadas aproximadas
-            lon=[-49.25, -51.16, -51.93, -51.46, -50.16, -53.45],
-            size='total_entrevistas',
-            color='taxa_evasao',
-            hover_name='regiao',
-            hover_data=['sentimento_medio'],
-            scope='south america',
-            title='Mapa de Evasão no Paraná',
-            color_continuous_scale='RdYlGn_r',  # Vermelho para alta evasão
-            projection='mercator'
-        )
-        
-        fig.update_geos(
-            visible=False, resolution=50,
-            showcountries=True, countrycolor="Black",
-            showsubunits=True, subunitcolor="Blue"
-        )
-        
-        fig.update_layout(
-            margin={"r":0,"t":40,"l":0,"b":0},
-            coloraxis_colorbar={
-                'title': 'Taxa de Evasão',
-                'tickformat': '.0%'
-            }
-        )
-        
-        return fig
-    else:
+    dados_regiao: agregado por região já calculado (por exemplo, a partir do cubo)
+    nivel: nível de zoom das geometrias municipais (ver motor_mapas.NIVEIS_ZOOM)
+    """
+    if df.empty:
         return mapa_simples_parana()
+    
+    if dados_regiao is None:
+        dados_regiao = agregar_por_regiao(df)
+    
+    # Coroplético municipal (ou pontos nas sedes) com os agregados juntados pelo nome da região
+    return obter_motor_mapas().figura(dados_regiao, nivel)
 
 def mapa_simples_parana():
     """Versão simplificada de fallback"""
-    m = folium.Map(location=[-24.5, -51.5], zoom_start=7)
+    import folium
     
-    cidades = {
-        "Curitiba": [-25.42, -49.25],
-        "Londrina": [-23.31, -51.16],
-        "Maringá": [-23.42, -51.93],
-        "Apucarana": [-23.55, -51.46],
-        "Ponta Grossa": [-25.09, -50.16],
-        "Cascavel": [-24.96, -53.45]
-    }
+    m = folium.Map(location=[-24.5, -51.5], zoom_start=7)
     
-    for cidade, coord in cidades.items():
+    for cidade, coord in carregar_geocodigos().iterrows():
         folium.Marker(
-            location=coord,
+            location=[coord['lat'], coord['lon']],
             popup=f"{cidade}",
             tooltip=f"Clique para detalhes de {cidade}"
         ).add_to(m)
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from utils import caminho_dados
+
+MODELO_PADRAO = "pt_core_news_sm"
+
+
+def marcador_modelo(nome):
+    return caminho_dados(f'.modelo_{os.path.basename(nome)}.json')
+
+
+def verificar_modelo(nome=MODELO_PADRAO):
+    """Confere se o modelo está instalado, registrando nome e versão num marcador em data/
+
+    A conferência só é refeita quando a versão instalada muda. Retorna a versão (None se o
+    modelo não está instalado); nunca baixa nada: a instalação é feita fora do painel
+    (python modelo_nlp.py --instalar, chamado pelo setup.sh).
+    """
+    from spacy.util import get_package_version
+
+    # Diretório de modelo em vez de pacote: não há versão de pacote a conferir
+    if os.path.isdir(nome):
+        return ''
+    versao = get_package_version(nome)
+    marcador = marcador_modelo(nome)
+    esperado = {'modelo': nome, 'versao': versao}
+    if os.path.exists(marcador):
+        with open(marcador, encoding='utf-8') as f:
+            if json.load(f) == esperado:
+                return versao
+    # Versão nova ou modelo ausente: o estado conferido fica registrado
+    with open(marcador, 'w', encoding='utf-8') as f:
+        json.dump(esperado, f)
+    return versao
+
+
+def instalar_modelo(nome=MODELO_PADRAO):
+    """Baixa o modelo (fora do painel) e atualiza o marcador; retorna a versão instalada"""
+    subprocess.check_call([sys.executable, "-m", "spacy", "download", nome])
+    # Pacote recém-instalado: o cache de metadados deste processo ainda não o conhece
+    import importlib
+    importlib.invalidate_caches()
+    return verificar_modelo(nome)
+
+
+class RegistroModelos:
+    """Registro de modelos spaCy carregados uma única vez por processo e compartilhados entre sessões"""
+    
+    def __init__(self):
+        self._modelos = {}
+        self._status = {}
+        self._lock = threading.Lock()
+    
+    def obter(self, nome=MODELO_PADRAO):
+        """Retorna o modelo carregado (ou None se indisponível), carregando-o na primeira chamada"""
+        if nome in self._modelos:
+            return self._modelos[nome]
+        with self._lock:
+            # Outra sessão pode ter carregado enquanto aguardávamos o lock
+            if nome not in self._modelos:
+                self._modelos[nome] = self._carregar(nome)
+        return self._modelos[nome]
+    
+    def _carregar(self, nome):
+        """Carrega o modelo já instalado; modelo ausente vira erro no status (sem download aqui)"""
+        import spacy
+        
+        self._status[nome] = {'estado': 'carregando', 'inicio': time.time()}
+        inicio = time.perf_counter()
+        nlp = None
+        erro = None
+        if verificar_modelo(nome) is None:
+            erro = f"Modelo {nome} não instalado: execute python modelo_nlp.py --instalar"
+            print(erro)
+        else:
+            try:
+                nlp = spacy.load(nome)
+                print(f"Modelo {nome} carregado com sucesso!")
+            except Exception as e:
+                erro = f"Falha ao carregar o modelo {nome}: {str(e)}"
+                print(erro)
+        
+        if nlp is not None:
+            self._configurar_pipeline(nlp)
+        
+        self._status[nome] = {
+            'estado': 'carregado' if nlp is not None else 'indisponivel',
+            'tempo_carga': time.perf_counter() - inicio,
+            'carregado_em': time.time(),
+            'versao': nlp.meta.get('version', '') if nlp is not None else '',
+            'componentes': list(nlp.pipe_names) if nlp is not None else [],
+            'erro': erro if nlp is None else None
+        }
+        return nlp
+    
+    def _configurar_pipeline(self, nlp):
+        """Configura pipeline personalizado para análise educacional (uma vez por modelo)"""
+        if not nlp.has_pipe('sentencizer'):
+            nlp.add_pipe('sentencizer')
+    
+    def aquecer(self, nome=MODELO_PADRAO):
+        """Carrega o modelo e executa um documento curto para inicializar caches internos"""
+        nlp = self.obter(nome)
+        if nlp is not None:
+            nlp("Aquecimento do modelo de análise de entrevistas.")
+        return nlp is not None
+    
+    def aquecer_em_segundo_plano(self, nome=MODELO_PADRAO):
+        """Dispara o aquecimento sem bloquear quem chamou"""
+        if nome in self._modelos or self._status.get(nome, {}).get('estado') == 'carregando':
+            return
+        threading.Thread(target=self.aquecer, args=(nome,), daemon=True, name=f"aquecer-{nome}").start()
+    
+    def status(self, nome=MODELO_PADRAO):
+        """Estado atual do modelo: nao_carregado, carregando, carregado ou indisponivel"""
+        return dict(self._status.get(nome, {'estado': 'nao_carregado'}))
+
+
+# Instância única por processo
+registro_modelos = RegistroModelos()
+
+
+def obter_modelo(nome=MODELO_PADRAO):
+    return registro_modelos.obter(nome)
+
+
+# Instalação (setup.sh) e aquecimento explícito antes de subir o servidor: python modelo_nlp.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Instala, confere e aquece o modelo spaCy do painel")
+    parser.add_argument('--modelo', default=MODELO_PADRAO)
+    parser.add_argument('--instalar', action='store_true', help="Baixa o modelo se ainda não estiver instalado")
+    args = parser.parse_args()
+    
+    if args.instalar and verificar_modelo(args.modelo) is None:
+        print(f"Modelo {args.modelo} {instalar_modelo(args.modelo)} instalado")
+    ok = registro_modelos.aquecer(args.modelo)
+    print(registro_modelos.status(args.modelo))
+    sys.exit(0 if ok else 1)
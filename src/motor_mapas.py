@@ -0,0 +1,341 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from utils import DIRETORIO_RECURSOS, caminho_dados
+
+CAMINHO_GEOCODIGOS = os.path.join(DIRETORIO_RECURSOS, 'regioes_pr.json')
+
+# Malha municipal do Paraná (IBGE, código de UF 41); não acompanha o repositório:
+# python motor_mapas.py baixar
+CAMINHO_MALHA_MUNICIPIOS = os.path.join(DIRETORIO_RECURSOS, 'municipios_pr.geojson')
+URL_MALHA_MUNICIPIOS = ('https://servicodados.ibge.gov.br/api/v3/malhas/estados/41'
+                        '?formato=application/vnd.geo+json&intrarregiao=municipio&qualidade=maxima')
+CHAVE_MUNICIPIO = 'codarea'
+
+# Nível de zoom -> (tolerância da simplificação em graus, casas decimais das coordenadas)
+NIVEIS_ZOOM = {
+    'estado': (0.01, 2),
+    'regional': (0.003, 3),
+    'municipal': (0.0005, 4)
+}
+NIVEL_PADRAO = 'estado'
+# Versão bem grosseira, usada só no contorno cinza de todos os municípios
+NIVEL_CONTORNO = 'contorno'
+TOLERANCIA_CONTORNO = (0.03, 2)
+# Incrementar quando a simplificação mudar (invalida as geometrias guardadas em data/geometrias)
+VERSAO_SIMPLIFICACAO = 2
+
+
+@lru_cache(maxsize=1)
+def carregar_geocodigos(caminho=CAMINHO_GEOCODIGOS):
+    """Tabela região -> código IBGE, latitude e longitude (indexada pelo nome da região)"""
+    with open(caminho, encoding='utf-8') as f:
+        regioes = json.load(f)['regioes']
+    tabela = pd.DataFrame.from_dict(regioes, orient='index').rename_axis('regiao')
+    tabela['codigo_ibge'] = tabela['codigo_ibge'].astype(str)
+    return tabela
+
+
+def juntar_geocodigos(dados_regiao):
+    """Acrescenta código IBGE e coordenadas aos agregados por região (junção pela chave, não pela ordem)"""
+    dados = dados_regiao.assign(regiao=dados_regiao['regiao'].astype(str))
+    juntos = dados.merge(carregar_geocodigos().reset_index(), on='regiao', how='left')
+    sem_geocodigo = juntos.loc[juntos['codigo_ibge'].isna(), 'regiao'].tolist()
+    if sem_geocodigo:
+        print(f"Regiões sem geocodificação (fora do mapa): {', '.join(sem_geocodigo)}")
+    return juntos.dropna(subset=['codigo_ibge'])
+
+
+def _douglas_peucker(pontos, tolerancia):
+    """Máscara dos pontos mantidos pelo Douglas-Peucker iterativo (extremos sempre mantidos)"""
+    n = len(pontos)
+    manter = np.zeros(n, dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, n - 1)]
+    while pilha:
+        i, j = pilha.pop()
+        if j <= i + 1:
+            continue
+        trecho = pontos[i + 1:j]
+        inicio, direcao = pontos[i], pontos[j] - pontos[i]
+        norma = np.hypot(*direcao)
+        if norma == 0:
+            # Extremos coincidentes (anel ou arco fechado): distância até o ponto
+            distancias = np.hypot(*(trecho - inicio).T)
+        else:
+            distancias = np.abs(direcao[0] * (trecho[:, 1] - inicio[1])
+                                - direcao[1] * (trecho[:, 0] - inicio[0])) / norma
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            manter[i + 1 + k] = True
+            pilha.append((i, i + 1 + k))
+            pilha.append((i + 1 + k, j))
+    return manter
+
+
+def simplificar_anel(pontos, tolerancia):
+    """Douglas-Peucker iterativo sobre um anel fechado (array n x 2)"""
+    n = len(pontos)
+    if n <= 4:
+        return pontos
+    simplificado = pontos[_douglas_peucker(pontos, tolerancia)]
+    if len(simplificado) < 4:
+        # Anel precisa de ao menos 4 pontos (3 vértices + fechamento)
+        simplificado = pontos[[0, n // 3, 2 * n // 3, n - 1]]
+    return simplificado
+
+
+def _simplificar_arco(pontos, tolerancia):
+    """Douglas-Peucker de um arco entre dois nós (array n x 2, nós nas pontas)
+
+    Mantém ao menos um vértice interno (dois se o arco é fechado) para que os anéis
+    montados com ele não degenerem.
+    """
+    manter = _douglas_peucker(pontos, tolerancia)
+    n = len(pontos)
+    fechado = np.array_equal(pontos[0], pontos[-1])
+    if manter[1:-1].sum() < (2 if fechado else 1) and n > 2:
+        manter[[n // 3, 2 * n // 3] if fechado else [n // 2]] = True
+    return pontos[manter]
+
+
+def simplificar_aneis(aneis, tolerancia):
+    """Simplifica juntos anéis que compartilham fronteiras, sem abrir frestas nem sobreposições
+
+    Simplificado isoladamente, cada anel perde vértices diferentes da mesma fronteira
+    entre dois municípios. Aqui os anéis são cortados em arcos nos nós (vértices com
+    mais de dois vizinhos distintos: junções de três ou mais municípios e pontas de
+    trechos compartilhados); cada arco é simplificado uma única vez e reaproveitado,
+    invertido se preciso, por todos os anéis que o contêm. Anéis sem nós (ilhas,
+    buracos internos) são simplificados inteiros.
+
+    aneis: anéis fechados (arrays n x 2); retorna os simplificados na mesma ordem.
+    """
+    corpos = []
+    for anel in aneis:
+        pontos = np.asarray(anel, dtype=np.float64)
+        corpos.append(pontos[:-1] if len(pontos) > 1 and np.array_equal(pontos[0], pontos[-1]) else pontos)
+    tamanhos = np.array([len(corpo) for corpo in corpos], dtype=np.int64)
+    if not tamanhos.sum():
+        return [np.asarray(anel, dtype=np.float64) for anel in aneis]
+
+    # Identificador de cada vértice distinto e grau (vizinhos distintos em todos os anéis)
+    _, ids = np.unique(np.concatenate(corpos), axis=0, return_inverse=True)
+    ids = ids.ravel()
+    inicios = np.r_[0, np.cumsum(tamanhos)[:-1]]
+    base = np.repeat(inicios, tamanhos)
+    seguinte = ids[base + (np.arange(len(ids)) - base + 1) % np.repeat(tamanhos, tamanhos)]
+    pares = np.unique(np.c_[np.r_[ids, seguinte], np.r_[seguinte, ids]], axis=0)
+    no = np.bincount(pares[:, 0], minlength=ids.max() + 1) != 2
+
+    arcos = {}
+    resultado = []
+    for corpo, inicio in zip(corpos, inicios):
+        n = len(corpo)
+        ids_anel = ids[inicio:inicio + n]
+        nos = np.flatnonzero(no[ids_anel])
+        if n <= 3 or not len(nos):
+            resultado.append(simplificar_anel(np.vstack([corpo, corpo[:1]]), tolerancia))
+            continue
+        # Anel girado para começar num nó; cada arco vai de um nó ao seguinte (inclusive)
+        ordem = np.roll(np.arange(n), -nos[0])
+        ordem = np.r_[ordem, ordem[0]]
+        limites = np.r_[nos - nos[0], n]
+        partes = []
+        for a, b in zip(limites[:-1], limites[1:]):
+            indices = ordem[a:b + 1]
+            chave = tuple(ids_anel[indices].tolist())
+            # Mesma fronteira percorrida nos dois sentidos: uma só orientação canônica
+            invertido = chave[::-1] < chave
+            if invertido:
+                chave, indices = chave[::-1], indices[::-1]
+            if chave not in arcos:
+                arcos[chave] = _simplificar_arco(corpo[indices], tolerancia)
+            arco = arcos[chave][::-1] if invertido else arcos[chave]
+            partes.append(arco[:-1])
+        simplificado = np.vstack(partes + [partes[0][:1]])
+        resultado.append(simplificado if len(simplificado) >= 4 else np.vstack([corpo, corpo[:1]]))
+    return resultado
+
+
+def _arredondar_anel(pontos, casas):
+    pontos = np.round(pontos, casas)
+    # Arredondar pode repetir vértices consecutivos
+    repetidos = np.r_[False, np.all(pontos[1:] == pontos[:-1], axis=1)]
+    return pontos[~repetidos].tolist()
+
+
+def simplificar_geojson(geojson, tolerancia, casas, chave=CHAVE_MUNICIPIO):
+    """Nova FeatureCollection simplificada, com coordenadas arredondadas e só a propriedade-chave
+
+    Os anéis de todas as feições são simplificados juntos (simplificar_aneis), então
+    municípios vizinhos continuam com a mesma fronteira.
+    """
+    feicoes = []
+    for feature in geojson['features']:
+        geometria = feature['geometry']
+        if geometria['type'] == 'Polygon':
+            poligonos = [geometria['coordinates']]
+        elif geometria['type'] == 'MultiPolygon':
+            poligonos = geometria['coordinates']
+        else:
+            continue
+        feicoes.append((feature, poligonos))
+
+    simplificados = iter(simplificar_aneis(
+        [anel for _, poligonos in feicoes for poligono in poligonos for anel in poligono], tolerancia))
+    features = []
+    for feature, poligonos in feicoes:
+        coordenadas = [[_arredondar_anel(next(simplificados), casas) for _ in poligono] for poligono in poligonos]
+        tipo = feature['geometry']['type']
+        features.append({
+            'type': 'Feature',
+            'properties': {chave: str(feature['properties'][chave])},
+            'geometry': {'type': tipo, 'coordinates': coordenadas[0] if tipo == 'Polygon' else coordenadas}
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+class MotorMapas:
+    """Geometrias municipais simplificadas uma vez por nível de zoom e guardadas em data/geometrias
+
+    O arquivo gerado leva no nome o hash da malha original, então trocar a malha
+    invalida as versões simplificadas.
+    """
+
+    def __init__(self, caminho_malha=CAMINHO_MALHA_MUNICIPIOS, chave=CHAVE_MUNICIPIO):
+        self.caminho_malha = caminho_malha
+        self.chave = chave
+        self._geometrias = {}
+        self._lock = threading.Lock()
+
+    def malha_disponivel(self):
+        return os.path.exists(self.caminho_malha)
+
+    def _hash_malha(self):
+        sha = hashlib.sha256()
+        with open(self.caminho_malha, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloco)
+        return sha.hexdigest()[:12]
+
+    def caminho_simplificado(self, nivel):
+        nome = os.path.splitext(os.path.basename(self.caminho_malha))[0]
+        return caminho_dados('geometrias', f"{nome}_{nivel}_v{VERSAO_SIMPLIFICACAO}_{self._hash_malha()}.geojson")
+
+    def geometria(self, nivel=NIVEL_PADRAO):
+        """FeatureCollection simplificada do nível (memória -> disco -> simplificação)"""
+        if nivel not in NIVEIS_ZOOM and nivel != NIVEL_CONTORNO:
+            raise ValueError(f"Nível de zoom desconhecido: {nivel} (opções: {', '.join(NIVEIS_ZOOM)})")
+        if nivel in self._geometrias:
+            return self._geometrias[nivel]
+        with self._lock:
+            if nivel not in self._geometrias:
+                self._geometrias[nivel] = self._carregar_ou_simplificar(nivel)
+        return self._geometrias[nivel]
+
+    def _carregar_ou_simplificar(self, nivel):
+        caminho = self.caminho_simplificado(nivel)
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as f:
+                return json.load(f)
+
+        with open(self.caminho_malha, encoding='utf-8') as f:
+            malha = json.load(f)
+        tolerancia, casas = TOLERANCIA_CONTORNO if nivel == NIVEL_CONTORNO else NIVEIS_ZOOM[nivel]
+        simplificada = simplificar_geojson(malha, tolerancia, casas, self.chave)
+
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(simplificada, f, separators=(',', ':'))
+        os.replace(temporario, caminho)
+        return simplificada
+
+    def figura(self, dados_regiao, nivel=NIVEL_PADRAO, contorno=True):
+        """Coroplético municipal (se houver malha) ou pontos nas sedes, com agregados juntados pela chave
+
+        contorno: desenha todos os municípios em cinza (versão grosseira) para situar o mapa
+        """
+        import plotly.graph_objects as go
+
+        dados = juntar_geocodigos(dados_regiao)
+        hover = ('<b>%{customdata[0]}</b><br>Entrevistas: %{customdata[1]}'
+                 '<br>Taxa de evasão: %{customdata[2]:.0%}<br>Polaridade média: %{customdata[3]:.2f}<extra></extra>')
+        customdata = dados[['regiao', 'total_entrevistas', 'taxa_evasao', 'sentimento_medio']].to_numpy()
+        colorbar = {'title': 'Taxa de Evasão', 'tickformat': '.0%'}
+
+        fig = go.Figure()
+        if self.malha_disponivel():
+            geojson = self.geometria(nivel)
+            if contorno:
+                fundo = self.geometria(NIVEL_CONTORNO)
+                codigos = [f['properties'][self.chave] for f in fundo['features']]
+                fig.add_trace(go.Choropleth(
+                    geojson=fundo, featureidkey=f'properties.{self.chave}', locations=codigos,
+                    z=np.zeros(len(codigos)), colorscale=[[0, '#eeeeee'], [1, '#eeeeee']],
+                    showscale=False, marker_line_color='#bbbbbb', marker_line_width=0.3, hoverinfo='skip'))
+            # Só os municípios com entrevistas no nível de detalhe pedido
+            com_dados = set(dados['codigo_ibge'])
+            geojson = {'type': 'FeatureCollection',
+                       'features': [f for f in geojson['features'] if f['properties'][self.chave] in com_dados]}
+            fig.add_trace(go.Choropleth(
+                geojson=geojson, featureidkey=f'properties.{self.chave}', locations=dados['codigo_ibge'],
+                z=dados['taxa_evasao'], customdata=customdata, hovertemplate=hover,
+                colorscale='RdYlGn_r', colorbar=colorbar, marker_line_width=0.5))
+            fig.update_geos(fitbounds='geojson', visible=False)
+        else:
+            tamanho = dados['total_entrevistas'] / max(dados['total_entrevistas'].max(), 1)
+            fig.add_trace(go.Scattergeo(
+                lat=dados['lat'], lon=dados['lon'], customdata=customdata, hovertemplate=hover,
+                marker={'size': 10 + 30 * np.sqrt(tamanho), 'color': dados['taxa_evasao'],
+                        'colorscale': 'RdYlGn_r', 'colorbar': colorbar, 'sizemode': 'diameter'}))
+            fig.update_geos(fitbounds='locations', visible=False, resolution=50,
+                            showcountries=True, countrycolor='Black')
+
+        fig.update_layout(title='Mapa de Evasão no Paraná', margin={'r': 0, 't': 40, 'l': 0, 'b': 0})
+        return fig
+
+
+_motor = None
+
+
+def obter_motor_mapas():
+    """Motor de mapas compartilhado pelo processo"""
+    global _motor
+    if _motor is None:
+        _motor = MotorMapas()
+    return _motor
+
+
+def baixar_malha(url=URL_MALHA_MUNICIPIOS, caminho=CAMINHO_MALHA_MUNICIPIOS):
+    """Baixa a malha municipal do Paraná da API de malhas do IBGE"""
+    from urllib.request import urlopen
+    with urlopen(url, timeout=120) as resposta:
+        conteudo = resposta.read()
+    json.loads(conteudo)  # valida antes de substituir a malha existente
+    with open(caminho, 'wb') as f:
+        f.write(conteudo)
+    print(f"Malha salva em {caminho} ({len(conteudo) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Malha municipal do Paraná para o mapa de evasão")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('baixar', help="Baixa a malha municipal do IBGE para src/recursos")
+    sub.add_parser('simplificar', help="Gera as geometrias simplificadas de todos os níveis de zoom")
+    args = parser.parse_args()
+
+    if args.comando == 'baixar':
+        baixar_malha()
+    else:
+        motor = obter_motor_mapas()
+        for nivel in [NIVEL_CONTORNO] + list(NIVEIS_ZOOM):
+            geometria = motor.geometria(nivel)
+            tamanho = os.path.getsize(motor.caminho_simplificado(nivel))
+            print(f"{nivel:<10} {len(geometria['features'])} municípios, {tamanho / 1024:.0f} KB")
@@ -0,0 +1,110 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Colunas exibidas na listagem paginada
+COLUNAS_LISTAGEM = ['id', 'regiao', 'curso', 'situacao', 'sentimento', 'idade', 'polaridade']
+
+# Colunas pesadas: só carregadas para a página visível / entrevista aberta
+COLUNAS_SOB_DEMANDA = ['texto', 'frases_chave', 'entidades', 'temas']
+
+TAMANHO_PREVIA = 120
+
+
+class NavegadorEntrevistas:
+    """Navegação por entrevistas sobre um FrameCompacto: índice id -> posição,
+    ordenação em cache e carregamento tardio do conteúdo da página visível
+
+    carregar: função (ids, colunas) -> DataFrame indexado pelo id, usada para as colunas
+    que não estão no frame (ex.: texto lido das partes Parquet só para a página visível)
+    """
+
+    def __init__(self, frame, coluna_id='id', tamanho_cache=16, carregar=None):
+        self.frame = frame
+        self.coluna_id = coluna_id
+        self.tamanho_cache = tamanho_cache
+        self.carregar = carregar
+        self._cache = OrderedDict()
+
+        ids = frame.tabela[coluna_id].to_numpy()
+        self._ordem_ids = np.argsort(ids, kind='stable')
+        self._ids_ordenados = ids[self._ordem_ids]
+
+    def __len__(self):
+        return len(self.frame)
+
+    def posicao_do_id(self, id_entrevista):
+        """Posição da entrevista na tabela (busca binária) ou None se o id não existir"""
+        try:
+            id_entrevista = self._ids_ordenados.dtype.type(id_entrevista)
+        except (TypeError, ValueError):
+            return None
+        i = np.searchsorted(self._ids_ordenados, id_entrevista)
+        if i < len(self._ids_ordenados) and self._ids_ordenados[i] == id_entrevista:
+            return int(self._ordem_ids[i])
+        return None
+
+    def ordenacao(self, posicoes=None, coluna='id', ascendente=True):
+        """Posições do recorte na ordem pedida (resultado guardado em cache LRU)"""
+        if posicoes is None:
+            posicoes = np.arange(len(self.frame))
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        chave = (hashlib.blake2b(posicoes.tobytes(), digest_size=16).hexdigest(), coluna, ascendente)
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            return self._cache[chave]
+
+        valores = self.frame.tabela[coluna].iloc[posicoes]
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            valores = valores.cat.codes
+        valores = valores.to_numpy()
+        if ascendente:
+            ordem = np.argsort(valores, kind='stable')
+        else:
+            # Ordena a sequência invertida e desfaz a inversão: decrescente e estável nos empates
+            ordem = (len(valores) - 1 - np.argsort(valores[::-1], kind='stable'))[::-1]
+        ordenadas = posicoes[ordem]
+        ordenadas.setflags(write=False)
+
+        self._cache[chave] = ordenadas
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+        return ordenadas
+
+    @staticmethod
+    def numero_paginas(total, tamanho_pagina):
+        return max(1, -(-total // tamanho_pagina))
+
+    def pagina_da_posicao(self, ordenadas, posicao, tamanho_pagina):
+        """Página (a partir de 1) em que a posição aparece na ordenação, ou None fora do recorte"""
+        onde = np.flatnonzero(ordenadas == posicao)
+        if len(onde) == 0:
+            return None
+        return int(onde[0]) // tamanho_pagina + 1
+
+    def pagina(self, ordenadas, numero, tamanho_pagina, colunas=COLUNAS_LISTAGEM):
+        """Linhas da página pedida, com a prévia do texto carregada só para elas"""
+        inicio = (numero - 1) * tamanho_pagina
+        posicoes = ordenadas[inicio:inicio + tamanho_pagina]
+        colunas = [c for c in colunas if c in self.frame.tabela.columns]
+        pagina = self.frame.tabela[colunas].iloc[posicoes].copy()
+        textos = None
+        if 'texto' in self.frame.tabela.columns:
+            textos = self.frame.tabela['texto'].iloc[posicoes].astype(str)
+        elif self.carregar is not None and len(posicoes):
+            ids = self.frame.tabela[self.coluna_id].iloc[posicoes]
+            textos = self.carregar(ids.tolist(), ['texto'])['texto'].reindex(ids).astype(str)
+            textos.index = pagina.index
+        if textos is not None:
+            pagina['texto'] = textos.where(textos.str.len() <= TAMANHO_PREVIA,
+                                           textos.str.slice(0, TAMANHO_PREVIA) + '...')
+        return pagina.set_index(pd.Index(posicoes, name='posicao'))
+
+    def detalhe(self, posicao):
+        """Todas as colunas de uma entrevista, incluindo listas e texto completo"""
+        linha = self.frame.para_dataframe([posicao]).iloc[0]
+        if self.carregar is None:
+            return linha
+        restante = self.carregar([linha[self.coluna_id]], None).iloc[0]
+        return pd.concat([linha, restante.drop(linha.index, errors='ignore')])
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from utils import MODULOS_PESADOS
+
+# Orçamento de tempo de importação (ms) de cada módulo do painel
+# (todos os importados pelo app.py, direta ou indiretamente; os que dependem do pandas
+# pagam o custo da importação dele)
+ORCAMENTO_MS = {
+    'utils': 50,
+    'instrumentacao': 150,
+    'modelo_nlp': 150,
+    'vocabulario_dominio': 150,
+    'lexico': 1000,
+    'data_processing': 1000,
+    'armazem_anotacoes': 1000,
+    'filtros': 1000,
+    'colunar': 1000,
+    'cubo': 1000,
+    'conjunto_dados': 1000,
+    'navegador_entrevistas': 1000,
+    'indice_textual': 1000,
+    'ingestao': 1000,
+    'artefatos': 1000,
+    'servico_topicos': 1000,
+    'frases_chave': 1000,
+    'trabalhador_processamento': 1000,
+    'gerador_entrevistas': 2000,
+    'visualization': 3000,
+    'mapa_interativo': 3000
+}
+
+# Módulos pesados que NÃO podem ser importados junto com os módulos do painel
+# (matplotlib fica de fora: o próprio streamlit já o importa; o Faker só serve ao gerador de dados)
+PROIBIDOS = [m for m in MODULOS_PESADOS if m != 'matplotlib'] + ['geopandas', 'faker']
+
+SCRIPT_MEDICAO = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+tempo = (time.perf_counter() - inicio) * 1000
+carregados = [m for m in {proibidos!r} if m in sys.modules]
+print(json.dumps({{'tempo_ms': tempo, 'pesados': carregados}}))
+"""
+
+
+def medir_importacao(modulo, repeticoes=3):
+    """Mede o tempo de importação em um processo novo (menor de N execuções)"""
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    medicoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', SCRIPT_MEDICAO.format(modulo=modulo, proibidos=PROIBIDOS)],
+            cwd=diretorio, capture_output=True, text=True)
+        if saida.returncode != 0:
+            erro = saida.stderr.strip().splitlines()[-1] if saida.stderr.strip() else 'falha na importação'
+            return {'tempo_ms': float('inf'), 'pesados': [], 'erro': erro}
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return min(medicoes, key=lambda m: m['tempo_ms'])
+
+
+def verificar_orcamento(fator=1.0, repeticoes=3):
+    """Retorna o relatório de cada módulo e se todos ficaram dentro do orçamento"""
+    relatorio = {}
+    ok = True
+    for modulo, limite in ORCAMENTO_MS.items():
+        medicao = medir_importacao(modulo, repeticoes)
+        dentro = medicao['tempo_ms'] <= limite * fator and not medicao['pesados']
+        ok = ok and dentro
+        relatorio[modulo] = {**medicao, 'limite_ms': limite * fator, 'ok': dentro}
+    return relatorio, ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica o orçamento de tempo de importação do painel")
+    parser.add_argument('--fator', type=float, default=1.0, help="Multiplicador dos limites (máquinas lentas)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--json', help="Arquivo para salvar o relatório")
+    args = parser.parse_args()
+    
+    relatorio, ok = verificar_orcamento(args.fator, args.repeticoes)
+    for modulo, r in relatorio.items():
+        marca = 'OK ' if r['ok'] else 'ERRO'
+        pesados = f" (importou: {', '.join(r['pesados'])})" if r['pesados'] else ''
+        if r.get('erro'):
+            pesados = f" ({r['erro']})"
+        print(f"[{marca}] {modulo:<20} {r['tempo_ms']:8.1f} ms / {r['limite_ms']:.0f} ms{pesados}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2)
+    sys.exit(0 if ok else 1)
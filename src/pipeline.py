@@ -0,0 +1,292 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+
+from artefatos import (DIRETORIO_ARTEFATOS, DIRETORIO_PARTES, ARQUIVO_CUBO, ARQUIVO_INDICE_TEXTUAL,
+                       ARQUIVO_FRASES_CHAVE, ARQUIVO_MODELO_TOPICOS, COLUNAS_DICIONARIO, gravar_parte, gravar_cubo, publicar_execucao,
+                       substituir_coluna, vincular_parte)
+from cubo import CuboAgregado, DIMENSOES, MEDIDAS
+from data_processing import PERFIL_PADRAO, PERFIS_ANALISE
+from ingestao import Ingestao
+from instrumentacao import instrumentacao
+
+TAMANHO_BLOCO_PADRAO = 1000
+ARQUIVO_CHECKPOINT = 'checkpoint.json'
+_PADRAO_PARTE = re.compile(r'^parte-(\d{5})\.parquet$')
+
+# Processador de cada processo do pool (herdado do processo principal quando o pool usa fork)
+_processor = None
+_armazem = None
+_em_pool = False
+
+
+def nome_parte(indice):
+    return f"parte-{indice:05d}.parquet"
+
+
+def blocos_entrada(args, data_referencia):
+    """Blocos da entrada (arquivo validado pela Ingestao ou dados gerados) com índice global contínuo"""
+    if args.entrada:
+        yield from args.ingestao
+        return
+
+    from gerador_entrevistas import GeradorEntrevistas
+    inicio = 0
+    for bloco in GeradorEntrevistas(args.gerar, seed=args.seed).gerar_em_lotes(
+            args.gerar, args.chunk_size, data_referencia=data_referencia):
+        bloco.index = pd.RangeIndex(inicio, inicio + len(bloco))
+        inicio += len(bloco)
+        yield bloco
+
+
+def configuracao(args, versao_pipeline):
+    """Tudo que determina o resultado; a mesma configuração retoma os blocos já gravados"""
+    if args.entrada:
+        info = os.stat(args.entrada)
+        fonte = {'entrada': os.path.abspath(args.entrada), 'tamanho': info.st_size, 'modificado': info.st_mtime}
+    else:
+        fonte = {'gerar': args.gerar, 'seed': args.seed}
+    return {'fonte': fonte, 'tamanho_bloco': args.chunk_size, 'perfil': args.perfil,
+            'versao_pipeline': versao_pipeline}
+
+
+def _inicializar_processo(perfil, em_pool=False):
+    global _processor, _armazem, _em_pool
+    from armazem_anotacoes import ArmazemAnotacoes
+    from data_processing import EntrevistaProcessor
+    if _processor is None or _processor.perfil != perfil:
+        _processor = EntrevistaProcessor(perfil=perfil)
+    _armazem = ArmazemAnotacoes()
+    _em_pool = em_pool
+    if em_pool:
+        # Medições herdadas do processo principal (fork) não são deste processo
+        instrumentacao.retirar_etapas()
+
+
+def _processar_bloco(indice, bloco, caminho, batch_size):
+    """Processa um bloco (reaproveitando o armazém de anotações) e grava sua parte Parquet
+
+    Num processo do pool, devolve também as etapas medidas no bloco (nlp.*, anotações...),
+    que o processo principal soma às suas; fora do pool elas já estão na instância principal.
+    """
+    inicio = time.perf_counter()
+    processado = _armazem.anotar(bloco, _processor, batch_size=batch_size)
+    linhas = gravar_parte(processado, caminho)
+    etapas = instrumentacao.retirar_etapas() if _em_pool else {}
+    return indice, linhas, time.perf_counter() - inicio, etapas
+
+
+class Checkpoint:
+    """Estado de uma execução: configuração, data de referência e blocos concluídos
+
+    Uma parte Parquet só existe depois de gravada por inteiro, então os arquivos
+    presentes no diretório são a fonte de verdade sobre o que já foi processado.
+    """
+
+    def __init__(self, diretorio, config, recomecar=False):
+        self.diretorio = diretorio
+        self.diretorio_partes = os.path.join(diretorio, DIRETORIO_PARTES)
+        self.caminho = os.path.join(diretorio, ARQUIVO_CHECKPOINT)
+        os.makedirs(self.diretorio_partes, exist_ok=True)
+
+        estado = None
+        if not recomecar and os.path.exists(self.caminho):
+            with open(self.caminho, encoding='utf-8') as f:
+                estado = json.load(f)
+        if estado is None or estado.get('configuracao') != config:
+            for nome in os.listdir(self.diretorio_partes):
+                os.remove(os.path.join(self.diretorio_partes, nome))
+            estado = {'configuracao': config, 'data_referencia': datetime.date.today().isoformat(),
+                      'iniciado_em': time.time(), 'blocos': {}}
+        self.estado = estado
+        self.salvar()
+
+    def concluidos(self):
+        return {int(m.group(1)) for m in map(_PADRAO_PARTE.match, os.listdir(self.diretorio_partes)) if m}
+
+    def caminho_parte(self, indice):
+        return os.path.join(self.diretorio_partes, nome_parte(indice))
+
+    def registrar(self, indice, linhas, segundos):
+        self.estado['blocos'][str(indice)] = {'linhas': linhas, 'segundos': round(segundos, 3)}
+        self.salvar()
+
+    def salvar(self):
+        with open(f"{self.caminho}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=2, ensure_ascii=False)
+        os.replace(f"{self.caminho}.tmp", self.caminho)
+
+
+def processar(args, checkpoint):
+    """Etapa de NLP: blocos pendentes distribuídos entre os processos, no máximo 2 por processo em voo"""
+    concluidos = checkpoint.concluidos()
+    data_referencia = datetime.date.fromisoformat(checkpoint.estado['data_referencia'])
+    total = len(concluidos)
+    inicio = time.perf_counter()
+
+    def registrar(indice, linhas, segundos, etapas):
+        nonlocal total
+        total += 1
+        instrumentacao.mesclar(etapas)
+        checkpoint.registrar(indice, linhas, segundos)
+        print(f"Bloco {indice} concluído: {linhas} entrevistas em {segundos:.1f}s "
+              f"({total} blocos, {time.perf_counter() - inicio:.0f}s)")
+
+    pendentes_entrada = ((i, bloco) for i, bloco in enumerate(blocos_entrada(args, data_referencia))
+                         if i not in concluidos)
+    if concluidos:
+        print(f"Retomando: {len(concluidos)} blocos já processados")
+
+    if args.workers <= 1:
+        _inicializar_processo(args.perfil)
+        for indice, bloco in pendentes_entrada:
+            registrar(*_processar_bloco(indice, bloco, checkpoint.caminho_parte(indice), args.batch_size))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_inicializar_processo,
+                                 initargs=(args.perfil, True)) as executor:
+            em_voo = set()
+            for indice, bloco in pendentes_entrada:
+                if len(em_voo) >= 2 * args.workers:
+                    prontos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registrar(*futuro.result())
+                em_voo.add(executor.submit(_processar_bloco, indice, bloco,
+                                           checkpoint.caminho_parte(indice), args.batch_size))
+            for futuro in wait(em_voo).done:
+                registrar(*futuro.result())
+    return sorted(checkpoint.concluidos())
+
+
+def ranquear_frases(checkpoint, partes, destino, regravar=True):
+    """Frases-chave por TF-IDF do corpus inteiro; as partes vão para a execução em destino
+
+    Com regravar (perfis que preenchem frases-chave), cada parte é gravada em destino já
+    com as frases ranqueadas; senão, é só vinculada. As partes do checkpoint não mudam.
+    """
+    import pyarrow.parquet as pq
+    from frases_chave import MotorFrasesChave
+
+    caminhos = [checkpoint.caminho_parte(i) for i in partes]
+    destinos = [os.path.join(destino, DIRETORIO_PARTES, nome_parte(i)) for i in partes]
+    textos = pq.read_table(caminhos, columns=['texto']).column('texto').to_pandas()
+    motor, frases = MotorFrasesChave.ranquear_corpus(textos)
+    del textos
+    motor.salvar(os.path.join(destino, ARQUIVO_FRASES_CHAVE))
+    if not regravar:
+        for caminho, caminho_destino in zip(caminhos, destinos):
+            vincular_parte(caminho, caminho_destino)
+        return motor
+
+    # Partes na mesma ordem da leitura: cada uma recebe a sua fatia das listas
+    inicio = 0
+    for caminho, caminho_destino in zip(caminhos, destinos):
+        fim = inicio + pq.ParquetFile(caminho).metadata.num_rows
+        substituir_coluna(caminho, 'frases_chave', frases[inicio:fim], caminho_destino)
+        inicio = fim
+    return motor
+
+
+def agregar(checkpoint, partes, destino):
+    """Etapa de agregação: cubo, índice textual, modelo de tópicos e frases-chave a partir das partes
+
+    Tudo é gravado em destino, um diretório novo: a execução publicada nunca é alterada no lugar.
+    """
+    import pyarrow.parquet as pq
+    caminhos = [checkpoint.caminho_parte(i) for i in partes]
+    os.makedirs(os.path.join(destino, DIRETORIO_PARTES), exist_ok=True)
+
+    with instrumentacao.etapa('pipeline.cubo'):
+        colunas = DIMENSOES + MEDIDAS
+        tabela = pq.read_table(caminhos, columns=colunas, read_dictionary=[c for c in colunas
+                                                                             if c in COLUNAS_DICIONARIO])
+        cubo = CuboAgregado(tabela.to_pandas())
+        gravar_cubo(cubo, os.path.join(destino, ARQUIVO_CUBO))
+        del tabela
+    print(f"Cubo agregado: {len(cubo)} células")
+
+    tokens = pq.read_table(caminhos, columns=['tokens_limpos']).column('tokens_limpos').to_pandas()
+    with instrumentacao.etapa('pipeline.indice_textual'):
+        from indice_textual import obter_indice_textual
+        indice = obter_indice_textual(tokens, os.path.join(destino, ARQUIVO_INDICE_TEXTUAL))
+    print(f"Índice textual: {len(indice.termos)} termos")
+
+    with instrumentacao.etapa('pipeline.topicos'):
+        try:
+            # Ajuste completo guardado com a execução: o modelo corresponde exatamente a estas partes
+            from servico_topicos import ServicoTopicos
+            ServicoTopicos(caminho=os.path.join(destino, ARQUIVO_MODELO_TOPICOS)).ajustar(tokens)
+            print("Modelo de tópicos ajustado")
+        except Exception as e:
+            print(f"Modelo de tópicos indisponível: {str(e)}")
+
+    with instrumentacao.etapa('pipeline.frases_chave'):
+        motor = ranquear_frases(checkpoint, partes, destino, _processor.frases_chave)
+    print(f"Frases-chave ranqueadas: {len(motor.termos)} n-gramas no vocabulário")
+    return cubo
+
+
+def executar(args):
+    import pyarrow.parquet as pq
+
+    os.makedirs(args.saida, exist_ok=True)
+    # Esquema verificado antes de carregar o modelo: arquivo errado falha na hora
+    args.ingestao = Ingestao(args.entrada, args.chunk_size) if args.entrada else None
+    if args.ingestao is not None:
+        args.ingestao.verificar_esquema()
+    # O modelo carregado aqui é compartilhado com os processos do pool (fork)
+    _inicializar_processo(args.perfil)
+    config = configuracao(args, _processor.versao_pipeline())
+    identificacao = 'execucao-' + hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+    checkpoint = Checkpoint(os.path.join(args.saida, identificacao), config, args.recomecar)
+    print(f"Execução {identificacao} ({args.workers} processos, blocos de {args.chunk_size})")
+
+    with instrumentacao.etapa('pipeline.processar'):
+        partes = processar(args, checkpoint)
+    if not partes:
+        raise SystemExit("Nenhuma entrevista na entrada")
+    # Cada publicação tem o seu diretório, mesmo repetindo a configuração: o painel
+    # continua lendo a execução anterior até a troca do manifesto
+    execucao = f"{identificacao}-{datetime.datetime.now():%Y%m%dT%H%M%S%f}"
+    destino = os.path.join(args.saida, execucao)
+    cubo = agregar(checkpoint, partes, destino)
+
+    linhas = sum(pq.ParquetFile(checkpoint.caminho_parte(i)).metadata.num_rows for i in partes)
+    instrumentacao.salvar(destino)
+    publicar_execucao(args.saida, {
+        'execucao': execucao,
+        'checkpoint': identificacao,
+        'configuracao': config,
+        'campos_preenchidos': _processor.campos_preenchidos + (['frases_chave'] if _processor.frases_chave else []),
+        'linhas': linhas,
+        'partes': [nome_parte(i) for i in partes],
+        'cubo': {'largura_idade': cubo.largura_idade, 'n_faixas_polaridade': cubo.n_faixas_polaridade},
+        'indice_textual': ARQUIVO_INDICE_TEXTUAL,
+        'frases_chave': ARQUIVO_FRASES_CHAVE,
+        'modelo_topicos': ARQUIVO_MODELO_TOPICOS if os.path.exists(
+            os.path.join(destino, ARQUIVO_MODELO_TOPICOS)) else None,
+        'ingestao': args.ingestao.relatorio if args.ingestao is not None else None
+    })
+    print(f"Artefatos publicados em {destino} ({linhas} entrevistas)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pipeline em lote: gera/lê entrevistas, processa com NLP, agrega e grava artefatos Parquet")
+    fonte = parser.add_mutually_exclusive_group()
+    fonte.add_argument('--entrada', help="Exportação .csv, .jsonl ou .parquet com as entrevistas "
+                       "(linhas inválidas vão para data/quarentena)")
+    fonte.add_argument('--gerar', type=int, default=150, help="Gera N entrevistas fictícias (padrão)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default=DIRETORIO_ARTEFATOS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos de NLP em paralelo")
+    parser.add_argument('--chunk-size', type=int, default=TAMANHO_BLOCO_PADRAO, help="Entrevistas por bloco")
+    parser.add_argument('--batch-size', type=int, default=64, help="Lote do nlp.pipe dentro de cada bloco")
+    parser.add_argument('--perfil', default=PERFIL_PADRAO, choices=list(PERFIS_ANALISE))
+    parser.add_argument('--recomecar', action='store_true', help="Ignora o checkpoint e processa tudo de novo")
+    executar(parser.parse_args())
@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from utils import caminho_dados, stop_words_portugues
+
+N_TOPICOS_PADRAO = 5
+N_PALAVRAS_PADRAO = 10
+MAX_VOCABULARIO = 5000
+
+# Processos usados pelo LDA em lotes grandes (-1 = todos os núcleos)
+N_JOBS_PADRAO = int(os.environ.get('EVASAO_TOPICOS_JOBS', '-1'))
+# Abaixo disso o custo de subir os processos é maior que o ganho do paralelismo
+LIMIAR_PARALELO = 10_000
+# Queda máxima da cobertura do vocabulário nas entrevistas novas (em relação à do ajuste)
+# antes de um novo ajuste completo
+QUEDA_COBERTURA_MAXIMA = float(os.environ.get('EVASAO_TOPICOS_QUEDA_COBERTURA', '0.1'))
+
+
+def _hashes(textos):
+    """Hash de 64 bits de cada texto, calculado de forma vetorizada"""
+    textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+    return pd.util.hash_pandas_object(textos, index=False).to_numpy()
+
+
+def caminho_modelo(n_topicos, identificacao):
+    """Arquivo do modelo em data/ para um conjunto de dados + versão do pipeline"""
+    return caminho_dados(f'modelo_topicos_{n_topicos}_{identificacao}.joblib')
+
+
+def _contar_tokens(vectorizer, textos):
+    """Tokens de cada texto após o pré-processamento do vetorizador (com e sem vocabulário)"""
+    analisar = vectorizer.build_analyzer()
+    return sum(len(analisar(texto)) for texto in textos)
+
+
+class ServicoTopicos:
+    """Modelo de tópicos (CountVectorizer + LDA online) ajustado uma vez e salvo em disco
+
+    O vocabulário é fixado em cada ajuste; entrevistas novas atualizam o LDA com
+    partial_fit enquanto o vocabulário cobre os seus termos. Quando a cobertura das
+    novas cai mais que QUEDA_COBERTURA_MAXIMA em relação à do ajuste, o modelo é
+    reajustado do zero sobre o corpus recebido.
+
+    caminho: arquivo do modelo, que deve identificar os dados e a versão do pipeline
+    (caminho_modelo, ou a pasta de uma execução do pipeline); sem caminho o modelo
+    fica só em memória.
+    """
+
+    def __init__(self, n_topicos=N_TOPICOS_PADRAO, caminho=None, persistir=True,
+                 max_vocabulario=MAX_VOCABULARIO, n_jobs=N_JOBS_PADRAO, seed=42):
+        self.n_topicos = n_topicos
+        self.caminho = caminho
+        self.persistir = persistir and caminho is not None
+        self.max_vocabulario = max_vocabulario
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.vectorizer = None
+        self.lda = None
+        self._vistos = np.array([], dtype=np.uint64)
+        # Fração dos tokens do corpus de ajuste que está no vocabulário
+        self._cobertura = None
+        self._lock = threading.RLock()
+        self._thread = None
+        # Versão do último corpus enviado a atualizar_em_segundo_plano
+        self._versao_enviada = None
+        self._status = {'estado': 'nao_ajustado'}
+        self._carregado = False
+
+    @property
+    def ajustado(self):
+        self._carregar()
+        return self.lda is not None
+
+    def _carregar(self):
+        """Lê o modelo salvo na primeira consulta"""
+        if self._carregado:
+            return
+        with self._lock:
+            if self._carregado:
+                return
+            self._carregado = True
+            if not self.persistir or not os.path.exists(self.caminho):
+                return
+            try:
+                import joblib
+                dados = joblib.load(self.caminho)
+                self.vectorizer, self.lda = dados['vectorizer'], dados['lda']
+                self._vistos = dados['vistos']
+                self._cobertura = dados.get('cobertura')
+                self._status = {'estado': 'ajustado', 'documentos': len(self._vistos),
+                                'ajustado_em': dados.get('ajustado_em')}
+            except Exception as e:
+                print(f"Não foi possível carregar o modelo de tópicos: {str(e)}")
+
+    def salvar(self):
+        if not self.persistir or self.lda is None:
+            return
+        import joblib
+        dados = {'vectorizer': self.vectorizer, 'lda': self.lda, 'vistos': self._vistos,
+                 'cobertura': self._cobertura, 'ajustado_em': self._status.get('ajustado_em')}
+        # Grava em arquivo temporário e troca: leitores nunca veem um modelo pela metade
+        temporario = f"{self.caminho}.tmp"
+        joblib.dump(dados, temporario)
+        os.replace(temporario, self.caminho)
+
+    def _n_jobs(self, n_documentos):
+        return self.n_jobs if n_documentos >= LIMIAR_PARALELO else 1
+
+    def ajustar(self, textos):
+        """Ajuste completo: novo vocabulário e novo LDA sobre todo o corpus"""
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.decomposition import LatentDirichletAllocation
+
+        textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+        inicio = time.perf_counter()
+        with self._lock:
+            self._carregado = True
+            vectorizer = CountVectorizer(max_df=0.95, min_df=2 if len(textos) > 1 else 1,
+                                         max_features=self.max_vocabulario, stop_words=stop_words_portugues())
+            dtm = vectorizer.fit_transform(textos)
+            lda = LatentDirichletAllocation(n_components=self.n_topicos, learning_method='online',
+                                            random_state=self.seed, n_jobs=self._n_jobs(len(textos)))
+            lda.fit(dtm)
+            self.vectorizer, self.lda = vectorizer, lda
+            self._vistos = np.unique(_hashes(textos))
+            self._cobertura = float(dtm.sum()) / max(_contar_tokens(vectorizer, textos), 1)
+            self._status = {'estado': 'ajustado', 'documentos': len(self._vistos), 'cobertura': self._cobertura,
+                            'tempo_ajuste': time.perf_counter() - inicio, 'ajustado_em': time.time()}
+            self.salvar()
+        return self
+
+    def atualizar(self, textos):
+        """Atualiza o modelo só com as entrevistas ainda não vistas (ajusta se não houver modelo)
+
+        textos: o corpus inteiro conhecido até agora (base de um eventual reajuste completo).
+        Retorna o número de entrevistas novas incorporadas.
+        """
+        if not self.ajustado:
+            self.ajustar(textos)
+            return len(self._vistos)
+
+        textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+        hashes = _hashes(textos)
+        novos = ~np.isin(hashes, self._vistos)
+        if not novos.any():
+            return 0
+
+        with self._lock:
+            dtm = self.vectorizer.transform(textos[novos])
+            cobertura = float(dtm.sum()) / max(_contar_tokens(self.vectorizer, textos[novos]), 1)
+            if self._cobertura is None or cobertura < self._cobertura - QUEDA_COBERTURA_MAXIMA:
+                print(f"Cobertura do vocabulário de tópicos caiu para {cobertura:.0%} "
+                      f"(ajuste: {self._cobertura or 0:.0%}), reajustando")
+                self.ajustar(textos)
+                return int(novos.sum())
+            self.lda.n_jobs = self._n_jobs(int(novos.sum()))
+            self.lda.partial_fit(dtm)
+            self._vistos = np.union1d(self._vistos, hashes[novos])
+            self._status.update({'estado': 'ajustado', 'documentos': len(self._vistos),
+                                 'ajustado_em': time.time()})
+            self.salvar()
+        return int(novos.sum())
+
+    def atualizar_em_segundo_plano(self, textos, versao=None):
+        """Dispara atualizar() em uma thread; chamadas com um ajuste em andamento são ignoradas
+
+        versao: identifica o corpus (ex.: versão dos dados do trabalhador); a mesma versão
+        não dispara outra thread, evitando copiar e hashear o corpus a cada rerun do painel.
+        """
+        if versao is not None and versao == self._versao_enviada:
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        self._versao_enviada = versao
+        textos = pd.Series(textos, dtype=object).copy()
+
+        def executar():
+            estado_anterior = dict(self._status)
+            self._status = {**estado_anterior, 'estado': 'ajustando'}
+            try:
+                self.atualizar(textos)
+            except Exception as e:
+                print(f"Erro no ajuste do modelo de tópicos: {str(e)}")
+                self._status = {**estado_anterior, 'estado': 'erro', 'erro': str(e)}
+            finally:
+                # Sem entrevistas novas atualizar() não mexe no estado
+                if self._status.get('estado') == 'ajustando':
+                    self._status = estado_anterior
+
+        self._thread = threading.Thread(target=executar, daemon=True, name=f"topicos-{self.n_topicos}")
+        self._thread.start()
+        return True
+
+    def transformar(self, textos):
+        """Distribuição de tópicos de cada entrevista (linhas somam 1)"""
+        if not self.ajustado:
+            raise RuntimeError("Modelo de tópicos ainda não ajustado")
+        textos = pd.Series(textos, dtype=object).fillna('').astype(str)
+        return self.lda.transform(self.vectorizer.transform(textos))
+
+    def topicos(self, n_palavras=N_PALAVRAS_PADRAO):
+        """Descrição de cada tópico pelas palavras de maior peso"""
+        if not self.ajustado:
+            return []
+        palavras = self.vectorizer.get_feature_names_out()
+        principais = np.argsort(self.lda.components_, axis=1)[:, :-n_palavras - 1:-1]
+        return [f"Tópico {idx}: {' '.join(palavras[linha])}" for idx, linha in enumerate(principais)]
+
+    def status(self):
+        """Estado atual: nao_ajustado, ajustando, ajustado ou erro"""
+        self._carregar()
+        return dict(self._status)
+
+
+_servicos = {}
+_lock_servicos = threading.Lock()
+
+
+def obter_servico_topicos(n_topicos=N_TOPICOS_PADRAO, identificacao=None, caminho=None):
+    """Serviço de tópicos compartilhado pelo processo (um por número de tópicos e modelo)
+
+    identificacao: dados + versão do pipeline (modelo salvo em data/ via caminho_modelo);
+    caminho: modelo já publicado (ex.: execução do pipeline). Sem nenhum dos dois o
+    modelo não é persistido, para não ser reaproveitado com outros dados.
+    """
+    if caminho is None and identificacao is not None:
+        caminho = caminho_modelo(n_topicos, identificacao)
+    chave = (n_topicos, caminho)
+    with _lock_servicos:
+        if chave not in _servicos:
+            _servicos[chave] = ServicoTopicos(n_topicos, caminho)
+        return _servicos[chave]
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import threading
+import time
+import pandas as pd
+
+from armazem_anotacoes import ArmazemAnotacoes
+from colunar import ColunaLista, FrameCompacto, compactar, concatenar
+from data_processing import EntrevistaProcessor
+from instrumentacao import instrumentacao
+
+TAMANHO_PRIMEIRO_BLOCO = 100
+TAMANHO_BLOCO = 1000
+# Durante o processamento o painel só recebe dados novos (e reconstrói filtros, cubo e
+# navegador) quando as entrevistas publicadas crescem esse fator ou passa esse intervalo (s)
+FATOR_ATUALIZACAO_PAINEL = 2
+INTERVALO_ATUALIZACAO_PAINEL = float(os.environ.get('EVASAO_INTERVALO_REINDEXACAO', '60'))
+
+
+def chave_entrada(entrada):
+    """Identifica os dados de entrada: arquivo (caminho, tamanho, modificação) ou conteúdo do DataFrame"""
+    if isinstance(entrada, pd.DataFrame):
+        conteudo = pd.util.hash_pandas_object(entrada, index=False).to_numpy().tobytes()
+    else:
+        info = os.stat(entrada.caminho)
+        conteudo = f"{os.path.abspath(entrada.caminho)}|{info.st_size}|{info.st_mtime_ns}".encode('utf-8')
+    return hashlib.sha1(conteudo).hexdigest()[:16]
+
+
+class TrabalhadorProcessamento:
+    """Processa o corpus em blocos numa thread, publicando cada bloco assim que termina
+
+    O painel lê versionado() a cada rerun e mostra as entrevistas já processadas enquanto o
+    restante continua em segundo plano. O primeiro bloco é pequeno para que a primeira
+    visão útil apareça em poucos segundos. Cada bloco é compactado (colunar) uma única
+    vez, aqui; os DataFrames com listas Python são descartados. Os blocos compactos só
+    são unidos quando o painel recebe dados novos (ver versionado()), não a cada bloco.
+
+    entrada: DataFrame ou iterável de blocos (ex.: Ingestao de um arquivo real, lido aos
+    poucos; nesse caso o total só é conhecido ao final da leitura).
+    """
+
+    def __init__(self, entrada, criar_processador=EntrevistaProcessor, armazem=None,
+                 tamanho_bloco=TAMANHO_BLOCO, tamanho_primeiro_bloco=TAMANHO_PRIMEIRO_BLOCO, batch_size=64):
+        self.entrada = entrada
+        self.criar_processador = criar_processador
+        self.armazem = armazem
+        self.tamanho_bloco = tamanho_bloco
+        self.tamanho_primeiro_bloco = tamanho_primeiro_bloco
+        self.batch_size = batch_size
+        self.processor = None
+        self.chave_entrada = chave_entrada(entrada)
+        # Frases-chave por TF-IDF do corpus: ajustado quando todos os blocos terminam
+        self.motor_frases = None
+
+        self._compacto = None
+        # Blocos compactos publicados e ainda não unidos a _compacto
+        self._pendentes = []
+        self._unido_em = 0.0
+        self._versao = None
+        self._lock = threading.Lock()
+        self._cancelar = threading.Event()
+        self._thread = None
+        total = len(entrada) if isinstance(entrada, pd.DataFrame) else None
+        self._status = {'estado': 'aguardando', 'processados': 0, 'total': total, 'blocos': 0}
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, daemon=True, name='processamento')
+            self._thread.start()
+        return self
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def _limites(self):
+        """Intervalos (início, fim) dos blocos: o primeiro menor, os demais de tamanho fixo"""
+        total = len(self.entrada)
+        inicio = 0
+        tamanho = min(self.tamanho_primeiro_bloco, self.tamanho_bloco)
+        while inicio < total:
+            yield inicio, min(inicio + tamanho, total)
+            inicio += tamanho
+            tamanho = self.tamanho_bloco
+
+    def _iterar_blocos(self):
+        if isinstance(self.entrada, pd.DataFrame):
+            for inicio, fim in self._limites():
+                yield self.entrada.iloc[inicio:fim]
+        else:
+            yield from self.entrada
+
+    def _executar(self):
+        inicio = time.perf_counter()
+        self._atualizar(estado='carregando_modelo')
+        try:
+            self.processor = self.criar_processador()
+            armazem = self.armazem or ArmazemAnotacoes()
+            self._atualizar(estado='processando')
+
+            concluidos = 0
+            for bloco in self._iterar_blocos():
+                if self._cancelar.is_set():
+                    self._atualizar(estado='cancelado')
+                    return
+
+                def progresso(processados, total, base=concluidos):
+                    self._atualizar(processados=base + processados)
+
+                with instrumentacao.etapa('trabalhador.bloco'):
+                    processado = armazem.anotar(bloco, self.processor, batch_size=self.batch_size,
+                                                progresso=progresso)
+
+                concluidos += len(bloco)
+                with instrumentacao.etapa('trabalhador.compactar'):
+                    compacto = compactar(processado)
+                    del processado
+                with self._lock:
+                    self._pendentes.append(compacto)
+                    self._status['blocos'] += 1
+                self._atualizar(processados=concluidos)
+
+            with instrumentacao.etapa('trabalhador.frases_chave'):
+                self._ajustar_frases()
+            self._atualizar(estado='concluido', total=concluidos, tempo_total=time.perf_counter() - inicio)
+        except Exception as e:
+            print(f"Falha no processamento em segundo plano: {str(e)}")
+            self._atualizar(estado='erro', erro=str(e))
+
+    def _ajustar_frases(self):
+        """Ranqueia as frases do corpus e grava as frases-chave de cada entrevista (se o perfil as preenche)"""
+        processado = self.parcial()
+        if processado is None or 'texto' not in processado.tabela.columns:
+            return
+        try:
+            from frases_chave import MotorFrasesChave
+            self.motor_frases, frases = MotorFrasesChave.ranquear_corpus(processado.tabela['texto'])
+        except Exception as e:
+            print(f"Frases-chave do corpus indisponíveis: {str(e)}")
+            return
+        if not self.processor.frases_chave or 'frases_chave' not in processado.listas:
+            return
+        # Novo frame com a coluna trocada: o painel pode estar lendo o anterior
+        listas = {**processado.listas, 'frases_chave': ColunaLista.de_listas(frases)}
+        with self._lock:
+            self._compacto = FrameCompacto(processado.tabela, listas, processado.ordem_colunas)
+            self._versao = f"{self.identificacao()}-{self._status['blocos']}-frases"
+
+    def identificacao(self):
+        """Dados de entrada + versão do pipeline (None até o modelo de NLP carregar)
+
+        Identifica os modelos derivados das entrevistas (ex.: tópicos) persistidos entre execuções.
+        """
+        if self.processor is None:
+            return None
+        return f"{self.chave_entrada}_{self.processor.versao_pipeline()}"
+
+    def _atualizar(self, **campos):
+        with self._lock:
+            self._status.update(campos)
+
+    def status(self):
+        """estado (aguardando, carregando_modelo, processando, concluido, cancelado, erro), contagens reais"""
+        with self._lock:
+            return dict(self._status)
+
+    @property
+    def concluido(self):
+        return self.status()['estado'] in ('concluido', 'cancelado', 'erro')
+
+    def _unir_pendentes(self):
+        """Une a _compacto os blocos publicados desde a última leitura (chamar com o lock)
+
+        Troca por um novo frame: o painel pode estar lendo o anterior. Com o painel relendo
+        a cada poucos segundos, o frame acumulado é copiado uma vez por leitura, não por bloco.
+        """
+        if self._pendentes:
+            frames = self._pendentes if self._compacto is None else [self._compacto] + self._pendentes
+            with instrumentacao.etapa('trabalhador.unir_blocos'):
+                self._compacto = concatenar(frames)
+            self._pendentes = []
+            # Publicada junto com os dados: identifica o que o painel recebe sem hash do conteúdo
+            self._versao = f"{self.identificacao()}-{self._status['blocos']}"
+            self._unido_em = time.monotonic()
+
+    def parcial(self):
+        """Entrevistas já processadas no layout compacto (FrameCompacto; None enquanto nenhum bloco terminou)"""
+        with self._lock:
+            self._unir_pendentes()
+            return self._compacto
+
+    def versionado(self):
+        """(dados, versão) lidos juntos para o painel; a versão muda quando os dados mudam
+
+        A versão (entrada + versão do pipeline + número de blocos) identifica os dados
+        entre reruns no lugar de um hash das colunas. Enquanto o processamento não termina,
+        os blocos novos só entram quando o total cresce FATOR_ATUALIZACAO_PAINEL vezes ou
+        passa INTERVALO_ATUALIZACAO_PAINEL: o painel reconstrói seus índices a cada versão,
+        e reconstruí-los a cada bloco custaria O(n²) numa carga longa.
+        """
+        with self._lock:
+            if self._pendentes and self._compacto is not None and self._status['estado'] == 'processando':
+                publicadas = len(self._compacto) + sum(len(bloco) for bloco in self._pendentes)
+                if (publicadas < FATOR_ATUALIZACAO_PAINEL * len(self._compacto)
+                        and time.monotonic() - self._unido_em < INTERVALO_ATUALIZACAO_PAINEL):
+                    return self._compacto, self._versao
+            self._unir_pendentes()
+            return self._compacto, self._versao
@@ -1 +1,40 @@
+import os
 
+# Diretórios do projeto
+DIRETORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_RAIZ, 'data')
+
+
+def caminho_dados(*partes):
+    """Retorna um caminho dentro de data/, criando o diretório pai se necessário"""
+    caminho = os.path.join(DIRETORIO_DADOS, *partes)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    return caminho
+
+# Modo de início rápido: módulos pesados só são importados quando a aba/análise que os usa roda
+INICIO_RAPIDO = os.environ.get('EVASAO_INICIO_RAPIDO', '1') != '0'
+
+# Módulos pesados pré-carregados quando o início rápido está desligado
+MODULOS_PESADOS = ['spacy', 'sklearn', 'wordcloud', 'matplotlib', 'folium']
+
+
+def stop_words_portugues():
+    """Stop words do português do spaCy, ordenadas (o scikit-learn só tem a lista do inglês); None sem o spaCy"""
+    try:
+        from spacy.lang.pt.stop_words import STOP_WORDS
+        return sorted(STOP_WORDS)
+    except ImportError:
+        return None
+
+
+def pre_carregar_modulos():
+    """Importa antecipadamente os módulos pesados (comportamento sem início rápido)"""
+    import importlib
+    for modulo in MODULOS_PESADOS:
+        try:
+            importlib.import_module(modulo)
+        except ImportError:
+            print(f"Módulo {modulo} não disponível")
+
+
+DIRETORIO_RECURSOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recursos')
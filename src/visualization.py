@@ -1,9 +1,34 @@
+import os
+import io
+import hashlib
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from collections import Counter
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+from itertools import chain
+from cubo import CuboAgregado, ajustar_intervalo_polaridade, bordas_polaridade
+from conjunto_dados import RecorteDados
+from navegador_entrevistas import NavegadorEntrevistas, COLUNAS_LISTAGEM
+from instrumentacao import instrumentacao
+
+# Modo de grandes volumes: acima deste número de linhas filtradas nenhum gráfico usa linhas brutas
+LIMITE_LINHAS_GRANDES = int(os.environ.get('EVASAO_LIMITE_LINHAS_GRANDES', '20000'))
+# Máximo de pontos enviados ao navegador em gráficos de dispersão (amostragem acima disso)
+MAX_PONTOS_DISPERSAO = int(os.environ.get('EVASAO_MAX_PONTOS_DISPERSAO', '5000'))
+# 'seletor': só a aba ativa é calculada a cada interação; 'abas': todas, com st.tabs
+MODO_ABAS = os.environ.get('EVASAO_MODO_ABAS', 'seletor')
+# Chave do checkbox do painel de desenvolvimento que liga a medição do payload dos gráficos
+CHAVE_MEDIR_PAYLOAD = 'medir_payload_graficos'
+
+# Colunas que cada aba lê do recorte; métricas, sunburst e agregados vêm do cubo e a
+# nuvem de palavras das frequências de temas, então o restante nem sai do disco
+COLUNAS_ABAS = {
+    'categorias': ['curso', 'situacao', 'idade', 'polaridade'],
+    'mapa': ['regiao', 'situacao', 'polaridade'],
+    'insights': ['tokens_limpos']
+}
 
 def mostrar_filtros(df):
     """Retorna um dicionário com os filtros aplicados - versão aprimorada"""
@@ -12,6 +37,12 @@ def mostrar_filtros(df):
     with st.sidebar:
         st.header("🔍 Filtros Avançados")
         
+        # Busca textual (índice invertido sobre tokens_limpos)
+        filtros['busca'] = st.text_input(
+            "Buscar nas entrevistas",
+            help='Termos separados por espaço exigem todos; use OU para alternativas, '
+                 '"aspas" para frases exatas e -termo para excluir.').strip()
+        
         # Filtros básicos
         col1, col2 = st.columns(2)
         with col1:
@@ -46,27 +77,34 @@ def mostrar_filtros(df):
             value=(idade_min, idade_max))
         
         # Filtro por polaridade - COM VALIDAÇÃO
-        polaridade_min, polaridade_max = float(df['polaridade'].min()), float(df['polaridade'].max())
+        # Passos nas bordas das faixas do cubo: métricas e gráficos contam as mesmas linhas do recorte
+        bordas = bordas_polaridade()
+        polaridade_min = float(bordas[max(np.searchsorted(bordas, df['polaridade'].min(), side='right') - 1, 0)])
+        polaridade_max = float(bordas[min(np.searchsorted(bordas, df['polaridade'].max()), len(bordas) - 1)])
         # Garantir que min != max
         if polaridade_min == polaridade_max:
-            polaridade_max = polaridade_min + 0.1  # Adiciona 0.1 para evitar erro
+            polaridade_min, polaridade_max = float(bordas[0]), float(bordas[-1])
             
-        filtros['polaridade_range'] = st.slider(
+        filtros['polaridade_range'] = ajustar_intervalo_polaridade(st.slider(
             "Polaridade do Sentimento",
             min_value=polaridade_min,
             max_value=polaridade_max,
             value=(polaridade_min, polaridade_max),
-            help="Valores próximos de -1 são negativos, próximos de +1 são positivos")
+            step=float(bordas[1] - bordas[0]),
+            help="Valores próximos de -1 são negativos, próximos de +1 são positivos"))
     
     return filtros
 
-def plotar_wordcloud(df):
-    """Gera uma nuvem de palavras dos temas mais frequentes"""
+def gerar_figura_wordcloud(df):
+    """Gera a figura matplotlib da nuvem de palavras (None se não houver temas)"""
     temas = [item for sublist in df['temas'].tolist() for item in sublist]
     if not temas:
-        st.info("Nenhum tema identificado para exibir")
-        return
-        
+        return None
+    
+    # Importação tardia: só paga o custo quando a nuvem é desenhada
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+    
     wordcloud = WordCloud(
         width=800, 
         height=400,
@@ -77,7 +115,51 @@ def plotar_wordcloud(df):
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.imshow(wordcloud, interpolation='bilinear')
     ax.axis('off')
-    st.pyplot(fig)
+    return fig
+
+def frequencias_temas(df):
+    """Frequência de cada tema no recorte (tema -> contagem)"""
+    return dict(Counter(chain.from_iterable(df['temas'].tolist())))
+
+def impressao_frequencias(frequencias):
+    """Impressão digital de um conjunto de frequências, independente da ordem"""
+    conteudo = '\n'.join(f"{termo}\t{contagem}" for termo, contagem in sorted(frequencias.items()))
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def gerar_png_wordcloud(frequencias):
+    """Renderiza a nuvem de palavras direto das frequências, como PNG (sem matplotlib)"""
+    from wordcloud import WordCloud
+    
+    wordcloud = WordCloud(
+        width=800, 
+        height=400,
+        background_color='white',
+        colormap='viridis',
+        max_words=50,
+        random_state=42).generate_from_frequencies(frequencias)
+    
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _png_wordcloud_em_cache(impressao, _frequencias):
+    # Mesmas frequências (mesmo recorte de filtros) reaproveitam a imagem já renderizada
+    return gerar_png_wordcloud(_frequencias)
+
+def plotar_wordcloud(df, frequencias=None):
+    """Gera uma nuvem de palavras dos temas mais frequentes
+    
+    frequencias: contagens já calculadas para o recorte (ex.: ColunaLista.contagens); se
+    ausentes, são contadas a partir da coluna de temas.
+    """
+    if frequencias is None:
+        frequencias = frequencias_temas(df) if 'temas' in df.columns else {}
+    frequencias = {termo: int(contagem) for termo, contagem in frequencias.items() if contagem > 0}
+    if not frequencias:
+        st.info("Nenhum tema identificado para exibir")
+        return
+    st.image(_png_wordcloud_em_cache(impressao_frequencias(frequencias), frequencias))
 
 def highlight_text(texto, sentimento):
     """Destaca o texto baseado no sentimento"""
@@ -88,151 +170,457 @@ def highlight_text(texto, sentimento):
     else:
         st.info(texto)
 
-def plotar_visualizacoes(df, processor=None):
-    """Visualizações aprimoradas com mais insights"""
+def grafico_sunburst(celulas):
+    """Sunburst região > curso > situação a partir das contagens do cubo"""
+    dados = CuboAgregado.agregar(celulas, ['regiao', 'curso', 'situacao', 'sentimento'])
+    return px.sunburst(
+        dados, 
+        path=['regiao', 'curso', 'situacao'],
+        values='contagem',
+        color='sentimento',
+        title='Distribuição por Região, Curso e Situação')
+
+def grafico_situacao_regiao(celulas):
+    """Barras agrupadas de situação por região a partir das contagens do cubo"""
+    dados = CuboAgregado.agregar(celulas, ['regiao', 'situacao'])
+    return px.bar(
+        dados, 
+        x='regiao', 
+        y='contagem',
+        color='situacao', 
+        barmode='group',
+        labels={'contagem': 'Entrevistas'},
+        title='Distribuição de Situação por Região')
+
+def tamanho_payload(fig):
+    """Tamanho (bytes) do JSON da figura enviado ao navegador"""
+    return len(fig.to_json().encode('utf-8'))
+
+def mostrar_grafico(fig):
+    """Exibe a figura; com a medição ligada no painel de desenvolvimento, informa o tamanho do payload
+
+    Medir serializa a figura mais uma vez, então fica desligado no uso normal.
+    """
+    st.plotly_chart(fig, use_container_width=True)
+    if st.session_state.get(CHAVE_MEDIR_PAYLOAD, False):
+        st.caption(f"Payload do gráfico: {tamanho_payload(fig) / 1024:.1f} KB")
+
+def estatisticas_box(df, x, y, cor):
+    """Estatísticas exatas de box plot por grupo, no mesmo formato de CuboAgregado.quartis_polaridade"""
+    agrupado = df.groupby([x, cor], observed=True)[y]
+    quartis = agrupado.quantile([0.25, 0.5, 0.75]).unstack()
+    quartis.columns = ['q1', 'mediana', 'q3']
+    estatisticas = quartis.join(agrupado.agg(minimo='min', maximo='max', media='mean', desvio='std'))
+    estatisticas['desvio'] = estatisticas['desvio'].fillna(0)
+    return estatisticas.reset_index()
+
+def amostrar(df, limite=MAX_PONTOS_DISPERSAO, seed=42):
+    """Amostra aleatória reprodutível quando o recorte passa do limite de pontos"""
+    return df if len(df) <= limite else df.sample(limite, random_state=seed)
+
+def grafico_polaridade_curso(estatisticas):
+    """Box plot de polaridade por curso com estatísticas pré-calculadas (sem enviar pontos)"""
+    fig = go.Figure()
+    for situacao, grupo in estatisticas.groupby('situacao', observed=True):
+        fig.add_trace(go.Box(
+            name=str(situacao),
+            x=grupo['curso'].astype(str),
+            q1=grupo['q1'], median=grupo['mediana'], q3=grupo['q3'],
+            lowerfence=grupo['minimo'], upperfence=grupo['maximo'],
+            mean=grupo['media'], sd=grupo['desvio']))
+    fig.update_layout(
+        boxmode='group',
+        title='Distribuição de Polaridade por Curso',
+        xaxis_title='curso', yaxis_title='polaridade', legend_title='situacao')
+    return fig
+
+def grafico_idade_polaridade(cubo, celulas, nbins=10):
+    """Heatmap idade x polaridade enviado como matriz já binada a partir das faixas do cubo"""
+    dados = CuboAgregado.agregar(celulas, ['faixa_idade', 'faixa_polaridade'])
+    polaridade = cubo.centros_polaridade()[dados['faixa_polaridade'].to_numpy()]
+    z, bordas_idade, bordas_polaridade = np.histogram2d(
+        dados['faixa_idade'].to_numpy(dtype=np.float64), polaridade,
+        bins=nbins, weights=dados['contagem'].to_numpy())
+    fig = go.Figure(go.Heatmap(
+        x=(bordas_idade[:-1] + bordas_idade[1:]) / 2,
+        y=(bordas_polaridade[:-1] + bordas_polaridade[1:]) / 2,
+        z=z.T,
+        colorbar={'title': 'Entrevistas'}))
+    fig.update_layout(title='Densidade de Idade vs. Polaridade', xaxis_title='idade', yaxis_title='polaridade')
+    return fig
+
+def grafico_dispersao_idade_polaridade(df):
+    """Dispersão idade x polaridade em WebGL, com amostragem acima de MAX_PONTOS_DISPERSAO"""
+    amostra = amostrar(df[['idade', 'polaridade', 'situacao']])
+    fig = go.Figure()
+    for situacao, grupo in amostra.groupby('situacao', observed=True):
+        fig.add_trace(go.Scattergl(
+            x=grupo['idade'], y=grupo['polaridade'], mode='markers', name=str(situacao),
+            marker={'size': 4, 'opacity': 0.5}))
+    titulo = 'Idade vs. Polaridade por Entrevista'
+    if len(amostra) < len(df):
+        titulo += f' (amostra de {len(amostra)} de {len(df)})'
+    fig.update_layout(title=titulo, xaxis_title='idade', yaxis_title='polaridade', legend_title='situacao')
+    return fig
+
+TAMANHOS_PAGINA = [10, 25, 50, 100]
+
+def _ir_para_id(navegador, ordenadas, tamanho_pagina):
+    # Callback do campo "Ir para ID": roda antes do script, então pode posicionar página e seleção
+    valor = st.session_state.get('ir_para_id', '').strip()
+    if not valor:
+        return
+    posicao = navegador.posicao_do_id(valor)
+    pagina = None if posicao is None else navegador.pagina_da_posicao(ordenadas, posicao, tamanho_pagina)
+    if pagina is None:
+        st.session_state['aviso_ir_para_id'] = f"Entrevista {valor} não encontrada no recorte filtrado"
+        return
+    st.session_state['pagina_entrevistas'] = pagina
+    st.session_state['entrevista_selecionada'] = navegador.frame.tabela[navegador.coluna_id].iloc[posicao]
+
+def mostrar_navegador_entrevistas(navegador, posicoes=None, motor_frases=None):
+    """Listagem paginada e ordenável das entrevistas do recorte, com detalhes sob demanda
+
+    motor_frases: ranqueia frases e termos-chave da entrevista aberta pelo TF-IDF do corpus
+    """
+    colunas_ordem = [c for c in COLUNAS_LISTAGEM if c in navegador.frame.tabela.columns]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        coluna = st.selectbox("Ordenar por", colunas_ordem, key='ordem_entrevistas')
+    with col2:
+        ascendente = st.radio("Direção", ['Crescente', 'Decrescente'], horizontal=True,
+                              key='direcao_entrevistas') == 'Crescente'
+    with col3:
+        tamanho_pagina = st.selectbox("Entrevistas por página", TAMANHOS_PAGINA, key='tamanho_pagina_entrevistas')
+    
+    ordenadas = navegador.ordenacao(posicoes, coluna, ascendente)
+    total_paginas = NavegadorEntrevistas.numero_paginas(len(ordenadas), tamanho_pagina)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.text_input("Ir para ID", key='ir_para_id',
+                      on_change=_ir_para_id, args=(navegador, ordenadas, tamanho_pagina))
+        aviso = st.session_state.pop('aviso_ir_para_id', None)
+        if aviso:
+            st.warning(aviso)
+    with col2:
+        # Filtros ou tamanho de página mudaram: a página guardada pode não existir mais
+        if st.session_state.get('pagina_entrevistas', 1) > total_paginas:
+            st.session_state['pagina_entrevistas'] = total_paginas
+        numero = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas,
+                                 step=1, key='pagina_entrevistas')
+    
+    pagina = navegador.pagina(ordenadas, int(numero), tamanho_pagina)
+    st.caption(f"{len(ordenadas)} entrevistas no recorte")
+    st.dataframe(pagina, use_container_width=True)
+    
+    if pagina.empty:
+        return
+    
+    # Seletor restrito à página visível
+    ids_pagina = pagina[navegador.coluna_id].tolist()
+    if st.session_state.get('entrevista_selecionada') not in ids_pagina:
+        st.session_state.pop('entrevista_selecionada', None)
+    selected_id = st.selectbox(
+        "Selecione uma entrevista para análise detalhada", ids_pagina, key='entrevista_selecionada')
+    
+    # Texto completo, entidades e frases-chave carregados só para a entrevista aberta
+    posicao = pagina.index[ids_pagina.index(selected_id)]
+    selected = navegador.detalhe(posicao)
+    
+    # Painel de detalhes
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Metadados")
+        st.write(f"**Região:** {selected['regiao']}")
+        st.write(f"**Curso:** {selected['curso']}")
+        st.write(f"**Idade:** {selected['idade']}")
+        st.write(f"**Situação:** {selected['situacao']}")
+        st.write(f"**Sentimento:** {selected['sentimento']}")
+    
+    with col2:
+        st.subheader("Análise de Texto")
+        st.write(f"**Polaridade:** {selected['polaridade']:.2f}")
+        st.write(f"**Subjetividade:** {selected['subjetividade']:.2f}")
+        if selected['entidades']:
+            st.write("**Entidades Identificadas:**")
+            for ent, label in selected['entidades']:
+                st.write(f"- {ent} ({label})")
+    
+    # Texto completo com highlights
+    st.subheader("Texto Completo")
+    highlight_text(selected['texto'], selected['sentimento'])
+    
+    # Frases-chave gravadas ao fim do ranqueamento do corpus; antes dele (ou em perfis que
+    # não as gravam), pontuadas na hora com o motor, se já disponível
+    frases = selected['frases_chave']
+    if not frases and motor_frases is not None:
+        frases = motor_frases.frases_chave([selected['texto']])[0]
+    if frases:
+        st.subheader("Frases-Chave Identificadas")
+        for frase in frases:
+            st.write(f"- {frase}")
+    if motor_frases is not None and posicao < len(motor_frases):
+        termos = motor_frases.termos_por_entrevista([posicao])[0]
+        if termos:
+            st.write(f"**Termos-chave:** {', '.join(termos)}")
+
+class ContextoAbas:
+    """Dados compartilhados pelas abas de uma execução do painel (cubo e fatia calculados sob demanda)
+
+    cubo None: o cubo é construído sobre o df só quando uma seção o usa, e fica na
+    sessão com os resultados das seções (caso da busca, que o cubo pré-agregado não conhece).
+    """
+
+    def __init__(self, df, recorte, cubo, filtros, navegador, posicoes, chave=None, motor_frases=None,
+                 servico_topicos=None):
+        self.df = df
+        self.recorte = recorte
+        self._cubo = cubo
+        self.filtros = filtros
+        self.navegador = navegador
+        self.posicoes = posicoes
+        self.motor_frases = motor_frases
+        self.servico_topicos = servico_topicos
+        self.grandes_volumes = len(df) > LIMITE_LINHAS_GRANDES
+        # Identifica dados + filtros: mesma chave, mesmas figuras (None desliga o cache da sessão)
+        self.chave = chave
+        self._celulas = None
+
+    @property
+    def cubo(self):
+        if self._cubo is None:
+            self._cubo = self.secao('cubo', lambda: CuboAgregado(self.df))
+        return self._cubo
+
+    @property
+    def celulas(self):
+        if self._celulas is None:
+            self._celulas = self.cubo.fatiar(self.filtros)
+        return self._celulas
+
+    def secao(self, nome, construir, *extras):
+        """Resultado de construir() guardado na sessão até os dados, os filtros ou os extras mudarem"""
+        if self.chave is None:
+            return construir()
+        secoes = st.session_state.setdefault('_secoes_painel', {})
+        chave = (self.chave, extras)
+        if nome in secoes and secoes[nome][0] == chave:
+            return secoes[nome][1]
+        resultado = construir()
+        secoes[nome] = (chave, resultado)
+        return resultado
+
+
+def chave_filtros(filtros):
+    return tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple)) else v) for k, v in (filtros or {}).items()))
+
+
+def aba_visao_geral(ctx):
+    st.header("Visão Geral da Evasão")
+    secao = ctx.secao('visao_geral', lambda: {
+        'metricas': CuboAgregado.metricas(ctx.celulas),
+        'sunburst': grafico_sunburst(ctx.celulas),
+        'frequencias': ctx.recorte.frequencias('temas')
+    })
+    
+    # Métricas rápidas
+    metricas = secao['metricas']
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total de Entrevistas", metricas['total'])
+    col2.metric("Taxa de Evasão", f"{metricas['taxa_evasao'] * 100:.1f}%")
+    col3.metric("Sentimento Médio", metricas['sentimento_predominante'])
+    
+    # Gráfico de distribuição
+    mostrar_grafico(secao['sunburst'])
+    
+    # Word cloud
+    st.subheader("Temas Mais Frequentes")
+    with instrumentacao.etapa('painel.wordcloud'):
+        plotar_wordcloud(ctx.df, secao['frequencias'])
+
+
+def _graficos_categorias(ctx):
+    dados = ctx.recorte.colunas(COLUNAS_ABAS['categorias'])
+    # Quartis exatos enquanto o recorte é pequeno; acima do limite, aproximados pelo cubo
+    if ctx.grandes_volumes:
+        estatisticas = ctx.cubo.quartis_polaridade(ctx.celulas, ['curso', 'situacao'])
+    else:
+        estatisticas = estatisticas_box(dados, 'curso', 'polaridade', 'situacao')
+    return {
+        'situacao_regiao': grafico_situacao_regiao(ctx.celulas),
+        'polaridade_curso': grafico_polaridade_curso(estatisticas),
+        'idade_polaridade': grafico_idade_polaridade(ctx.cubo, ctx.celulas),
+        'dispersao': grafico_dispersao_idade_polaridade(dados)
+    }
+
+
+def aba_categorias(ctx):
+    st.header("Análise por Categoria")
+    graficos = ctx.secao('categorias', lambda: _graficos_categorias(ctx))
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Situação por Região")
+        mostrar_grafico(graficos['situacao_regiao'])
+    
+    with col2:
+        st.subheader("Sentimento por Curso")
+        mostrar_grafico(graficos['polaridade_curso'])
+    
+    # Heatmap de correlação
+    st.subheader("Relação Idade x Sentimento")
+    mostrar_grafico(graficos['idade_polaridade'])
+    
+    with st.expander("Entrevistas individuais (idade x polaridade)"):
+        mostrar_grafico(graficos['dispersao'])
+
+
+def aba_detalhes(ctx):
+    st.header("Detalhes das Entrevistas")
+    
+    mostrar_navegador_entrevistas(ctx.navegador, ctx.posicoes, ctx.motor_frases)
+
+
+def aba_mapa(ctx):
+    st.header("Mapa Interativo de Evasão")
+    try:
+        from mapa_interativo import criar_mapa_evasao
+        from motor_mapas import NIVEIS_ZOOM, NIVEL_PADRAO, obter_motor_mapas
+        nivel = NIVEL_PADRAO
+        if obter_motor_mapas().malha_disponivel():
+            nivel = st.radio("Detalhe dos limites municipais", list(NIVEIS_ZOOM), horizontal=True, key='nivel_mapa')
+        mapa = ctx.secao('mapa', lambda: criar_mapa_evasao(ctx.recorte.colunas(COLUNAS_ABAS['mapa']),
+                                                           dados_regiao=CuboAgregado.por_regiao(ctx.celulas),
+                                                           nivel=nivel), nivel)
+        mostrar_grafico(mapa)
+    except Exception as e:
+        st.error(f"Erro ao carregar o mapa: {str(e)}")
+        st.info("Carregando mapa simplificado...")
+        from mapa_interativo import mapa_simples_parana
+        mapa_simples_parana()
+
+
+def _grafico_topicos(ctx, servico):
+    tokens = ctx.recorte.colunas(COLUNAS_ABAS['insights'])['tokens_limpos']
+    distribuicao = servico.transformar(tokens).mean(axis=0)
+    return px.bar(
+        x=[f"Tópico {i}" for i in range(len(distribuicao))], y=distribuicao,
+        labels={'x': 'tópico', 'y': 'peso médio'},
+        title='Peso Médio dos Tópicos nas Entrevistas Filtradas')
+
+
+def aba_insights(ctx):
+    st.header("Principais Insights")
+    
+    # Análise de tópicos: modelo persistente, ajustado em segundo plano (sem reajuste por clique)
+    st.subheader("Tópicos Identificados nas Entrevistas")
+    try:
+        # Modelo dos dados exibidos (execução do pipeline ou dados + versão do processamento local)
+        servico = ctx.servico_topicos
+        ajustado = servico is not None and servico.ajustado
+        status = servico.status() if servico is not None else {'estado': 'nao_ajustado'}
+        if ajustado:
+            for topico in servico.topicos():
+                st.write(f"- {topico}")
+            # Modelo atualizado em segundo plano também invalida o gráfico
+            mostrar_grafico(ctx.secao('insights', lambda: _grafico_topicos(ctx, servico),
+                                      status.get('ajustado_em'), status.get('documentos')))
+        elif status['estado'] == 'ajustando':
+            st.info("Modelo de tópicos sendo ajustado em segundo plano - atualize a página em instantes")
+        elif status['estado'] == 'erro':
+            st.warning(f"Análise de tópicos não disponível: {status.get('erro')}")
+        else:
+            st.info("Modelo de tópicos ainda não ajustado")
+    except Exception as e:
+        st.warning(f"Análise de tópicos não disponível: {str(e)}")
+    
+    # N-gramas de maior peso TF-IDF médio nas entrevistas filtradas
+    if ctx.motor_frases is not None:
+        st.subheader("Termos-Chave do Recorte")
+        termos = ctx.secao('termos_chave', lambda: ctx.motor_frases.termos_recorte(ctx.posicoes),
+                           id(ctx.motor_frases))
+        if termos:
+            nomes, pesos = zip(*termos)
+            mostrar_grafico(px.bar(x=list(pesos)[::-1], y=list(nomes)[::-1], orientation='h',
+                                   labels={'x': 'peso TF-IDF médio', 'y': 'termo'}))
+    
+    # Correlações
+    st.subheader("Principais Correlações")
+    st.write("- Estudantes entre 18-22 anos tendem a mencionar mais 'dificuldade financeira'")
+    st.write("- Cursos noturnos têm maior menção a 'falta de tempo'")
+    st.write("- Mulheres mencionam mais 'apoio emocional' como fator de permanência")
+    
+    # Recomendações
+    st.subheader("Recomendações para Instituições")
+    st.write("- Criar programas de apoio financeiro para estudantes de baixa renda")
+    st.write("- Oferecer disciplinas introdutórias mais acessíveis")
+    st.write("- Desenvolver programas de mentoria entre alunos veteranos e calouros")
+
+
+# Abas do painel: chave -> (rótulo, função que a desenha)
+ABAS = {
+    'visao_geral': ("📊 Visão Geral", aba_visao_geral),
+    'categorias': ("📈 Análise por Categoria", aba_categorias),
+    'detalhes': ("📋 Detalhes das Entrevistas", aba_detalhes),
+    'mapa': ("🗺️ Mapa de Evasão", aba_mapa),
+    'insights': ("📌 Insights", aba_insights)
+}
+
+# Widgets das abas cujo valor deve sobreviver enquanto a aba não é desenhada
+CHAVES_WIDGETS_ABAS = ['ordem_entrevistas', 'direcao_entrevistas', 'tamanho_pagina_entrevistas',
+                       'pagina_entrevistas', 'entrevista_selecionada', 'nivel_mapa']
+
+
+def plotar_visualizacoes(df, processor=None, cubo=None, filtros=None, navegador=None, posicoes=None,
+                         recorte=None, versao=None, motor_frases=None, servico_topicos=None):
+    """Visualizações aprimoradas com mais insights
+    
+    Os gráficos e métricas são montados a partir do cubo pré-agregado; sem cubo,
+    um é construído sobre o próprio df (já filtrado, só colunas leves) quando alguma
+    aba o usa. recorte: acesso às demais colunas das linhas filtradas; cada aba pede
+    só as de COLUNAS_ABAS.
+    navegador/posicoes: navegador de entrevistas do conjunto completo e posições do recorte.
+    versao: identifica os dados; com ela, o que cada aba calcula fica na sessão até os
+    dados ou os filtros mudarem. motor_frases: frases e termos-chave por TF-IDF do corpus
+    (alinhado às posições do navegador), quando disponível. servico_topicos: modelo de
+    tópicos dos dados exibidos (None enquanto não houver).
+    
+    No modo 'seletor' (padrão) só a aba escolhida é calculada; no modo 'abas' todas são
+    montadas a cada rerun, como nas abas nativas do Streamlit.
+    """
     
     if df.empty:
         st.warning("Nenhum dado encontrado com os filtros selecionados!")
         return
     
-    # Layout com tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📊 Visão Geral", 
-        "📈 Análise por Categoria", 
-        "📋 Detalhes das Entrevistas",
-        "🗺️ Mapa de Evasão",
-        "📌 Insights"
-    ])
-    
-    with tab1:
-        st.header("Visão Geral da Evasão")
-        
-        # Métricas rápidas
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Total de Entrevistas", len(df))
-        col2.metric("Taxa de Evasão", 
-                    f"{len(df[df['situacao'] == 'Evadido']) / len(df) * 100:.1f}%")
-        col3.metric("Sentimento Médio", 
-                    df['sentimento'].mode()[0] if len(df) > 0 else "N/A")
-        
-        # Gráfico de distribuição
-        fig = px.sunburst(
-            df, 
-            path=['regiao', 'curso', 'situacao'],
-            color='sentimento',
-            title='Distribuição por Região, Curso e Situação')
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Word cloud
-        st.subheader("Temas Mais Frequentes")
-        plotar_wordcloud(df)
+    if recorte is None:
+        recorte = RecorteDados.de_dataframe(df)
+    # Sem cubo, o df já está filtrado: o cubo construído sobre ele não recebe filtros
+    filtros_cubo = None if cubo is None else filtros
+    if navegador is None:
+        navegador, posicoes = NavegadorEntrevistas(recorte.compacto), None
+    # A chave das seções considera todos os filtros, inclusive a busca que o cubo não conhece
+    chave = None if versao is None else (versao, chave_filtros(filtros))
+    ctx = ContextoAbas(df, recorte, cubo, filtros_cubo, navegador, posicoes, chave, motor_frases,
+                       servico_topicos)
     
-    with tab2:
-        st.header("Análise por Categoria")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Situação por Região")
-            fig = px.bar(
-                df, 
-                x='regiao', 
-                color='situacao', 
-                barmode='group',
-                title='Distribuição de Situação por Região')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.subheader("Sentimento por Curso")
-            fig = px.box(
-                df, 
-                x='curso', 
-                y='polaridade',
-                color='situacao',
-                title='Distribuição de Polaridade por Curso')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Heatmap de correlação
-        st.subheader("Relação Idade x Sentimento")
-        fig = px.density_heatmap(
-            df, 
-            x='idade', 
-            y='polaridade',
-            nbinsx=10, 
-            nbinsy=10,
-            title='Densidade de Idade vs. Polaridade')
-        st.plotly_chart(fig, use_container_width=True)
-    
-    with tab3:
-        st.header("Detalhes das Entrevistas")
-        
-        # Seletor de entrevista
-        selected_id = st.selectbox(
-            "Selecione uma entrevista para análise detalhada",
-            df['id'].unique())
-        
-        selected = df[df['id'] == selected_id].iloc[0]
-        
-        # Painel de detalhes
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Metadados")
-            st.write(f"**Região:** {selected['regiao']}")
-            st.write(f"**Curso:** {selected['curso']}")
-            st.write(f"**Idade:** {selected['idade']}")
-            st.write(f"**Situação:** {selected['situacao']}")
-            st.write(f"**Sentimento:** {selected['sentimento']}")
-        
-        with col2:
-            st.subheader("Análise de Texto")
-            st.write(f"**Polaridade:** {selected['polaridade']:.2f}")
-            st.write(f"**Subjetividade:** {selected['subjetividade']:.2f}")
-            if selected['entidades']:
-                st.write("**Entidades Identificadas:**")
-                for ent, label in selected['entidades']:
-                    st.write(f"- {ent} ({label})")
-        
-        # Texto completo com highlights
-        st.subheader("Texto Completo")
-        highlight_text(selected['texto'], selected['sentimento'])
-        
-        # Frases-chave
-        if selected['frases_chave']:
-            st.subheader("Frases-Chave Identificadas")
-            for frase in selected['frases_chave']:
-                st.write(f"- {frase}")
-    
-    with tab4:
-        st.header("Mapa Interativo de Evasão")
-        try:
-            from mapa_interativo import criar_mapa_evasao
-            mapa = criar_mapa_evasao(df)
-            st.plotly_chart(mapa, use_container_width=True)
-        except Exception as e:
-            st.error(f"Erro ao carregar o mapa: {str(e)}")
-            st.info("Carregando mapa simplificado...")
-            from mapa_interativo import mapa_simples_parana
-            mapa_simples_parana()
-    
-    with tab5:
-        st.header("Principais Insights")
-        
-        # Análise de tópicos
-        if not df.empty and processor is not None:
-            temas = processor.identificar_topicos(df['tokens_limpos'])
-            st.subheader("Tópicos Identificados nas Entrevistas")
-            for topico in temas:
-                st.write(f"- {topico}")
-        elif processor is None:
-            st.warning("Processador não disponível para análise de tópicos")
-        
-        # Correlações
-        st.subheader("Principais Correlações")
-        st.write("- Estudantes entre 18-22 anos tendem a mencionar mais 'dificuldade financeira'")
-        st.write("- Cursos noturnos têm maior menção a 'falta de tempo'")
-        st.write("- Mulheres mencionam mais 'apoio emocional' como fator de permanência")
-        
-        # Recomendações
-        st.subheader("Recomendações para Instituições")
-        st.write("- Criar programas de apoio financeiro para estudantes de baixa renda")
-        st.write("- Oferecer disciplinas introdutórias mais acessíveis")
-        st.write("- Desenvolver programas de mentoria entre alunos veteranos e calouros")
+    if ctx.grandes_volumes:
+        st.info(f"Modo de grandes volumes: {len(df)} entrevistas filtradas - "
+                f"gráficos usam estatísticas agregadas e amostras de até {MAX_PONTOS_DISPERSAO} pontos")
+    
+    if MODO_ABAS == 'abas':
+        for aba, (nome, (_, desenhar)) in zip(st.tabs([rotulo for rotulo, _ in ABAS.values()]), ABAS.items()):
+            with aba, instrumentacao.etapa(f'painel.aba_{nome}'):
+                desenhar(ctx)
+        return
+    
+    # Reatribuir mantém o valor dos widgets das abas não desenhadas (o Streamlit descarta os ausentes)
+    for chave in CHAVES_WIDGETS_ABAS:
+        if chave in st.session_state:
+            st.session_state[chave] = st.session_state[chave]
+    
+    nome = st.radio("Seção", list(ABAS), format_func=lambda k: ABAS[k][0], horizontal=True,
+                    key='aba_ativa', label_visibility='collapsed')
+    with instrumentacao.etapa(f'painel.aba_{nome}'):
+        ABAS[nome][1](ctx)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import unicodedata
+from functools import lru_cache
+
+from utils import DIRETORIO_RECURSOS
+
+CAMINHO_VOCABULARIO_PADRAO = os.path.join(DIRETORIO_RECURSOS, 'vocabulario_educacao.json')
+
+
+def sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+
+
+class VocabularioDominio:
+    """Gazetteers do domínio (instituições, municípios, cursos) e vocabulário de temas
+
+    Os termos viram padrões de PhraseMatcher compilados uma vez por modelo: entidades
+    tipadas e temas saem de uma única passada sobre o documento, sem o componente NER.
+    """
+
+    def __init__(self, entidades, temas):
+        """entidades: rótulo -> {'termos': [...], 'diferenciar_maiusculas': bool}; temas: lemas"""
+        self.entidades = {rotulo: {'termos': sorted(set(grupo['termos'])),
+                                   'diferenciar_maiusculas': bool(grupo.get('diferenciar_maiusculas', False))}
+                          for rotulo, grupo in entidades.items()}
+        self.temas = frozenset(tema.lower() for tema in temas)
+        self._matchers = {}
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_VOCABULARIO_PADRAO):
+        """Carrega o vocabulário de um arquivo JSON no formato {'entidades': {...}, 'temas': [...]}"""
+        with open(caminho, encoding='utf-8') as f:
+            dados = json.load(f)
+        return cls(dados.get('entidades', {}), dados.get('temas', []))
+
+    def impressao_digital(self):
+        """Hash do conteúdo (muda sempre que um termo, rótulo ou tema muda)"""
+        conteudo = json.dumps({'entidades': self.entidades, 'temas': sorted(self.temas)},
+                              sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+    def _matcher(self, nlp):
+        """PhraseMatchers (com e sem diferenciar maiúsculas) do vocabulário do modelo, criados uma vez"""
+        chave = id(nlp.vocab)
+        if chave not in self._matchers:
+            from spacy.matcher import PhraseMatcher
+
+            matchers = {'ORTH': PhraseMatcher(nlp.vocab, attr='ORTH'),
+                        'LOWER': PhraseMatcher(nlp.vocab, attr='LOWER')}
+            for rotulo, grupo in self.entidades.items():
+                atributo = 'ORTH' if grupo['diferenciar_maiusculas'] else 'LOWER'
+                # Variantes sem acento para textos digitados sem acentuação
+                termos = sorted({variante for termo in grupo['termos'] for variante in (termo, sem_acentos(termo))})
+                # Só o tokenizador: padrões não passam pelo pipeline completo
+                matchers[atributo].add(rotulo, [nlp.make_doc(termo) for termo in termos])
+            self._matchers[chave] = [m for m in matchers.values() if len(m)]
+        return self._matchers[chave]
+
+    def entidades_doc(self, nlp, doc):
+        """Trechos de entidades do documento (rótulo no label_); sobreposições ficam com o mais longo"""
+        from spacy.tokens import Span
+        from spacy.util import filter_spans
+
+        trechos = [Span(doc, inicio, fim, label=rotulo)
+                   for matcher in self._matcher(nlp) for rotulo, inicio, fim in matcher(doc)]
+        return filter_spans(trechos)
+
+    def temas_doc(self, doc):
+        """Lemas do documento que pertencem ao vocabulário de temas (com repetição)"""
+        temas = self.temas
+        return [lema for lema in (token.lemma_.lower() for token in doc
+                                  if not token.is_stop and not token.is_punct)
+                if len(lema) > 2 and lema in temas]
+
+
+@lru_cache(maxsize=None)
+def obter_vocabulario_padrao():
+    """Vocabulário padrão compartilhado pelo processo"""
+    return VocabularioDominio.carregar()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from colunar import ColunaLista, compactar, concatenar, descompactar
+
+
+def entrevistas(n, seed=0):
+    rng = np.random.default_rng(seed)
+    temas = ['professor', 'estágio', 'horário', 'financeiro', 'família']
+    listas_temas = [list(rng.choice(temas, rng.integers(0, 4))) for _ in range(n)]
+    entidades = [[('UNESPAR', 'ORG'), ('Apucarana', 'LOC')][:rng.integers(0, 3)] for _ in range(n)]
+    frases = [['Gostei do curso.'] if i % 3 else [] for i in range(n)]
+    # None e NaN nas colunas de listas contam como lista vazia
+    listas_temas[1] = None
+    entidades[2] = np.nan
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'regiao': rng.choice(['Curitiba', 'Londrina', None], n),
+        'sentimento': rng.choice(['Positivo', 'Neutro', 'Negativo'], n),
+        'polaridade': rng.uniform(-1, 1, n),
+        'texto': [f"Entrevista {i}" for i in range(n)],
+        'temas': listas_temas,
+        'entidades': entidades,
+        'frases_chave': frases,
+    })
+    df.loc[3, 'polaridade'] = np.nan
+    return df
+
+
+def esperado(df):
+    """df com listas ausentes trocadas por listas vazias (como compactar as guarda)"""
+    df = df.copy()
+    for coluna in ('temas', 'entidades', 'frases_chave'):
+        df[coluna] = [lista if isinstance(lista, list) else [] for lista in df[coluna]]
+    return df
+
+
+def sem_categoricas(df):
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+
+def test_ida_e_volta():
+    df = entrevistas(200)
+    compacto = compactar(df)
+    assert isinstance(compacto.tabela['regiao'].dtype, pd.CategoricalDtype)
+    assert 'temas' not in compacto.tabela.columns
+    pd.testing.assert_frame_equal(sem_categoricas(descompactar(compacto)), esperado(df))
+
+
+def test_linhas_e_colunas_escolhidas():
+    df = entrevistas(50)
+    compacto = compactar(df)
+    posicoes = [40, 2, 7, 1]
+    parcial = compacto.para_dataframe(posicoes, ['id', 'temas', 'entidades'])
+    pd.testing.assert_frame_equal(parcial, esperado(df).iloc[posicoes][['id', 'temas', 'entidades']])
+
+
+def test_concatenar_equivale_a_compactar_tudo():
+    df = entrevistas(300, seed=1)
+    # Blocos com categorias e dicionários diferentes, inclusive um só de listas vazias
+    limites = [0, 10, 11, 150, 300]
+    blocos = [df.iloc[a:b].copy() for a, b in zip(limites[:-1], limites[1:])]
+    blocos[1]['temas'] = [[]]
+    blocos[1]['regiao'] = 'Maringá'
+    unido = concatenar([compactar(bloco) for bloco in blocos])
+    completo = pd.concat(blocos)
+    pd.testing.assert_frame_equal(sem_categoricas(descompactar(unido)), esperado(completo))
+    assert sorted(unido.tabela['regiao'].cat.categories) == ['Curitiba', 'Londrina', 'Maringá']
+
+
+def test_coluna_lista_dicionario_e_frequencias():
+    coluna = ColunaLista.de_listas([['a', 'b'], [], ['b', 'b'], None, ['c']])
+    assert len(coluna) == 5
+    assert sorted(coluna.dicionario.tolist()) == ['a', 'b', 'c']
+    assert coluna[2] == ['b', 'b'] and coluna[-2] == []
+    assert coluna.frequencias() == {'a': 1, 'b': 3, 'c': 1}
+    assert coluna.frequencias([1, 3, 4]) == {'c': 1}
+    assert coluna.tomar([4, 0]).para_listas() == [['c'], ['a', 'b']]
+
+
+@pytest.mark.parametrize('listas', [[], [[]], [[], []]])
+def test_coluna_lista_sem_valores(listas):
+    coluna = ColunaLista.concatenar([ColunaLista.de_listas(listas), ColunaLista.de_listas(listas)])
+    assert coluna.para_listas() == listas + listas
+    assert coluna.frequencias() == {}
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cubo import CuboAgregado, ajustar_intervalo_polaridade, bordas_polaridade
+from filtros import MotorFiltros
+
+REGIOES = ['Curitiba', 'Londrina', 'Maringá', 'Cascavel']
+CURSOS = ['Ciência da Computação', 'Sistemas de Informação', 'ADS']
+SITUACOES = ['Evadido', 'Concluído', 'Em andamento']
+SENTIMENTOS = ['Positivo', 'Neutro', 'Negativo']
+
+
+@pytest.fixture(scope='module')
+def dados():
+    rng = np.random.default_rng(7)
+    n = 20000
+    # Muitas polaridades exatamente sobre bordas de faixa (0.0 e múltiplos de 0.1), como no léxico
+    polaridade = np.where(rng.random(n) < 0.6, 0.0, rng.uniform(-1, 1, n))
+    sobre_borda = rng.random(n) < 0.2
+    polaridade[sobre_borda] = rng.choice(bordas_polaridade(), sobre_borda.sum())
+    df = pd.DataFrame({
+        'regiao': rng.choice(REGIOES, n),
+        'curso': rng.choice(CURSOS, n),
+        'situacao': rng.choice(SITUACOES, n),
+        'sentimento': rng.choice(SENTIMENTOS, n),
+        'idade': rng.integers(17, 41, n),
+        'polaridade': polaridade,
+        'subjetividade': rng.random(n),
+    })
+    return df, MotorFiltros(df), CuboAgregado(df)
+
+
+def filtros_aleatorios(rng):
+    bordas = bordas_polaridade()
+    idade = np.sort(rng.integers(17, 41, 2))
+    polaridade = np.sort(rng.choice(bordas, 2))
+    # Ruído de ponto flutuante do controle deslizante (ex.: 0.30000000000000004)
+    polaridade = polaridade + rng.choice([0.0, 1e-16, -1e-16], 2)
+    return {
+        'regiao': rng.choice(['Todas'] + REGIOES),
+        'curso': rng.choice(['Todos'] + CURSOS),
+        'situacao': rng.choice(['Todas'] + SITUACOES),
+        'sentimento': list(rng.choice(SENTIMENTOS, rng.integers(1, 4), replace=False)),
+        'idade_range': (int(idade[0]), int(idade[1])),
+        'polaridade_range': ajustar_intervalo_polaridade(polaridade),
+    }
+
+
+def test_fatia_conta_as_mesmas_linhas_do_motor_de_filtros(dados):
+    df, motor, cubo = dados
+    rng = np.random.default_rng(11)
+    for _ in range(300):
+        filtros = filtros_aleatorios(rng)
+        posicoes = motor.filtrar(filtros)
+        celulas = cubo.fatiar(filtros)
+        assert celulas['contagem'].sum() == len(posicoes), filtros
+        assert celulas['soma_polaridade'].sum() == pytest.approx(df['polaridade'].to_numpy()[posicoes].sum(), abs=1e-6)
+
+
+@pytest.mark.parametrize('intervalo', [(0.1, 0.6), (-0.45, -0.1), (-1.0, 1.0), (0.0, 0.0)])
+def test_fatiar_intervalos_ajustados_as_bordas(dados, intervalo):
+    _, motor, cubo = dados
+    filtros = {'polaridade_range': ajustar_intervalo_polaridade(intervalo)}
+    assert cubo.fatiar(filtros)['contagem'].sum() == len(motor.filtrar(filtros))
+
+
+def test_intervalo_fora_das_bordas(dados):
+    _, _, cubo = dados
+    with pytest.raises(ValueError):
+        cubo.fatiar({'polaridade_range': (0.12, 0.6)})
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filtros import MotorFiltros, aplicar_filtros
+
+REGIOES = ['Curitiba', 'Londrina', 'Maringá', 'Cascavel']
+CURSOS = ['Ciência da Computação', 'Sistemas de Informação', 'ADS']
+SITUACOES = ['Evadido', 'Concluído', 'Em andamento']
+SENTIMENTOS = ['Positivo', 'Neutro', 'Negativo']
+
+
+@pytest.fixture(scope='module', params=['object', 'category'])
+def dados(request):
+    rng = np.random.default_rng(3)
+    n = 5000
+    polaridade = np.round(rng.uniform(-1, 1, n), 2)
+    polaridade[rng.random(n) < 0.01] = np.nan
+    df = pd.DataFrame({
+        'regiao': rng.choice(REGIOES, n),
+        'curso': rng.choice(CURSOS, n),
+        'situacao': rng.choice(SITUACOES, n),
+        'sentimento': rng.choice(SENTIMENTOS, n),
+        'idade': rng.integers(17, 41, n),
+        'polaridade': polaridade,
+    })
+    if request.param == 'category':
+        df = df.astype({c: 'category' for c in MotorFiltros.COLUNAS_CATEGORICAS})
+    return df, MotorFiltros(df)
+
+
+def filtros_aleatorios(rng):
+    idade = np.sort(rng.integers(17, 41, 2))
+    polaridade = np.sort(np.round(rng.uniform(-1, 1, 2), 2))
+    return {
+        # Inclui valores ausentes dos dados, que não podem casar com nenhuma linha
+        'regiao': rng.choice(['Todas', 'Ponta Grossa'] + REGIOES),
+        'curso': rng.choice(['Todos'] + CURSOS),
+        'situacao': rng.choice(['Todas'] + SITUACOES),
+        'sentimento': list(rng.choice(SENTIMENTOS, rng.integers(0, 4), replace=False)),
+        'idade_range': (int(idade[0]), int(idade[1])),
+        'polaridade_range': (float(polaridade[0]), float(polaridade[1])),
+    }
+
+
+def test_mesmas_linhas_de_aplicar_filtros(dados):
+    df, motor = dados
+    rng = np.random.default_rng(5)
+    for _ in range(300):
+        filtros = filtros_aleatorios(rng)
+        esperado = df.index.get_indexer(aplicar_filtros(df, filtros).index)
+        np.testing.assert_array_equal(motor.filtrar(filtros), esperado, err_msg=str(filtros))
+
+
+def test_intervalo_degenerado_nao_filtra(dados):
+    df, motor = dados
+    filtros = {'idade_range': (20, 20), 'polaridade_range': (0.5, 0.5)}
+    assert len(motor.filtrar(filtros)) == len(aplicar_filtros(df, filtros)) == len(df)
+
+
+def test_resultado_em_cache_e_somente_leitura(dados):
+    _, motor = dados
+    filtros = {'regiao': 'Curitiba', 'sentimento': ['Neutro', 'Positivo']}
+    posicoes = motor.filtrar(filtros)
+    # A ordem dos sentimentos não muda a combinação de filtros
+    assert motor.filtrar({'regiao': 'Curitiba', 'sentimento': ['Positivo', 'Neutro']}) is posicoes
+    with pytest.raises(ValueError):
+        posicoes[0] = 0
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from frases_chave import MotorFrasesChave, dividir_frases
+
+TEXTOS = [
+    'Eu gosto de programação. Programação em Python é incrível! O dia estava bonito.',   # 0
+    'O dia estava bonito. A faculdade fica longe. Transporte público ruim.',            # 1
+    'O dia estava bonito. Transporte público caro e transporte lento.',                 # 2
+    '',                                                                                 # 3
+    None,                                                                               # 4
+]
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    return MotorFrasesChave.ranquear_corpus(TEXTOS, k=3)
+
+
+def test_dividir_frases():
+    frases, documentos = dividir_frases(['Primeira frase. Segunda?  Terceira!', None, '', 'Sem ponto final'])
+    assert frases.tolist() == ['Primeira frase.', 'Segunda?', 'Terceira!', 'Sem ponto final']
+    assert documentos.tolist() == [0, 0, 0, 3]
+
+
+def test_frases_ranqueadas_por_tfidf(corpus):
+    motor, frases = corpus
+    assert len(motor) == len(TEXTOS)
+    # A frase comum a todas as entrevistas fica por último; termos repetidos e raros vêm primeiro
+    assert frases[0] == ['Programação em Python é incrível!', 'Eu gosto de programação.', 'O dia estava bonito.']
+    assert frases[1][-1] == 'O dia estava bonito.'
+    assert frases[2] == ['Transporte público caro e transporte lento.', 'O dia estava bonito.']
+    assert frases[3] == [] and frases[4] == []
+
+
+def test_k_limita_as_frases():
+    _, frases = MotorFrasesChave.ranquear_corpus(TEXTOS, k=1)
+    assert frases[:3] == [['Programação em Python é incrível!'], ['Transporte público ruim.'],
+                          ['Transporte público caro e transporte lento.']]
+
+
+def test_frases_chave_reproduz_o_corpus(corpus):
+    motor, frases = corpus
+    assert motor.frases_chave(TEXTOS, k=3) == frases
+    # Textos novos usam o vocabulário do corpus; termos desconhecidos não pontuam
+    assert motor.frases_chave(['Palavras desconhecidas aqui. Transporte lento.'], k=1) == [['Transporte lento.']]
+
+
+def test_vocabulario_sem_stop_words(corpus):
+    motor, _ = corpus
+    termos = set(motor.termos.tolist())
+    assert {'programação', 'transporte público', 'dia bonito'} <= termos
+    assert not termos & {'de', 'o', 'a', 'e', 'em', 'eu'}
+
+
+def test_termos_por_entrevista_e_recorte(corpus):
+    motor, _ = corpus
+    assert motor.termos_por_entrevista([2, 0, 3], k=2) == [['transporte', 'caro'], ['programação', 'gosto'], []]
+    recorte = motor.termos_recorte(k=3)
+    assert [termo for termo, _ in recorte][0] == 'transporte'
+    pesos = [peso for _, peso in recorte]
+    assert pesos == sorted(pesos, reverse=True)
+    assert motor.termos_recorte([3, 4]) == [] and motor.termos_recorte([]) == []
+
+
+def test_corpus_so_de_stop_words_mantem_a_ordem_das_frases():
+    motor, frases = MotorFrasesChave.ranquear_corpus(['de o. a que.', 'o a'])
+    assert len(motor.termos) == 0
+    assert frases == [['de o.', 'a que.'], ['o a']]
+
+
+def test_salvar_e_carregar(corpus, tmp_path):
+    motor, frases = corpus
+    caminho = tmp_path / 'frases.npz'
+    motor.salvar(caminho)
+    carregado = MotorFrasesChave.carregar(caminho)
+    np.testing.assert_array_equal(carregado.termos, motor.termos)
+    assert (carregado.matriz != motor.matriz).nnz == 0
+    assert carregado.frases_chave(TEXTOS, k=3) == frases
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from indice_textual import ConsultaSemTermos, IndiceInvertido
+
+# tokens_limpos: lemas em minúsculas, sem stop words
+TOKENS = [
+    'professor excelente curso noturno',    # 0
+    'curso noturno difícil trabalho',       # 1
+    'professor ausente curso',              # 2
+    'estágio remunerado curso professor',   # 3
+    '',                                     # 4
+    None,                                   # 5
+    'noturno curso professor excelente',    # 6
+]
+
+STOP_WORDS = {'de', 'o', 'a', 'e', 'que', 'muito'}
+
+
+def normalizar(texto):
+    """Imita normalizar_consulta: minúsculas e sem stop words"""
+    return [t for t in texto.lower().split() if t not in STOP_WORDS]
+
+
+@pytest.fixture(scope='module')
+def indice():
+    return IndiceInvertido.construir(TOKENS)
+
+
+@pytest.mark.parametrize('consulta, esperado', [
+    ('professor', [0, 2, 3, 6]),
+    ('professor curso', [0, 2, 3, 6]),
+    ('professor E noturno', [0, 6]),
+    ('ausente OU estágio', [2, 3]),
+    ('"curso noturno"', [0, 1]),
+    ('"noturno curso"', [6]),
+    ('"professor excelente curso"', [0]),
+    ('"curso professor"', [3, 6]),
+    ('"curso inexistente"', []),
+    ('curso -professor', [1]),
+    ('curso NÃO professor', [1]),
+    ('curso -"curso noturno"', [2, 3, 6]),
+    ('-professor', [1, 4, 5]),
+    ('remunerado OU "professor excelente" -noturno', [3]),
+    ('inexistente', []),
+])
+def test_consultas(indice, consulta, esperado):
+    np.testing.assert_array_equal(indice.buscar(consulta), esperado)
+
+
+def test_frase_com_stop_words_usa_so_os_termos_normalizados(indice):
+    np.testing.assert_array_equal(indice.buscar('"curso de noturno"', normalizar), [0, 1])
+
+
+@pytest.mark.parametrize('consulta', ['', '   ', 'de que o', '"de o" OU a', 'E OU NÃO'])
+def test_consulta_sem_termos_pesquisaveis(indice, consulta):
+    with pytest.raises(ConsultaSemTermos):
+        indice.buscar(consulta, normalizar)
+
+
+def test_salvar_e_carregar(indice, tmp_path):
+    caminho = tmp_path / 'indice.npz'
+    indice.salvar(caminho)
+    carregado = IndiceInvertido.carregar(caminho)
+    assert carregado.assinatura == indice.assinatura and len(carregado) == len(TOKENS)
+    np.testing.assert_array_equal(carregado.buscar('"curso noturno" OU ausente'), [0, 1, 2])
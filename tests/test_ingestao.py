@@ -0,0 +1,105 @@
+import json
+
+import pandas as pd
+import pytest
+
+from ingestao import ErroEsquema, Ingestao
+
+CABECALHO = 'texto,regiao,curso,situacao,idade,data_entrevista,genero,extra'
+LINHAS_CSV = [
+    'Gostei do curso,Curitiba,ADS,evadido,21,2024-03-01,Feminino,x',       # linha 2: válida
+    'Faltou apoio,Londrina,ADS,Formado,30,15/02/2024,Masculino,x',         # 3: válida (data dd/mm)
+    ',Maringá,ADS,Cursando,22,2024-03-01,Feminino,x',                      # 4: texto ausente
+    'Curso puxado,Cascavel,ADS,Trancado,22,2024-03-01,Feminino,x',         # 5: situação inválida
+    'Linha quebrada,Curitiba,ADS',                                         # 6: colunas incorretas
+    'Muito bom,Curitiba,ADS,Cursando,9,2024-13-01,Feminino,x',             # 7: idade e data inválidas
+    '"Texto, com vírgula",Curitiba,ADS, cursando ,19.0,2024-01-10,,x',     # 8: válida
+    'Sem idade,Curitiba,ADS,Cursando,,2024-01-10,Feminino,x',              # 9: idade ausente
+]
+
+
+def ler_quarentena(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f]
+
+
+@pytest.fixture
+def csv_entrevistas(tmp_path):
+    caminho = tmp_path / 'entrevistas.csv'
+    caminho.write_text('\n'.join([CABECALHO] + LINHAS_CSV) + '\n', encoding='utf-8')
+    return caminho
+
+
+@pytest.mark.parametrize('tamanho_bloco', [2, 3, 100])
+def test_csv_linhas_invalidas_vao_para_quarentena(csv_entrevistas, tmp_path, tamanho_bloco):
+    quarentena = tmp_path / 'quarentena.jsonl'
+    ingestao = Ingestao(str(csv_entrevistas), tamanho_bloco=tamanho_bloco, quarentena=str(quarentena))
+    validas = pd.concat(list(ingestao))
+
+    assert validas['texto'].tolist() == ['Gostei do curso', 'Faltou apoio', 'Texto, com vírgula']
+    # Índice e ids contínuos entre blocos
+    assert validas.index.tolist() == [0, 1, 2]
+    assert validas['id'].tolist() == [1, 2, 3]
+    assert validas['situacao'].tolist() == ['Evadido', 'Formado', 'Cursando']
+    assert validas['idade'].tolist() == [21, 30, 19]
+    assert validas['data_entrevista'].dt.strftime('%Y-%m-%d').tolist() == ['2024-03-01', '2024-02-15', '2024-01-10']
+    assert validas['genero'].tolist() == ['Feminino', 'Masculino', None]
+    assert 'extra' not in validas.columns and '_linha' not in validas.columns
+
+    relatorio = ingestao.relatorio
+    assert (relatorio['lidas'], relatorio['validas'], relatorio['invalidas']) == (8, 3, 5)
+    assert relatorio['motivos'] == {'texto_ausente': 1, 'situacao_invalida': 1, 'colunas_incorretas': 1,
+                                    'idade_invalida': 2, 'data_invalida': 1}
+
+    motivos = {registro['linha']: registro['motivo'] for registro in ler_quarentena(quarentena)}
+    assert motivos == {4: 'texto_ausente', 5: 'situacao_invalida', 6: 'colunas_incorretas',
+                       7: 'idade_invalida;data_invalida', 9: 'idade_invalida'}
+
+
+def test_nova_leitura_recomeca_a_quarentena(csv_entrevistas, tmp_path):
+    quarentena = tmp_path / 'quarentena.jsonl'
+    ingestao = Ingestao(str(csv_entrevistas), quarentena=str(quarentena))
+    for _ in range(2):
+        list(ingestao)
+    assert ingestao.relatorio['invalidas'] == 5
+    assert len(ler_quarentena(quarentena)) == 5
+
+
+def test_jsonl_invalido_e_chaves_ausentes(tmp_path):
+    caminho = tmp_path / 'entrevistas.jsonl'
+    registros = [
+        json.dumps({'Texto': 'Bom curso', 'regiao': 'Curitiba', 'curso': 'ADS', 'situacao': 'Formado',
+                    'idade': 25, 'data_entrevista': '2024-05-02', 'id': 10, 'sentimento': 'positivo'}),
+        '{"texto": "quebrado"',
+        json.dumps({'texto': 'Sem curso', 'regiao': 'Curitiba', 'situacao': 'Formado',
+                    'idade': 25, 'data_entrevista': '2024-05-02', 'id': 11, 'sentimento': 'Neutro'}),
+        json.dumps({'texto': 'Id ruim', 'regiao': 'Curitiba', 'curso': 'ADS', 'situacao': 'Formado',
+                    'idade': 25, 'data_entrevista': '2024-05-02', 'id': 'doze', 'sentimento': 'Alegre'}),
+        '[1, 2]',
+    ]
+    caminho.write_text('\n'.join(registros) + '\n', encoding='utf-8')
+    quarentena = tmp_path / 'quarentena.jsonl'
+    ingestao = Ingestao(str(caminho), quarentena=str(quarentena))
+    validas = pd.concat(list(ingestao))
+
+    assert validas['id'].tolist() == [10]
+    assert validas['sentimento'].tolist() == ['Positivo']
+    assert (ingestao.relatorio['lidas'], ingestao.relatorio['invalidas']) == (5, 4)
+    motivos = {registro['linha']: registro['motivo'] for registro in ler_quarentena(quarentena)}
+    assert motivos == {2: 'json_invalido', 3: 'curso_ausente', 4: 'id_invalido;sentimento_invalido',
+                       5: 'json_invalido'}
+
+
+def test_colunas_obrigatorias_ausentes(tmp_path):
+    caminho = tmp_path / 'entrevistas.csv'
+    caminho.write_text('texto,regiao\nOi,Curitiba\n', encoding='utf-8')
+    ingestao = Ingestao(str(caminho), quarentena=str(tmp_path / 'q.jsonl'))
+    with pytest.raises(ErroEsquema, match='curso'):
+        ingestao.verificar_esquema()
+    with pytest.raises(ErroEsquema):
+        list(ingestao)
+
+
+def test_formato_nao_suportado():
+    with pytest.raises(ValueError):
+        Ingestao('entrevistas.xlsx')